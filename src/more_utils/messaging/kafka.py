@@ -1,7 +1,12 @@
 import io
+import multiprocessing
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Literal, Union
 from uuid import uuid4
 import json
-from confluent_kafka import Consumer, Producer
+from confluent_kafka import Consumer, KafkaError, KafkaException, Producer
 from confluent_kafka.serialization import (
     Deserializer,
     MessageField,
@@ -11,11 +16,19 @@ from confluent_kafka.serialization import (
     StringSerializer,
     StringDeserializer,
 )
+from google.protobuf.json_format import MessageToDict
+from google.protobuf.message import Message as ProtobufMessage
 from google.protobuf.message_factory import MessageFactory
+import pandas as pd
+import pyarrow
 
 from more_utils.logging import configure_logger
 
 LOGGER = configure_logger(logger_name="Kafka")
+# Seconds to serve delivery callbacks while the local producer queue is full.
+QUEUE_FULL_POLL_TIMEOUT = 0.5
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_GROUP_ID = "mygroup"
 
 
 def delivery_report(err, msg):
@@ -64,6 +77,9 @@ class JSONSerializer(Serializer):
 
 class JSONDeserializer(Deserializer):
     def __call__(self, data, ctx: SerializationContext):
+        if data is None:
+            return None
+
         with _ContextStringIO(data) as payload:
             try:
                 message = json.loads(StringDeserializer("utf8")(payload.read()))
@@ -74,6 +90,25 @@ class JSONDeserializer(Deserializer):
                     f"Failed to decode payload with message type: {type(data)}" + str(e)
                 )
 
+    def deserialize_many(self, values: List[bytes], ctx: SerializationContext) -> list:
+        """Decode a list of payloads with a single json.loads call.
+
+        Raises SerializationError if the payloads cannot be decoded in bulk, e.g.
+        a tombstone or a payload holding several comma separated values, so they
+        are decoded one by one instead.
+        """
+        if any(value is None for value in values):
+            raise SerializationError("Tombstones cannot be decoded in bulk.")
+        try:
+            records = json.loads(b"[" + b",".join(values) + b"]")
+        except Exception as e:
+            raise SerializationError(f"Failed to decode payloads: {e}")
+        if len(records) != len(values):
+            raise SerializationError(
+                f"Decoded {len(records)} records from {len(values)} payloads."
+            )
+        return records
+
 
 class ProtobufSerializer(Serializer):
     def __init__(self, message_type) -> None:
@@ -102,6 +137,9 @@ class ProtobufDeserializer(Deserializer):
         self._msg_class = MessageFactory().GetPrototype(descriptor)
 
     def __call__(self, data, ctx: SerializationContext):
+        if data is None:
+            return None
+
         with _ContextStringIO(data) as payload:
             try:
                 message = self._msg_class()
@@ -114,45 +152,238 @@ class ProtobufDeserializer(Deserializer):
                     + str(e)
                 )
 
+    def deserialize_many(self, values: List[bytes], ctx: SerializationContext) -> list:
+        """Decode a list of payloads into messages, tombstones into None."""
+        messages = []
+        for value in values:
+            if value is None:
+                messages.append(None)
+                continue
+            message = self._msg_class()
+            try:
+                message.ParseFromString(value)
+            except Exception as e:
+                raise SerializationError(
+                    f"Failed to decode payload with message type: {self._msg_class}"
+                    + str(e)
+                )
+            messages.append(message)
+        return messages
+
 
 class KafkaProducer:
-    def __init__(self, host, port, stream_key_and_serializer, **stream_configs) -> None:
+    """[summary]
+    Kafka producer of serialized records.
+
+    By default every record is flushed right after it is produced, so produce
+    returns once the record is delivered. With `flush_each_message=False`
+    records are only queued, librdkafka batches them per partition according
+    to the `linger.ms`, `batch.size` and `compression.type` settings passed
+    in `stream_configs`, and delivery callbacks are served by polling after
+    each record. Queued records are delivered on flush() or close().
+
+    Args:
+        host (str): Kafka host.
+        port (int): Kafka port.
+        stream_key_and_serializer (dict): serializer per topic.
+        flush_each_message (bool, optional): flush after every produced record.
+                                             Defaults to True.
+        **stream_configs: librdkafka producer configs, e.g.
+                          ``**{"linger.ms": 5, "compression.type": "lz4"}``.
+    """
+
+    def __init__(
+        self, host, port, stream_key_and_serializer, flush_each_message=True, **stream_configs
+    ) -> None:
         self.stream_key_and_serializer = stream_key_and_serializer
-        self.producer = Producer({"bootstrap.servers": host + ":" + str(port)})
+        self.flush_each_message = flush_each_message
+        configs = {"bootstrap.servers": host + ":" + str(port)}
+        configs.update(stream_configs)
+        self.producer = Producer(configs)
+        self._key_serializer = StringSerializer("utf8")
+        self._stats_at = time.perf_counter()
+        self._stats_delivered = 0
+        self.produced = 0
+        self.delivered = 0
+        self.failed = 0
+        self._latency = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def stats(self) -> dict:
+        """Return the record counts, the delivery rate and the mean delivery latency.
+
+        The delivery rate, `messages_per_second`, covers the records delivered since
+        the previous read of stats, or since the producer was created. The counts
+        and the latency cover the lifetime of the producer.
+        """
+        now = time.perf_counter()
+        elapsed = now - self._stats_at
+        delivered = self.delivered - self._stats_delivered
+        self._stats_at, self._stats_delivered = now, self.delivered
+        return {
+            "produced": self.produced,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "pending": len(self.producer),
+            "messages_per_second": delivered / elapsed if elapsed else 0.0,
+            "mean_latency_ms": 1000 * self._latency / self.delivered if self.delivered else 0.0,
+        }
 
     def produce(self, data, stream_key, partition=0):
+        """Produce a record.
+
+        Args:
+            data: record to serialize.
+            stream_key (str): topic of the record.
+            partition (Union[int, None], optional): partition of the record, None to
+                                                    use the configured partitioner.
+                                                    Defaults to 0.
+        """
         try:
-            self.producer.produce(
-                topic=stream_key,
-                partition=partition,
-                key=StringSerializer("utf8")(str(uuid4())),
-                value=self.stream_key_and_serializer[stream_key](
-                    data,
-                    SerializationContext(stream_key, MessageField.VALUE),
-                ),
-                on_delivery=delivery_report,
-            )
-            self.producer.flush()
+            self._produce(data, stream_key, partition)
         except ValueError as e:
             LOGGER.error(f"Invalid input, discarding record. {e}")
+            return
+        if self.flush_each_message:
+            self.producer.flush()
+        else:
+            self.producer.poll(0)
+
+    def produce_many(self, records: Iterable, stream_key, partition=0) -> int:
+        """Produce records without flushing in between.
+
+        The records are queued and batched by librdkafka, delivery callbacks
+        are served along the way. If `flush_each_message` is set, the records
+        are flushed once at the end.
+
+        Args:
+            records (Iterable): records to serialize.
+            stream_key (str): topic of the records.
+            partition (Union[int, None], optional): partition of the records, None to
+                                                    use the configured partitioner.
+                                                    Defaults to 0.
+
+        Returns:
+            int: no. of records queued, invalid records are discarded.
+        """
+        count = 0
+        for data in records:
+            try:
+                self._produce(data, stream_key, partition)
+            except ValueError as e:
+                LOGGER.error(f"Invalid input, discarding record. {e}")
+                continue
+            self.producer.poll(0)
+            count += 1
+        if self.flush_each_message:
+            self.producer.flush()
+        return count
+
+    def _produce(self, data, stream_key, partition):
+        value = self.stream_key_and_serializer[stream_key](
+            data,
+            SerializationContext(stream_key, MessageField.VALUE),
+        )
+        kwargs = {} if partition is None else {"partition": partition}
+        while True:
+            try:
+                self.producer.produce(
+                    topic=stream_key,
+                    key=self._key_serializer(str(uuid4())),
+                    value=value,
+                    on_delivery=partial(self._on_delivery, time.perf_counter()),
+                    **kwargs,
+                )
+                break
+            except BufferError:
+                # The local queue is full, wait for deliveries to free it.
+                self.producer.poll(QUEUE_FULL_POLL_TIMEOUT)
+        self.produced += 1
+
+    def _on_delivery(self, produced_at, err, msg):
+        if err is not None:
+            self.failed += 1
+        else:
+            self.delivered += 1
+            self._latency += time.perf_counter() - produced_at
+        delivery_report(err, msg)
+
+    def flush(self, timeout: Union[float, None] = None) -> int:
+        """Wait for the queued records to be delivered.
+
+        Args:
+            timeout (Union[float, None], optional): max. seconds to wait, no limit if
+                                                    None. Defaults to None.
+
+        Returns:
+            int: no. of records still queued.
+        """
+        if timeout is None:
+            return self.producer.flush()
+        return self.producer.flush(timeout)
+
+    def close(self, timeout: Union[float, None] = None):
+        """Flush the queued records and log the producer stats."""
+        remaining = self.flush(timeout)
+        if remaining:
+            LOGGER.warning(f"{remaining} records were not delivered before closing.")
+        LOGGER.info(f"Producer stats: {self.stats}")
 
 
 class KafkaConsumer:
+    """[summary]
+    Kafka consumer of the topics in `stream_key_and_deserializer`.
+
+    Records are either consumed one by one with consume(), or in batches with
+    consume_batch(). For at-least-once processing of batches, disable
+    auto-commit with ``**{"enable.auto.commit": False}`` and call commit()
+    once a batch is processed.
+
+    Args:
+        host (str): Kafka host.
+        port (int): Kafka port.
+        stream_key_and_deserializer (dict): deserializer per topic.
+        group_id (str, optional): consumer group. Defaults to DEFAULT_GROUP_ID.
+        on_assign (Callable, optional): rebalance callback with the consumer and the
+                                        assigned partitions. Defaults to None.
+        on_revoke (Callable, optional): rebalance callback with the consumer and the
+                                        revoked partitions. Defaults to None.
+        **stream_configs: librdkafka consumer configs, override the defaults.
+    """
+
     def __init__(
-        self, host, port, stream_key_and_deserializer: dict, **stream_configs
+        self,
+        host,
+        port,
+        stream_key_and_deserializer: dict,
+        group_id: str = DEFAULT_GROUP_ID,
+        on_assign: Callable = None,
+        on_revoke: Callable = None,
+        **stream_configs,
     ) -> None:
-        self.consumer = Consumer(
-            {
-                "bootstrap.servers": host + ":" + str(port),
-                "group.id": "mygroup",
-                "enable.auto.commit": True,
-                "auto.offset.reset": "earliest",
-                "on_commit": self.commit_completed,
-            }
-        )
+        configs = {
+            "bootstrap.servers": host + ":" + str(port),
+            "group.id": group_id,
+            "enable.auto.commit": True,
+            "auto.offset.reset": "earliest",
+            "on_commit": self.commit_completed,
+        }
+        configs.update(stream_configs)
+        self.consumer = Consumer(configs)
         self.stream_key_and_deserializer = stream_key_and_deserializer
         self.running = False
-        self.consumer.subscribe(list(stream_key_and_deserializer.keys()))
+        subscribe_kwargs = {}
+        if on_assign is not None:
+            subscribe_kwargs["on_assign"] = on_assign
+        if on_revoke is not None:
+            subscribe_kwargs["on_revoke"] = on_revoke
+        self.consumer.subscribe(list(stream_key_and_deserializer.keys()), **subscribe_kwargs)
 
     def commit_completed(self, err, partitions):
         if err:
@@ -171,17 +402,378 @@ class KafkaConsumer:
                 continue
             data = self.stream_key_and_deserializer[new_message.topic()](
                 new_message.value(),
-                SerializationContext(
-                    self.stream_key_and_deserializer.keys(), MessageField.VALUE
-                ),
+                SerializationContext(new_message.topic(), MessageField.VALUE),
             )
             yield data, new_message.topic()
 
+    def consume_batch(
+        self,
+        max_messages: int = DEFAULT_BATCH_SIZE,
+        timeout: float = 1.0,
+        output: Literal["records", "arrow", "pandas"] = "records",
+    ) -> Dict[str, Union[list, pyarrow.RecordBatch, pd.DataFrame]]:
+        """Consume a batch of records and deserialize them per topic.
+
+        Records are deserialized in bulk per topic, in partition order, and one by
+        one if that fails. Records that fail to deserialize are logged and skipped,
+        tombstones are returned as None. For the "arrow" and "pandas" outputs the
+        records must deserialize to dicts or protobuf messages, which become the
+        rows of one RecordBatch or DataFrame per topic, tombstones are left out.
+
+        Args:
+            max_messages (int, optional): max. no. of records to consume.
+                                          Defaults to DEFAULT_BATCH_SIZE.
+            timeout (float, optional): max. seconds to wait for the batch to fill.
+                                       Defaults to 1.0.
+            output (Literal["records", "arrow", "pandas"], optional): output of each
+                                                                      topic. Defaults
+                                                                      to "records".
+
+        Returns:
+            Dict[str, Union[list, pyarrow.RecordBatch, pd.DataFrame]]: records per topic,
+            empty if no record arrived within the timeout.
+        """
+        if output not in ("records", "arrow", "pandas"):
+            raise ValueError(f"Invalid output: {output}")
+        values_by_topic = {}
+        for message in self._consume_messages(max_messages, timeout):
+            values_by_topic.setdefault(message.topic(), []).append(message.value())
+
+        batch = {}
+        for topic, values in values_by_topic.items():
+            records = self._deserialize_many(topic, values)
+            if output == "records":
+                batch[topic] = records
+                continue
+            rows = [
+                MessageToDict(record, preserving_proto_field_name=True)
+                if isinstance(record, ProtobufMessage)
+                else record
+                for record in records
+                if record is not None
+            ]
+            batch[topic] = (
+                pyarrow.RecordBatch.from_pylist(rows)
+                if output == "arrow"
+                else pd.DataFrame.from_records(rows)
+            )
+        return batch
+
+    def consume_partitions(
+        self, max_messages: int = DEFAULT_BATCH_SIZE, timeout: float = 1.0
+    ) -> Dict[tuple, list]:
+        """Consume a batch of records and deserialize them per partition.
+
+        Args:
+            max_messages (int, optional): max. no. of records to consume.
+                                          Defaults to DEFAULT_BATCH_SIZE.
+            timeout (float, optional): max. seconds to wait for the batch to fill.
+                                       Defaults to 1.0.
+
+        Returns:
+            Dict[tuple, list]: records in offset order per (topic, partition).
+        """
+        values_by_partition = {}
+        for message in self._consume_messages(max_messages, timeout):
+            values_by_partition.setdefault(
+                (message.topic(), message.partition()), []
+            ).append(message.value())
+        return {
+            (topic, partition): self._deserialize_many(topic, values)
+            for (topic, partition), values in values_by_partition.items()
+        }
+
+    def _consume_messages(self, max_messages: int, timeout: float) -> list:
+        messages = []
+        for message in self.consumer.consume(num_messages=max_messages, timeout=timeout):
+            if message.error():
+                LOGGER.error("Consumer error: {}".format(message.error()))
+                continue
+            messages.append(message)
+        return messages
+
+    def _deserialize_many(self, topic: str, values: List[bytes]) -> list:
+        deserializer = self.stream_key_and_deserializer[topic]
+        ctx = SerializationContext(topic, MessageField.VALUE)
+        if hasattr(deserializer, "deserialize_many"):
+            try:
+                return deserializer.deserialize_many(values, ctx)
+            except Exception as e:
+                LOGGER.debug(f"Decoding records on {topic} one by one. {e}")
+        records = []
+        for value in values:
+            if value is None:
+                # A tombstone, i.e. a record deleting its key.
+                records.append(None)
+                continue
+            try:
+                records.append(deserializer(value, ctx))
+            except Exception as e:
+                LOGGER.error(f"Invalid record on {topic}, discarding record. {e}")
+        return records
+
+    def commit(self, asynchronous: bool = False):
+        """Commit the offsets of the consumed records.
+
+        Args:
+            asynchronous (bool, optional): return without waiting for the commit.
+                                           Defaults to False.
+        """
+        try:
+            self.consumer.commit(asynchronous=asynchronous)
+        except KafkaException as e:
+            # Nothing consumed since the last commit.
+            if e.args[0].code() != KafkaError._NO_OFFSET:
+                raise
+
     def shutdown(self):
         self.running = False
         self.consumer.close()
 
 
+def _log_assignment(consumer, partitions):
+    LOGGER.info("Assigned partitions: " + str(partitions))
+
+
+def _log_revocation(consumer, partitions):
+    LOGGER.info("Revoked partitions: " + str(partitions))
+
+
+def _commit_revocation(consumer, partitions):
+    """Commit the offsets of the handled records before the partitions move on.
+
+    Rebalance callbacks are served within consume(), once the previous batch is
+    handled, so the stored offsets are those of handled records only, e.g. of a
+    batch whose commit failed.
+    """
+    _log_revocation(consumer, partitions)
+    try:
+        consumer.commit(asynchronous=False)
+    except KafkaException as e:
+        if e.args[0].code() != KafkaError._NO_OFFSET:
+            LOGGER.warning(f"Commit of the revoked partitions failed. {e}")
+
+
+def _run_group_worker(
+    host,
+    port,
+    stream_key_and_deserializer: dict,
+    handler: Callable,
+    group_id: str,
+    stop_event,
+    batch_size: int,
+    timeout: float,
+    stream_configs: dict,
+):
+    """Consume and handle records until the stop event is set.
+
+    Offsets are committed after the records of a batch are handled, and when
+    partitions are revoked, so records are handled at least once. Records of a
+    partition are handled in offset order, as a partition is assigned to one
+    worker of the group at a time.
+    """
+    stream_configs = dict(stream_configs, **{"enable.auto.commit": False})
+    kafka_consumer = KafkaConsumer(
+        host,
+        port,
+        stream_key_and_deserializer,
+        group_id=group_id,
+        on_assign=_log_assignment,
+        on_revoke=_commit_revocation,
+        **stream_configs,
+    )
+    try:
+        while not stop_event.is_set():
+            batch = kafka_consumer.consume_partitions(batch_size, timeout)
+            if not batch:
+                continue
+            for (topic, partition), records in batch.items():
+                handler(records, topic, partition)
+            try:
+                kafka_consumer.commit()
+            except KafkaException as e:
+                # e.g. the partitions were revoked meanwhile, their new owner
+                # consumes the batch again from the last committed offsets.
+                LOGGER.warning(f"Commit failed, the batch may be redelivered. {e}")
+    except Exception as e:
+        LOGGER.error(f"Consumer group worker failed: {e}")
+        raise
+    finally:
+        kafka_consumer.shutdown()
+
+
+def _run_group_thread(errors: dict, *args):
+    """Run a thread worker and keep its error for the consumer group."""
+    try:
+        _run_group_worker(*args)
+    except Exception as e:
+        errors[threading.current_thread().name] = e
+
+
+class KafkaConsumerGroup:
+    """[summary]
+    Runs `num_workers` consumers of one consumer group, so the partitions of
+    the topics are consumed in parallel. Each worker consumes batches of
+    records and calls `handler(records, topic, partition)` per partition in
+    offset order, then commits the offsets of the batch. The offsets of handled
+    records are also committed when partitions are revoked in a rebalance.
+    Workers are processes to use multiple cores, or threads for I/O-bound
+    handlers. A worker that fails, e.g. its handler raises, is not restarted,
+    its failure is raised by join() and shutdown() instead.
+
+    With processes, the handler and the deserializers must be picklable.
+
+    Args:
+        host (str): Kafka host.
+        port (int): Kafka port.
+        stream_key_and_deserializer (dict): deserializer per topic.
+        handler (Callable): handler of the records of a partition.
+        group_id (str, optional): consumer group. Defaults to DEFAULT_GROUP_ID.
+        num_workers (int, optional): no. of consumers. Defaults to 1.
+        use_threads (bool, optional): run the consumers in threads instead of
+                                      processes. Defaults to False.
+        batch_size (int, optional): max. no. of records per batch.
+                                    Defaults to DEFAULT_BATCH_SIZE.
+        timeout (float, optional): max. seconds to wait for a batch, which bounds
+                                   the shutdown latency. Defaults to 1.0.
+        **stream_configs: librdkafka consumer configs.
+    """
+
+    def __init__(
+        self,
+        host,
+        port,
+        stream_key_and_deserializer: dict,
+        handler: Callable,
+        group_id: str = DEFAULT_GROUP_ID,
+        num_workers: int = 1,
+        use_threads: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        timeout: float = 1.0,
+        **stream_configs,
+    ) -> None:
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.host = host
+        self.port = port
+        self.stream_key_and_deserializer = stream_key_and_deserializer
+        self.handler = handler
+        self.group_id = group_id
+        self.num_workers = num_workers
+        self.use_threads = use_threads
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.stream_configs = stream_configs
+        self._stop_event = threading.Event() if use_threads else multiprocessing.Event()
+        self._workers = []
+        self._errors = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    @property
+    def running(self) -> bool:
+        """Return True if a worker is alive."""
+        return any(worker.is_alive() for worker in self._workers)
+
+    @property
+    def failed_workers(self) -> List[str]:
+        """Return the names of the workers that stopped with an error."""
+        return [
+            worker.name
+            for worker in self._workers
+            if not worker.is_alive()
+            and (worker.name in self._errors or getattr(worker, "exitcode", 0))
+        ]
+
+    def start(self):
+        """Start the workers."""
+        if self.running:
+            raise ValueError("Consumer group is already running")
+        self._stop_event.clear()
+        self._errors = {}
+        if self.use_threads:
+            worker_class, target = threading.Thread, partial(_run_group_thread, self._errors)
+        else:
+            worker_class, target = multiprocessing.Process, _run_group_worker
+        self._workers = [
+            worker_class(
+                target=target,
+                args=(
+                    self.host,
+                    self.port,
+                    self.stream_key_and_deserializer,
+                    self.handler,
+                    self.group_id,
+                    self._stop_event,
+                    self.batch_size,
+                    self.timeout,
+                    self.stream_configs,
+                ),
+                name=f"{self.group_id}-worker-{index}",
+                daemon=True,
+            )
+            for index in range(self.num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        LOGGER.info(f"Started {self.num_workers} consumers in group {self.group_id}.")
+
+    def join(self, timeout: Union[float, None] = None):
+        """Wait for the workers to stop, or for one of them to fail.
+
+        Args:
+            timeout (Union[float, None], optional): max. seconds to wait, no limit
+                                                    if None. Defaults to None.
+
+        Raises:
+            RuntimeError: if a worker stopped with an error.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._raise_failure()
+            alive = [worker for worker in self._workers if worker.is_alive()]
+            if not alive:
+                return
+            wait = self.timeout
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return
+            alive[0].join(wait)
+
+    def shutdown(self, timeout: Union[float, None] = None):
+        """Stop the workers once their current batch is handled and committed.
+
+        Args:
+            timeout (Union[float, None], optional): max. seconds to wait per worker,
+                                                    no limit if None. Defaults to None.
+
+        Raises:
+            RuntimeError: if a worker stopped with an error.
+        """
+        self._stop_event.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        if self.running:
+            LOGGER.warning("Consumer group workers did not stop within the timeout.")
+        self._raise_failure()
+
+    def _raise_failure(self):
+        """Raise the error of the first failed worker, if any."""
+        failed_workers = self.failed_workers
+        if not failed_workers:
+            return
+        error = self._errors.get(failed_workers[0])
+        raise RuntimeError(
+            f"Consumer group worker(s) failed: {', '.join(failed_workers)}"
+        ) from error
+
+
 class KafkaStreamFactory:
     def __init__(self, hostname, port) -> None:
         self.hostname = hostname
@@ -195,6 +787,17 @@ class KafkaStreamFactory:
             **stream_configs,
         )
 
+    def create_consumer_group(
+        self, stream_key_and_deserializer, handler, **group_configs
+    ) -> KafkaConsumerGroup:
+        return KafkaConsumerGroup(
+            self.hostname,
+            self.port,
+            stream_key_and_deserializer,
+            handler,
+            **group_configs,
+        )
+
     def create_producer(self, stream_key_and_serializer, **stream_configs) -> None:
         return KafkaProducer(
             self.hostname, self.port, stream_key_and_serializer, **stream_configs
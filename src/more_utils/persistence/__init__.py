@@ -1 +1 @@
-from .modelardb import ModelarDB, ModelarDBSession
+from .modelardb import ModelarDB, ModelarDBSession, AsyncModelarDB
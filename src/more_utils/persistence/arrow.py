@@ -1,4 +1,7 @@
-from typing import Any
+import threading
+import time
+from collections import deque
+from typing import Any, Union
 
 
 import pyarrow
@@ -8,7 +11,6 @@ from pyarrow._flight import FlightUnavailableError
 
 from pymodelardb.connection import Connection
 from pymodelardb.types import ProgrammingError
-from pymodelardb.types import TypeOf
 
 
 class Cursor(object):
@@ -33,11 +35,167 @@ class Cursor(object):
             raise ProgrammingError(message)
 
 
+class FlightClientPool(object):
+    """A pool of reusable Flight clients for one ModelarDB interface.
+
+    Clients are handed out by `acquire` and returned by `release`, so the
+    gRPC channel of a client is reused by subsequent cursors. At most
+    `max_size` idle clients are kept; clients that have been idle longer than
+    `idle_timeout` seconds are evicted, and clients that have been idle longer
+    than `health_check_interval` seconds are checked before reuse.
+
+    Evicted clients are dropped rather than closed, as a result set streamed
+    through the client may still be read after its cursor is closed. Their
+    channel is closed once the last reference is gone. Once the pool is
+    closed, released clients are dropped and no client is handed out.
+
+    Arguments:
+
+     :param uri: the grpc uri of the ModelarDB interface.
+     :param max_size: maximum no. of idle clients kept in the pool.
+     :param idle_timeout: seconds after which an idle client is evicted.
+     :param health_check_interval: seconds of idleness after which a client
+     is checked for availability before it is reused.
+     :param health_check_timeout: seconds to wait for the health check.
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        max_size: int = 4,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        health_check_timeout: float = 5.0,
+    ):
+        self.uri = uri
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self._idle_clients = deque()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __len__(self):
+        """The no. of idle clients in the pool."""
+        return len(self._idle_clients)
+
+    def acquire(self) -> flight.FlightClient:
+        """Take an idle client from the pool or create a new one."""
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise ProgrammingError(
+                        "cannot acquire a client as the pool is closed"
+                    )
+                self._evict_idle_clients()
+                if not self._idle_clients:
+                    break
+                client, last_used = self._idle_clients.pop()
+            if time.monotonic() - last_used < self.health_check_interval:
+                return client
+            if self._is_healthy(client):
+                return client
+            self._close_client(client)
+        return flight.FlightClient(self.uri)
+
+    def release(self, client: flight.FlightClient):
+        """Return a client to the pool, or drop it if the pool is full."""
+        with self._lock:
+            self._evict_idle_clients()
+            if not self._closed and len(self._idle_clients) < self.max_size:
+                self._idle_clients.append((client, time.monotonic()))
+
+    def close(self):
+        """Close all the idle clients of the pool."""
+        with self._lock:
+            self._closed = True
+            while self._idle_clients:
+                client, _ = self._idle_clients.pop()
+                self._close_client(client)
+
+    def _evict_idle_clients(self):
+        """Drop the clients that have been idle longer than idle_timeout."""
+        now = time.monotonic()
+        while self._idle_clients and (
+            now - self._idle_clients[0][1] >= self.idle_timeout
+        ):
+            self._idle_clients.popleft()
+
+    def _is_healthy(self, client: flight.FlightClient) -> bool:
+        """Check that the ModelarDB interface is reachable through client."""
+        try:
+            client.wait_for_available(timeout=self.health_check_timeout)
+            return True
+        except (ArrowException, TimeoutError):
+            return False
+
+    @staticmethod
+    def _close_client(client: flight.FlightClient):
+        try:
+            client.close()
+        except ArrowException:
+            pass
+
+
 class ArrowCursor(Cursor):
-    def __init__(self, connection: Connection, host: str, port: int):
+    def __init__(
+        self,
+        connection: Connection,
+        host: str,
+        port: int,
+        pool: Union[FlightClientPool, None] = None,
+    ):
         Cursor.__init__(self, connection)
         self.__uri = "grpc://" + host + ":" + str(port)
-        self.__client = flight.FlightClient(self.__uri)
+        self.__pool = pool
+        if pool is not None:
+            self.__client = pool.acquire()
+        else:
+            self.__client = flight.FlightClient(self.__uri)
+        self.description = None
+        self.rowcount = -1
+        self._result_set = None
+
+    def execute(self, query: str):
+        """Execute query and keep the result set as Arrow record batches."""
+        self._is_closed("cannot execute query as the cursor is closed")
+        try:
+            reader = self.__client.do_get(flight.Ticket(query))
+            self.description = [(field.name, field.type) for field in reader.schema]
+            self._result_set = self.__record_batches(self.__client, reader)
+        except FlightUnavailableError:
+            raise ProgrammingError("unable to connect to: " + self.__uri) from None
+        except ArrowException as ae:
+            error = ae.args[0]
+            start_of_error = error.find("{") + 1
+            end_of_error = error.rfind("}")
+            error = error[start_of_error:end_of_error]
+            message = "unable to execute query due to: " + error
+            raise ProgrammingError(message) from None
+
+    def close(self):
+        """Mark the cursor as closed and return the client to its pool."""
+        Cursor.close(self)
+        if self.__pool is not None:
+            self.__pool.release(self.__client)
+        self.__client = None
+
+    @property
+    def schema(self) -> pyarrow.Schema:
+        """Schema of the result set of the last query."""
+        if self.description is None:
+            return None
+        return pyarrow.schema(self.description)
+
+    def __record_batches(self, client, reader):
+        """Stream the record batches of a Flight stream.
+
+        The client is referenced until the stream is exhausted, as the
+        cursor may return it to its pool before the stream is read.
+        """
+        for chunk in reader:
+            yield chunk.data
 
     def list(self):
         """Execute operation after adding the parameters."""
@@ -57,13 +215,38 @@ class ArrowCursor(Cursor):
             message = "unable to execute query due to: " + error
             raise ProgrammingError(message) from None
 
+    def get_schema(self, table_name: str) -> pyarrow.Schema:
+        """Return the Arrow schema of the given table."""
+        self._is_closed("cannot execute action as the cursor is closed")
+        descriptor = flight.FlightDescriptor.for_path(table_name)
+        try:
+            return self.__client.get_schema(descriptor).schema
+        except FlightUnavailableError:
+            raise ProgrammingError("unable to connect to: " + self.__uri) from None
+        except ArrowException as ae:
+            error = ae.args[0]
+            start_of_error = error.find("{") + 1
+            end_of_error = error.rfind("}")
+            error = error[start_of_error:end_of_error]
+            message = "unable to execute query due to: " + error
+            raise ProgrammingError(message) from None
+
     def insert(self, table_name, arrow_table):
         """Execute operation after adding the parameters."""
+        self.insert_batches(table_name, arrow_table.schema, arrow_table.to_batches())
+
+    def insert_batches(self, table_name, schema, record_batches):
+        """Write record batches into the table through a single do_put stream.
+
+        The record batches are pulled one at a time and each write blocks
+        until the stream accepts it, so the batches do not pile up in memory.
+        """
         self._is_closed("cannot execute action as the cursor is closed")
         upload_descriptor = flight.FlightDescriptor.for_path(table_name)
         try:
-            writer, _ = self.__client.do_put(upload_descriptor, arrow_table.schema)
-            writer.write(arrow_table)
+            writer, _ = self.__client.do_put(upload_descriptor, schema)
+            for record_batch in record_batches:
+                writer.write_batch(record_batch)
             writer.close()
         except FlightUnavailableError:
             raise ProgrammingError("unable to connect to: " + self.__uri) from None
@@ -1,47 +1,91 @@
-from uuid import uuid1
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from uuid import UUID, uuid1
+from typing import Callable, List, Literal, Union
 import pandas as pd
+import pyarrow
 from pandas.api.types import is_string_dtype, is_float_dtype, is_int64_dtype, is_datetime64_dtype
 
+from cassandra import InvalidRequest
 from cassandra.cluster import Cluster, Session
+from cassandra.concurrent import execute_concurrent, execute_concurrent_with_args
 from cassandra.cqlengine import columns
 from cassandra.cqlengine.models import Model
-from cassandra.cqlengine.query import BatchQuery
 from cassandra.cqlengine.management import sync_table
 from cassandra.cqlengine.connection import register_connection
-from cassandra.policies import WhiteListRoundRobinPolicy
+from cassandra.policies import TokenAwarePolicy, WhiteListRoundRobinPolicy
+from cassandra.query import BatchStatement, BatchType, tuple_factory
 
 from more_utils.persistence.base import AbstractDBLayer, AbstractDBSession
+from more_utils.logging import configure_logger
 
 import os
 os.environ["CQLENG_ALLOW_SCHEMA_MANAGEMENT"] = "CQLENG_ALLOW_SCHEMA_MANAGEMENT"
 
+LOGGER = configure_logger(logger_name="CassandraDB")
 DEFAULT_CONNECTION_NAME = "default"
 DEFAULT_KEYSPACE = "moreutils"
+DEFAULT_CONCURRENCY = 64
+DEFAULT_PAGE_SIZE = 5000
+DEFAULT_READ_WORKERS = 4
+TIME_SERIES_TABLE = "TIME_SERIES"
+TIME_SERIES_ID = "time_series_id"
+TIMESTAMP_PREFIX = "ts_"
+BUCKET_COLUMN = "bucket"
+# Partition sizes of the bucketed layout, see create_timeseries_entity.
+BUCKET_FREQUENCIES = {"day": "1D", "hour": "1h"}
 
 
 default_entity_params = {
     "__keyspace__" : DEFAULT_KEYSPACE,
     "__connection__" : DEFAULT_CONNECTION_NAME,
-    "__table_name__" : "TIME_SERIES",
+    "__table_name__" : TIME_SERIES_TABLE,
     "__table_name_case_sensitive__" : False,
     "time_series_id" : columns.TimeUUID(primary_key=True, default=uuid1)
 }
 
 
-def create_timeseries_entity(df:pd.DataFrame):
+def create_timeseries_entity(
+    df:pd.DataFrame,
+    keyspace:str=DEFAULT_KEYSPACE,
+    connection:str=DEFAULT_CONNECTION_NAME,
+    bucket:Literal[None, "day", "hour"]=None,
+):
     """Creae Entity class from the DataFrame column types.
 
+    By default `time_series_id` is the partition key, i.e. a time series is a
+    single partition. With a `bucket`, the partition key is
+    (time_series_id, bucket), where bucket is the start of the day or hour of
+    the first timestamp column, and the entity has its own table.
+
     Args:
         df (pd.DataFrame): Source DataFrame`
+        keyspace (str, optional): Keyspace of the entity. Defaults to DEFAULT_KEYSPACE.
+        connection (str, optional): Name of the DB connection. Defaults to DEFAULT_CONNECTION_NAME.
+        bucket (Literal[None, "day", "hour"], optional): Time bucket of the partitions.
+                                                         Defaults to None.
 
     Returns:
         Model: DataBase Entity class.
+
+    Raises:
+        ValueError: if a column type or the bucket is not supported.
     """
-    column_params = {}
+    # cqlengine orders the key columns by creation, so the partition key goes first.
+    column_params = {
+        "time_series_id" : columns.TimeUUID(primary_key=True, partition_key=bucket is not None, default=uuid1),
+    }
+    if bucket is not None:
+        if bucket not in BUCKET_FREQUENCIES:
+            raise ValueError("Invalid bucket: %s" % bucket)
+        if bucket_source_column(df) is None:
+            raise ValueError("A bucketed time series requires a timestamp column.")
+        column_params[BUCKET_COLUMN] = columns.DateTime(partition_key=True)
     for col in df.columns:
         if is_datetime64_dtype(df[col]):
-            column_params["ts_"+col] = columns.DateTime(primary_key=True, clustering_order="ASC")
+            column_params[TIMESTAMP_PREFIX+col] = columns.DateTime(primary_key=True, clustering_order="ASC")
         elif is_string_dtype(df[col]):
             column_params[col] = columns.Text()
         elif is_int64_dtype(df[col]):
@@ -51,15 +95,87 @@ def create_timeseries_entity(df:pd.DataFrame):
         else:
             raise ValueError("Invalid Column dtype: %s", df[col].dtype)
 
-    column_params.update(default_entity_params)
+    column_params.update(
+        (key, value) for key, value in default_entity_params.items() if key != "time_series_id"
+    )
+    column_params.update({
+        "__keyspace__" : keyspace,
+        "__connection__" : connection,
+        "__table_name__" : bucketed_table_name(bucket),
+    })
     return ClassFactory("TimeSeriesEntity", column_params, Model)
 
 
+def bucketed_table_name(bucket:Literal[None, "day", "hour"]=None) -> str:
+    """Return the table name of the time series layout."""
+    return TIME_SERIES_TABLE if bucket is None else TIME_SERIES_TABLE + "_BY_" + bucket.upper()
+
+
+def bucket_source_column(df:pd.DataFrame) -> Union[str, None]:
+    """Return the first timestamp column of a DataFrame, which decides the bucket of a row."""
+    return next((col for col in df.columns if is_datetime64_dtype(df[col])), None)
+
+
+def column_signature(df:pd.DataFrame) -> tuple:
+    """Return the column names and dtypes that shape the entity of a DataFrame."""
+    return tuple((col, str(df[col].dtype)) for col in df.columns)
+
+
 def ClassFactory(name, argnames, BaseClass):
     entity_class = type(name, (BaseClass,), argnames)
     return entity_class
 
 
+def entity_column_name(df:pd.DataFrame, col:str) -> str:
+    """Return the name of the entity column of a DataFrame column."""
+    return TIMESTAMP_PREFIX + col if is_datetime64_dtype(df[col]) else col
+
+
+def quote_identifier(name:str) -> str:
+    """Quote a column name the way cqlengine creates it."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def rows_to_record_batch(column_names:List[str], rows:List[tuple]) -> pyarrow.RecordBatch:
+    """Build an Arrow record batch from a page of result tuples.
+
+    Args:
+        column_names (List[str]): column names of the result.
+        rows (List[tuple]): page of result tuples.
+
+    Returns:
+        pyarrow.RecordBatch: page in Arrow columns.
+    """
+    arrays = [pyarrow.array(values) for values in zip(*rows)]
+    return pyarrow.RecordBatch.from_arrays(arrays, names=list(column_names))
+
+
+def to_column_values(series:pd.Series) -> list:
+    """Convert a DataFrame column to a list of values for the Cassandra driver.
+
+    The conversion runs on the whole column at once. Timestamps are passed as
+    milliseconds since epoch, which the driver accepts for timestamp columns,
+    and missing values as None.
+
+    Args:
+        series (pd.Series): DataFrame column.
+
+    Returns:
+        list: column values.
+    """
+    if is_datetime64_dtype(series):
+        values = series.to_numpy(dtype="datetime64[ms]").astype("int64").tolist()
+        if series.hasnans:
+            values = [None if missing else value for value, missing in zip(values, series.isna().tolist())]
+        return values
+    if is_float_dtype(series):
+        return series.tolist()
+    values = series.tolist()
+    if series.hasnans:
+        values = [None if missing else value for value, missing in zip(values, series.isna().tolist())]
+    return values
+
+
 class CassandraDBSession(AbstractDBSession):
     """
     Class that holds a cursor with the CassandraDB connection.
@@ -67,18 +183,33 @@ class CassandraDBSession(AbstractDBSession):
     Args:
         name (str): name of the DB connection.
         cursor (Session): cursor to use with the CassandraDB connection.
+        row_factory (Union[Callable, None], optional): row factory of the cursor, e.g.
+                                                       tuple_factory. Defaults to None,
+                                                       i.e. the driver default.
     """
 
-    def __init__(self, name:str, cursor:Session) -> None:
+    def __init__(self, name:str, cursor:Session, row_factory:Union[Callable, None]=None) -> None:
         super(CassandraDBSession, self).__init__()
         self.name = name
         self._cursor = cursor
+        self._prepared = {}
+        if row_factory is not None:
+            self.row_factory = row_factory
         register_connection(name=name, session=cursor)
         # set_default_connection(name=name)
 
     def __enter__(self):
         return self
 
+    @property
+    def row_factory(self) -> Callable:
+        """Return the factory that builds the rows of a result."""
+        return self._cursor.row_factory
+
+    @row_factory.setter
+    def row_factory(self, row_factory:Callable):
+        self._cursor.row_factory = row_factory
+
     def execute(self, query):
         """Execute given query on the active cursor.
 
@@ -98,30 +229,173 @@ class CassandraDBSession(AbstractDBSession):
             print("Exception: ", str(error))
             return None
     
-    def insert(self, df:pd.DataFrame, ts_entity:Model, batch_size=750)->uuid1:
+    def prepare_insert(self, ts_entity:Model, column_names:List[str]):
+        """Prepare an INSERT statement of the given entity columns.
+
+        Args:
+            ts_entity (Model): TimeSeries database entity
+            column_names (List[str]): entity columns to insert.
+
+        Returns:
+            PreparedStatement: prepared INSERT statement.
+        """
+        query = "INSERT INTO {} ({}) VALUES ({})".format(
+            ts_entity.column_family_name(),
+            ", ".join(quote_identifier(name) for name in column_names),
+            ", ".join("?" * len(column_names)),
+        )
+        return self.prepare(query)
+
+    def prepare(self, query:str):
+        """Prepare a query once per session.
+
+        Args:
+            query (str): CQL query with ? placeholders.
+
+        Returns:
+            PreparedStatement: prepared statement.
+        """
+        prepared = self._prepared.get(query)
+        if prepared is None:
+            prepared = self._prepared[query] = self._cursor.prepare(query)
+        return prepared
+
+    def select_batches(self, query:str, params:tuple, page_size:int=DEFAULT_PAGE_SIZE):
+        """Execute a prepared SELECT and yield its result page by page.
+
+        The pages are fetched as tuples and converted to Arrow columns, one
+        record batch per page, without building a dict per row.
+
+        Args:
+            query (str): CQL query with ? placeholders.
+            params (tuple): values of the placeholders.
+            page_size (int, optional): no. of rows per page. Defaults to DEFAULT_PAGE_SIZE.
+
+        Yields:
+            pyarrow.RecordBatch: page of the result.
+        """
+        statement = self.prepare(query).bind(params)
+        statement.fetch_size = page_size
+        result = self._cursor.execute(statement)
+        while True:
+            rows = result.current_rows
+            if rows:
+                yield rows_to_record_batch(result.column_names, rows)
+            if not result.has_more_pages:
+                break
+            result.fetch_next_page()
+
+    def insert(
+        self,
+        df:pd.DataFrame,
+        ts_entity:Model,
+        batch_size:Union[int, None]=None,
+        concurrency:int=DEFAULT_CONCURRENCY,
+        time_series_id:Union[uuid1, None]=None,
+        bucket:Literal[None, "day", "hour"]=None,
+    )->uuid1:
         """Insert time-series data into the database
 
+        The rows are built from the DataFrame column arrays and written with a
+        prepared INSERT statement, `concurrency` requests at a time. All rows
+        are stored under one time-series id, and with a `bucket` they are
+        routed to the partition of their day or hour.
+
         Args:
             df (pd.DataFrame): Input DataFrame
             ts_entity (Model): TimeSeries database entity
-            batch_size (int, optional): batch size of the CassandraDB BatchQuery. Defaults to 750.
-        
+            batch_size (Union[int, None], optional): no. of rows per UNLOGGED batch.
+                                                     Rows are only batched within a
+                                                     partition. Defaults to None, i.e.
+                                                     one request per row.
+            concurrency (int, optional): no. of concurrent requests.
+                                         Defaults to DEFAULT_CONCURRENCY.
+            time_series_id (Union[uuid1, None], optional): time-series id of the rows.
+                                                          Defaults to a new uuid1.
+            bucket (Literal[None, "day", "hour"], optional): Time bucket of the
+                                                             partitions, must match the
+                                                             entity. Defaults to None.
+
         Returns:
             uuid1: The uuid1 time-series id.
-        """      
-        query = BatchQuery()
-        for index, row in enumerate(df.to_dict('records')):
-            params = {}
-            for key,value in row.items():
-                key = "ts_timestamp" if key == "timestamp" else key
-                params.update({
-                    key:value
-                }) 
-            entity = ts_entity.batch(query).create(**params)
-            if index!=0 and index%batch_size==0:
-                query.execute()
-
-        return entity.time_series_id
+
+        Raises:
+            ValueError: if a bucketed DataFrame has no timestamp column, or a row
+                        without a timestamp, which has no partition to go to.
+        """
+        if bucket is not None:
+            source_column = bucket_source_column(df)
+            if source_column is None:
+                raise ValueError("A bucketed time series needs a timestamp column.")
+            if df[source_column].isna().any():
+                raise ValueError(
+                    "Column {} has missing timestamps, a bucketed time series needs "
+                    "a timestamp per row.".format(source_column)
+                )
+        time_series_id = time_series_id or uuid1()
+        column_names = [TIME_SERIES_ID] + [entity_column_name(df, col) for col in df.columns]
+        column_values = [to_column_values(df[col]) for col in df.columns]
+
+        start = time.perf_counter()
+        if bucket is None:
+            partition_keys = None
+        else:
+            buckets = df[source_column].dt.floor(BUCKET_FREQUENCIES[bucket])
+            partition_keys = to_column_values(buckets)
+            column_names.insert(1, BUCKET_COLUMN)
+            column_values.insert(0, partition_keys)
+        prepared = self.prepare_insert(ts_entity, column_names)
+        rows = list(zip(repeat(time_series_id, len(df)), *column_values))
+        self._execute_rows(prepared, rows, partition_keys, batch_size, concurrency)
+
+        elapsed = time.perf_counter() - start
+        LOGGER.info(
+            "Inserted %d rows in %.2fs (%.0f rows/s).",
+            len(rows), elapsed, len(rows) / elapsed if elapsed else float("inf"),
+        )
+        return time_series_id
+
+    def _execute_rows(
+        self,
+        prepared,
+        rows:List[tuple],
+        partition_keys:Union[list, None],
+        batch_size:Union[int, None],
+        concurrency:int,
+    ):
+        """Execute a prepared statement for the rows, batched per partition.
+
+        Args:
+            prepared (PreparedStatement): prepared statement.
+            rows (List[tuple]): statement parameters per row.
+            partition_keys (Union[list, None]): partition of each row beside the
+                                                time-series id, None for one partition.
+            batch_size (Union[int, None]): no. of rows per UNLOGGED batch.
+            concurrency (int): no. of concurrent requests.
+        """
+        if not batch_size:
+            execute_concurrent_with_args(
+                self._cursor, prepared, rows, concurrency=concurrency, raise_on_first_error=True
+            )
+            return
+
+        partitions = {}
+        if partition_keys is None:
+            partitions[None] = rows
+        else:
+            for partition_key, row in zip(partition_keys, rows):
+                partitions.setdefault(partition_key, []).append(row)
+
+        batches = []
+        for partition_rows in partitions.values():
+            for offset in range(0, len(partition_rows), batch_size):
+                batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+                for row in partition_rows[offset:offset + batch_size]:
+                    batch.add(prepared, row)
+                batches.append((batch, None))
+        execute_concurrent(
+            self._cursor, batches, concurrency=concurrency, raise_on_first_error=True
+        )
     
     def create_schema(self, entity:Model):
         """Create schema using the given entity.
@@ -153,6 +427,17 @@ class CassandraDB(AbstractDBLayer):
         self._name = name
         self._keyspace = keyspace
         self._db_conn = db_conn
+        self._schema_lock = threading.Lock()
+        self._session_lock = threading.Lock()
+        self._session = None
+        self._entities = {}
+        self._tables = {}
+        self._synced_entities = set()
+
+    @property
+    def keyspace(self) -> str:
+        """Return the keyspace of the connection."""
+        return self._keyspace
 
     @classmethod
     def connect(
@@ -161,7 +446,8 @@ class CassandraDB(AbstractDBLayer):
         port:int=9042,
         name:str=DEFAULT_CONNECTION_NAME, 
         keyspace:str=DEFAULT_KEYSPACE,
-        protocol_version:int=5
+        protocol_version:int=5,
+        token_aware:bool=False,
     ):
         """Establish a connection to CassandraDB
 
@@ -173,6 +459,8 @@ class CassandraDB(AbstractDBLayer):
             keyspace (str, optional): Namespace for creating tables in the DB. 
                                       Defaults to DEFAULT_KEYSPACE.
             protocol_version (int, optional): Protocol version of the Cassandra cluster. Defaults to 5.
+            token_aware (bool, optional): Route prepared statements to a replica of their
+                                          partition. Defaults to False.
 
         Returns:
             CassandraDB: Object of the type CassandraDB.
@@ -182,12 +470,19 @@ class CassandraDB(AbstractDBLayer):
             ValueError: if any param is not a valid argument.
         """
 
-        cluster = Cluster(contact_points=contact_points, port=port, load_balancing_policy=WhiteListRoundRobinPolicy(contact_points), protocol_version=protocol_version)
+        load_balancing_policy = WhiteListRoundRobinPolicy(contact_points)
+        if token_aware:
+            load_balancing_policy = TokenAwarePolicy(load_balancing_policy)
+        cluster = Cluster(contact_points=contact_points, port=port, load_balancing_policy=load_balancing_policy, protocol_version=protocol_version)
         return CassandraDB(name, keyspace, cluster)
 
-    def create_session(self) -> CassandraDBSession:
+    def create_session(self, row_factory:Union[Callable, None]=None) -> CassandraDBSession:
         """Open a cursor with the CassandraDB connection.
 
+        Args:
+            row_factory (Union[Callable, None], optional): row factory of the cursor.
+                                                           Defaults to None.
+
         Returns:
             CassandraDBSession: An object of the type CassandraDBSession.
                               It holds a cursor with the CassandraDB.
@@ -197,9 +492,288 @@ class CassandraDB(AbstractDBLayer):
         else:
             session = self._db_conn.connect()
         
-        return CassandraDBSession(self._name, session)
+        return CassandraDBSession(self._name, session, row_factory=row_factory)
+
+    def shared_session(self) -> CassandraDBSession:
+        """Return the session that store and load share, opening it on first use.
+
+        The session, and so its prepared statements, are reused by all the stores
+        and loads of the connection. It is closed with the connection. Its rows are
+        plain tuples, which load transposes into Arrow columns without a dict per row.
+
+        Returns:
+            CassandraDBSession: An object of the type CassandraDBSession.
+        """
+        with self._session_lock:
+            if self._session is None:
+                self._session = self.create_session(row_factory=tuple_factory)
+            return self._session
+
+    def get_timeseries_entity(
+        self,
+        df:pd.DataFrame,
+        keyspace:Union[str, None]=None,
+        bucket:Literal[None, "day", "hour"]=None,
+    ) -> Model:
+        """Return the entity class of a DataFrame, cached per (keyspace, column signature, bucket).
+
+        Args:
+            df (pd.DataFrame): Source DataFrame
+            keyspace (Union[str, None], optional): Keyspace of the entity. Defaults to the
+                                                   keyspace of the connection.
+            bucket (Literal[None, "day", "hour"], optional): Time bucket of the partitions.
+                                                             Defaults to None.
+
+        Returns:
+            Model: DataBase Entity class.
+        """
+        keyspace = keyspace or self._keyspace or DEFAULT_KEYSPACE
+        key = (keyspace, column_signature(df), bucket)
+        with self._schema_lock:
+            entity = self._entities.get(key)
+            if entity is None:
+                entity = create_timeseries_entity(df, keyspace, self._name, bucket)
+                self._entities[key] = entity
+        return entity
+
+    def ensure_schema(self, session:CassandraDBSession, entity:Model):
+        """Create the table of the entity if it does not exist yet.
+
+        The tables of a keyspace are queried once and the entities whose table
+        has been checked are remembered, so repeated stores of the same entity
+        skip the metadata queries.
+
+        Args:
+            session (CassandraDBSession): active session.
+            entity (Model): TimeSeries database entity
+        """
+        with self._schema_lock:
+            if entity in self._synced_entities:
+                return
+            keyspace = entity.__keyspace__
+            tables = self._tables.get(keyspace)
+            if tables is None:
+                rows = session.execute(
+                    "SELECT table_name FROM system_schema.tables WHERE keyspace_name='"
+                    + keyspace
+                    + "';"
+                )
+                tables = set(row[0] for row in rows) if rows is not None else set()
+                self._tables[keyspace] = tables
+            table_name = entity.__table_name__.lower()
+            if table_name not in tables:
+                session.create_schema(entity)
+                tables.add(table_name)
+            self._synced_entities.add(entity)
+
+    def invalidate_schema(self, keyspace:Union[str, None]=None):
+        """Forget the cached tables and checked entities, e.g. after a schema change.
+
+        Args:
+            keyspace (Union[str, None], optional): Keyspace to invalidate. Defaults to None,
+                                                   i.e. all keyspaces.
+        """
+        with self._schema_lock:
+            if keyspace is None:
+                self._tables.clear()
+                self._synced_entities.clear()
+                return
+            self._tables.pop(keyspace, None)
+            self._synced_entities = set(
+                entity for entity in self._synced_entities if entity.__keyspace__ != keyspace
+            )
+
+    def load(
+        self,
+        time_series_id:Union[UUID, str],
+        from_date:Union[str, None]=None,
+        to_date:Union[str, None]=None,
+        columns:Union[List[str], None]=None,
+        keyspace:Union[str, None]=None,
+        page_size:int=DEFAULT_PAGE_SIZE,
+        max_workers:int=DEFAULT_READ_WORKERS,
+        bucket:Literal[None, "day", "hour"]=None,
+    ) -> pyarrow.Table:
+        """Load stored time series data as an Arrow table.
+
+        Without a bucket a time series is one partition, so a bounded time range
+        is split into `max_workers` sub-ranges of the clustering timestamp. With a
+        bucket, the time range is read with one query per bucket partition. The
+        queries are run concurrently with paged, prepared statements and their
+        results are concatenated in order.
+
+        Args:
+            time_series_id (Union[UUID, str]): The uuid1 time-series id.
+            from_date (Union[str, None], optional): Start timestamp. Defaults to None.
+            to_date (Union[str, None], optional): End timestamp. Defaults to None.
+            columns (Union[List[str], None], optional): DataFrame columns to load, all
+                                                        columns if None. Defaults to None.
+            keyspace (Union[str, None], optional): Keyspace of the table. Defaults to the
+                                                   keyspace of the connection.
+            page_size (int, optional): no. of rows per page. Defaults to DEFAULT_PAGE_SIZE.
+            max_workers (int, optional): no. of concurrent range queries.
+                                         Defaults to DEFAULT_READ_WORKERS.
+            bucket (Literal[None, "day", "hour"], optional): Time bucket the time series
+                                                             was stored with. Defaults to None.
+
+        Returns:
+            pyarrow.Table: time series with the column names of the stored DataFrame.
+
+        Raises:
+            ValueError: if the table does not exist, or a bucketed time series is
+                        loaded without a time range.
+        """
+        keyspace = keyspace or self._keyspace or DEFAULT_KEYSPACE
+        if isinstance(time_series_id, str):
+            time_series_id = UUID(time_series_id)
+        if bucket is not None and not (from_date and to_date):
+            raise ValueError("A bucketed time series is loaded by from_date and to_date.")
+        session = self.shared_session()
+        table = self._table_metadata(keyspace, bucket)
+        timestamp_columns = [column.name for column in table.clustering_key]
+        stored_columns = [
+            name for name in table.columns if name not in (TIME_SERIES_ID, BUCKET_COLUMN)
+        ]
+        if columns:
+            stored_columns = [
+                TIMESTAMP_PREFIX + col if TIMESTAMP_PREFIX + col in timestamp_columns else col
+                for col in columns
+            ]
+
+        query = "SELECT {} FROM {}.{} WHERE {} = ?".format(
+            ", ".join(quote_identifier(name) for name in stored_columns),
+            keyspace,
+            table.name,
+            TIME_SERIES_ID,
+        )
+        if bucket is None:
+            ranges = self._split_time_range(from_date, to_date, max_workers)
+            partitions = [()] * len(ranges)
+        else:
+            query += " AND {} = ?".format(BUCKET_COLUMN)
+            partitions = [
+                (partition,) for partition in self._split_buckets(from_date, to_date, bucket)
+            ]
+            ranges = [self._split_time_range(from_date, to_date, 1)[0]] * len(partitions)
+        range_queries = []
+        for partition, (start, end, end_inclusive) in zip(partitions, ranges):
+            range_query, params = query, [time_series_id, *partition]
+            if start is not None:
+                range_query += " AND {} >= ?".format(quote_identifier(timestamp_columns[0]))
+                params.append(start)
+            if end is not None:
+                range_query += " AND {} {} ?".format(
+                    quote_identifier(timestamp_columns[0]), "<=" if end_inclusive else "<"
+                )
+                params.append(end)
+            range_queries.append((range_query, tuple(params)))
+
+        def read_range(range_args):
+            range_query, params = range_args
+            return list(session.select_batches(range_query, params, page_size))
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(len(range_queries), max_workers)) as executor:
+            record_batches = [
+                record_batch
+                for range_batches in executor.map(read_range, range_queries)
+                for record_batch in range_batches
+            ]
+
+        names = [
+            name[len(TIMESTAMP_PREFIX):] if name in timestamp_columns else name
+            for name in stored_columns
+        ]
+        if not record_batches:
+            return pyarrow.table({name: pyarrow.array([], pyarrow.null()) for name in names})
+        data = pyarrow.Table.from_batches(record_batches).rename_columns(names)
+        elapsed = time.perf_counter() - start_time
+        LOGGER.info(
+            "Loaded %d rows in %.2fs (%.0f rows/s).",
+            data.num_rows, elapsed, data.num_rows / elapsed if elapsed else float("inf"),
+        )
+        return data
+
+    def _table_metadata(self, keyspace:str, bucket:Literal[None, "day", "hour"]=None):
+        """Return the driver metadata of the time series table."""
+        table_name = bucketed_table_name(bucket).lower()
+        try:
+            return self._db_conn.metadata.keyspaces[keyspace].tables[table_name]
+        except KeyError:
+            raise ValueError("Table {}.{} does not exist.".format(keyspace, table_name))
+
+    @staticmethod
+    def _split_buckets(from_date:str, to_date:str, bucket:Literal["day", "hour"]) -> list:
+        """Return the bucket partitions overlapping a time range, in order."""
+        frequency = BUCKET_FREQUENCIES[bucket]
+        return pd.date_range(
+            pd.Timestamp(from_date).floor(frequency),
+            pd.Timestamp(to_date).floor(frequency),
+            freq=frequency,
+        ).to_pydatetime().tolist()
+
+    @staticmethod
+    def _split_time_range(from_date:Union[str, None], to_date:Union[str, None], num_ranges:int) -> list:
+        """Split a time range into consecutive half-open sub-ranges.
+
+        Returns:
+            list: (start, end, end_inclusive) tuples, only the last one includes the end.
+        """
+        start = pd.Timestamp(from_date).to_pydatetime() if from_date else None
+        end = pd.Timestamp(to_date).to_pydatetime() if to_date else None
+        if start is None or end is None or num_ranges <= 1 or end <= start:
+            return [(start, end, True)]
+        bounds = pd.date_range(start, end, periods=num_ranges + 1).to_pydatetime().tolist()
+        return [
+            (bounds[index], bounds[index + 1], index == num_ranges - 1)
+            for index in range(num_ranges)
+        ]
+
+    def store(
+        self,
+        df:pd.DataFrame,
+        keyspace:Union[str, None]=None,
+        bucket:Literal[None, "day", "hour"]=None,
+        **insert_kwargs,
+    ) -> uuid1:
+        """Store time series data, creating the table of its entity if needed.
+
+        If the insert is rejected, e.g. because the table was dropped or altered
+        since it was cached, the schema cache of the keyspace is invalidated, the
+        table is synced with the entity and the insert is retried once.
+
+        Args:
+            df (pd.DataFrame): Input DataFrame
+            keyspace (Union[str, None], optional): Keyspace to insert the table to.
+                                                   Defaults to the keyspace of the connection.
+            bucket (Literal[None, "day", "hour"], optional): Time bucket of the partitions,
+                                                             None to store the time series
+                                                             as one partition. Defaults to None.
+            **insert_kwargs: options of CassandraDBSession.insert.
+
+        Returns:
+            uuid1: The uuid1 time-series id.
+        """
+        ts_entity = self.get_timeseries_entity(df, keyspace, bucket)
+        # The retry has to write the same partition as the first attempt.
+        insert_kwargs.setdefault("time_series_id", uuid1())
+        insert_kwargs["bucket"] = bucket
+        session = self.shared_session()
+        self.ensure_schema(session, ts_entity)
+        try:
+            return session.insert(df, ts_entity, **insert_kwargs)
+        except InvalidRequest as error:
+            LOGGER.warning("Insert rejected, syncing the schema: %s", error)
+            self.invalidate_schema(ts_entity.__keyspace__)
+            session.create_schema(ts_entity)
+            self.ensure_schema(session, ts_entity)
+            return session.insert(df, ts_entity, **insert_kwargs)
 
     def close(self):
-        """Mark the connection as closed."""
+        """Close the shared session and mark the connection as closed."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
         self._db_conn.shutdown()
 
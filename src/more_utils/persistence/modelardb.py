@@ -1,7 +1,12 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pymodelardb as pymodelardb
 from .base import AbstractDBLayer, AbstractDBSession
-from typing import Literal
-from more_utils.persistence.arrow import ArrowCursor
+from typing import Literal, Union
+from more_utils.persistence.arrow import ArrowCursor, FlightClientPool
 from more_utils.logging import configure_logger
 
 LOGGER = configure_logger(logger_name="ModelarDB")
@@ -37,6 +42,11 @@ class ModelarDBSession(AbstractDBSession):
         """A description of the columns in the last query."""
         return self._cursor._result_set
 
+    @property
+    def schema(self):
+        """The Arrow schema of the last query, for arrow sessions only."""
+        return self._cursor.schema
+
     def execute(self, query):
         """Execute given query on the active cursor.
 
@@ -62,9 +72,15 @@ class ModelarDBSession(AbstractDBSession):
     def insert(self, *args, **kwargs):
         self._cursor.insert(*args, **kwargs)
 
+    def insert_batches(self, *args, **kwargs):
+        self._cursor.insert_batches(*args, **kwargs)
+
     def list(self):
         return self._cursor.list()
 
+    def get_schema(self, table_name):
+        return self._cursor.get_schema(table_name)
+
     def __exit__(self, *args):
         return self.close()
 
@@ -82,13 +98,32 @@ class ModelarDB(AbstractDBLayer):
         manager_conn -- Connection object that opens the session to the ModelarDB Manager interface.
         edge_conn -- Connection object that opens the session to the ModelarDB Edge interface.
         cloud_conn -- Connection object that opens the session to the ModelarDB Cloud interface.
+        pool_size -- no. of idle Flight clients kept per interface for arrow sessions.
+        pool_idle_timeout -- seconds after which an idle Flight client is closed.
+        catalogue_ttl -- seconds for which the cached list of tables is used before it is refreshed.
     """
 
-    def __init__(self, manager_conn, edge_conn, cloud_conn) -> None:
+    def __init__(
+        self,
+        manager_conn,
+        edge_conn,
+        cloud_conn,
+        pool_size: int = 4,
+        pool_idle_timeout: float = 300.0,
+        catalogue_ttl: float = 60.0,
+    ) -> None:
         super(ModelarDB, self).__init__()
         self._manager_conn = manager_conn
         self._edge_conn = edge_conn
         self._cloud_conn = cloud_conn
+        self._pool_size = pool_size
+        self._pool_idle_timeout = pool_idle_timeout
+        self._flight_client_pools = {}
+        self._catalogue_ttl = catalogue_ttl
+        self._catalogue_lock = threading.Lock()
+        self._tables = None
+        self._tables_refreshed_at = 0.0
+        self._table_schemas = {}
 
     @classmethod
     def connect(
@@ -98,6 +133,9 @@ class ModelarDB(AbstractDBLayer):
         edge_port: int = 9999,
         cloud_port: int = 9997,
         interface: Literal["arrow", "http", "socket"] = "arrow",
+        pool_size: int = 4,
+        pool_idle_timeout: float = 300.0,
+        catalogue_ttl: float = 60.0,
     ):
         """Establish a connection to ModelarDB Interfaces
 
@@ -112,6 +150,15 @@ class ModelarDB(AbstractDBLayer):
                                         Defaults to 9997.
             interface (str, optional): Interface type [arrow|socket|http].
                                        Defaults to "arrow".
+            pool_size (int, optional): No. of idle Flight clients kept per
+                                       interface for arrow sessions.
+                                       Defaults to 4.
+            pool_idle_timeout (float, optional): Seconds after which an idle
+                                                 Flight client is closed.
+                                                 Defaults to 300.0.
+            catalogue_ttl (float, optional): Seconds for which the cached list
+                                             of tables is used before it is
+                                             refreshed. Defaults to 60.0.
 
         Returns:
             ModelarDB: Object of the type ModelarDB.
@@ -130,7 +177,14 @@ class ModelarDB(AbstractDBLayer):
             host=hostname, interface=interface, port=cloud_port
         )
 
-        return ModelarDB(manager_conn, edge_conn, cloud_conn)
+        return ModelarDB(
+            manager_conn,
+            edge_conn,
+            cloud_conn,
+            pool_size=pool_size,
+            pool_idle_timeout=pool_idle_timeout,
+            catalogue_ttl=catalogue_ttl,
+        )
 
     def create_session(
         self, conn_type: Literal["manager", "edge", "cloud"]
@@ -177,13 +231,20 @@ class ModelarDB(AbstractDBLayer):
                 "Invalid ModelarDB connection type. Valid valies ['manager', 'edge', 'cloud']"
             )
 
-        return ModelarDBSession(
-            ArrowCursor(
-                conn,
-                conn._Connection__host,
-                conn._Connection__port,
+        host = conn._Connection__host
+        port = conn._Connection__port
+        pool = self._flight_client_pools.get(conn_type)
+        if pool is None:
+            pool = self._flight_client_pools.setdefault(
+                conn_type,
+                FlightClientPool(
+                    "grpc://" + host + ":" + str(port),
+                    max_size=self._pool_size,
+                    idle_timeout=self._pool_idle_timeout,
+                ),
             )
-        )
+
+        return ModelarDBSession(ArrowCursor(conn, host, port, pool=pool))
 
     def flush(self, mode: Literal["FlushMemory", "FlushEdge"] = "FlushEdge"):
         """_summary_
@@ -205,13 +266,163 @@ class ModelarDB(AbstractDBLayer):
 
         LOGGER.info(f"{mode}: Compressed data buffers flushed.")
 
-    def list_tables(self):
-        with self.create_arrow_session(conn_type="manager") as session:
-            tables = session.list()
-            return [table.decode("UTF-8") for table in list(tables)[0]]
+    def list_tables(self, refresh: bool = False):
+        """List the tables of ModelarDB.
+
+        The list is cached for `catalogue_ttl` seconds and kept up to date by
+        `register_table`, so repeated calls do not query the Manager interface.
+
+        Args:
+            refresh (bool, optional): Bypass the cached list of tables.
+                                      Defaults to False.
+
+        Returns:
+            List[str]: names of the tables.
+        """
+        with self._catalogue_lock:
+            if (
+                refresh
+                or self._tables is None
+                or time.monotonic() - self._tables_refreshed_at >= self._catalogue_ttl
+            ):
+                with self.create_arrow_session(conn_type="manager") as session:
+                    tables = session.list()
+                    self._tables = [
+                        table.decode("UTF-8") for table in list(tables)[0]
+                    ]
+                self._tables_refreshed_at = time.monotonic()
+                self._table_schemas = {
+                    table: schema
+                    for table, schema in self._table_schemas.items()
+                    if table in self._tables
+                }
+            return list(self._tables)
+
+    def has_table(self, table_name: str) -> bool:
+        """Check if the table exists using the cached list of tables."""
+        return table_name in self.list_tables()
+
+    def table_schema(self, table_name: str):
+        """Return the Arrow schema of a table, fetched once and then cached.
+
+        Args:
+            table_name (str): name of the table.
+
+        Returns:
+            pyarrow.Schema: schema of the table.
+        """
+        with self._catalogue_lock:
+            schema = self._table_schemas.get(table_name)
+        if schema is None:
+            with self.create_arrow_session(conn_type="edge") as session:
+                schema = session.get_schema(table_name)
+            with self._catalogue_lock:
+                self._table_schemas[table_name] = schema
+        return schema
+
+    def register_table(self, table_name: str, schema=None):
+        """Add a newly created table to the cached list of tables.
+
+        Args:
+            table_name (str): name of the table.
+            schema (pyarrow.Schema, optional): schema of the table.
+                                               Defaults to None.
+        """
+        with self._catalogue_lock:
+            if self._tables is not None and table_name not in self._tables:
+                self._tables.append(table_name)
+            if schema is not None:
+                self._table_schemas[table_name] = schema
+            else:
+                self._table_schemas.pop(table_name, None)
+
+    def refresh(self):
+        """Drop the cached catalogue and reload the list of tables."""
+        with self._catalogue_lock:
+            self._table_schemas = {}
+        return self.list_tables(refresh=True)
 
     def close(self):
         """Mark the connections as closed."""
+        for pool in self._flight_client_pools.values():
+            pool.close()
         self._manager_conn.close()
         self._edge_conn.close()
         self._cloud_conn.close()
+
+
+class AsyncModelarDB:
+    """
+    An asyncio facade over a ModelarDB connection. The blocking ModelarDB
+    calls run on a bounded thread pool shared by all the async APIs of the
+    connection, so many calls can overlap on one event loop.
+
+    Arguments:
+        modelardb_conn -- ModelarDB connection object to run the calls on.
+        max_workers -- no. of calls that can run concurrently.
+    """
+
+    def __init__(
+        self, modelardb_conn: ModelarDB, max_workers: Union[int, None] = None
+    ) -> None:
+        self._modelardb_conn = modelardb_conn
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="moreutils-modelardb"
+        )
+
+    @classmethod
+    async def connect(cls, *args, max_workers: Union[int, None] = None, **kwargs):
+        """Establish a connection to ModelarDB Interfaces
+
+        Args:
+            max_workers (Union[int, None], optional): no. of calls that can
+                                                      run concurrently.
+                                                      Defaults to None.
+            *args, **kwargs: arguments of ModelarDB.connect.
+
+        Returns:
+            AsyncModelarDB: Object of the type AsyncModelarDB.
+                            It holds a connection with the ModelarDB.
+        """
+        loop = asyncio.get_running_loop()
+        modelardb_conn = await loop.run_in_executor(
+            None, functools.partial(ModelarDB.connect, *args, **kwargs)
+        )
+        return cls(modelardb_conn, max_workers=max_workers)
+
+    @property
+    def modelardb_conn(self) -> ModelarDB:
+        """The blocking ModelarDB connection."""
+        return self._modelardb_conn
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking call on the thread pool of the connection.
+
+        Args:
+            func (Callable): blocking function to run.
+            *args, **kwargs: arguments of the function.
+
+        Returns:
+            Any: return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def flush(self, mode: Literal["FlushMemory", "FlushEdge"] = "FlushEdge"):
+        """Flush data to disk or object store, see ModelarDB.flush."""
+        return await self.run(self._modelardb_conn.flush, mode)
+
+    async def list_tables(self, refresh: bool = False):
+        """List the tables of ModelarDB, see ModelarDB.list_tables."""
+        return await self.run(self._modelardb_conn.list_tables, refresh=refresh)
+
+    async def refresh(self):
+        """Reload the cached catalogue, see ModelarDB.refresh."""
+        return await self.run(self._modelardb_conn.refresh)
+
+    async def close(self):
+        """Mark the connections as closed and stop the thread pool."""
+        await self.run(self._modelardb_conn.close)
+        self._executor.shutdown(wait=False)
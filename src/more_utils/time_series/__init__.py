@@ -1,2 +1,4 @@
 from .base import TimeseriesFactory, ModelTable
+from .cache import BatchCache, ResultCache
+from .aio import AsyncTimeseriesFactory, AsyncModelTable
 from .generator import TimeseriesGenerator
@@ -2,10 +2,12 @@
 
 import json
 import pprint
-from typing import List
+from typing import List, Union
 import pandas as pd
+import pyarrow
 import pyspark.sql as spark
 from more_utils.logging import configure_logger
+from .columnar import rows_to_table, table_to_rows
 
 
 LOGGER = configure_logger(logger_name="Timeseries")
@@ -26,6 +28,8 @@ class BaseAccessor(object):
         Returns:
             List: List of data
         """
+        if isinstance(data, pyarrow.Table):
+            data = table_to_rows(data)
         if isinstance(data, tuple):
             data = [data]
         return data
@@ -55,19 +59,45 @@ class JsonAccessor(BaseAccessor):
 class PandasAccessor(BaseAccessor):
     """Return accessor to output time series data as a Pandas dataframe"""
 
-    def to_pandas(self, columns: List[str], data: List[tuple]) -> pd.DataFrame:
+    def to_pandas(
+        self, columns: List[str], data: Union[List[tuple], pyarrow.Table]
+    ) -> pd.DataFrame:
         """Create timeseries in Pandas dataframe
 
         Args:
             columns (str): List of column labels
-            data (List[tuple]): List of time series tuples
+            data (Union[List[tuple], pyarrow.Table]): List of time series
+                                                      tuples or Arrow table
 
         Returns:
             pd.DataFrame: time series in Pandas dataframe
         """
+        if isinstance(data, pyarrow.Table):
+            return data.to_pandas()
         return pd.DataFrame(data=self.create_data(data), columns=columns)
 
 
+class ArrowAccessor(BaseAccessor):
+    """Return accessor to output time series data as an Arrow table"""
+
+    def to_arrow(
+        self, columns: List[str], data: Union[List[tuple], pyarrow.Table]
+    ) -> pyarrow.Table:
+        """Create timeseries in Arrow table
+
+        Args:
+            columns (str): List of column labels
+            data (Union[List[tuple], pyarrow.Table]): List of time series
+                                                      tuples or Arrow table
+
+        Returns:
+            pyarrow.Table: time series in Arrow table
+        """
+        if isinstance(data, pyarrow.Table):
+            return data
+        return rows_to_table(columns, data)
+
+
 class PySparkAccessor(BaseAccessor):
     """Return accessor to output time series data as a PySpark dataframe"""
 
@@ -82,4 +112,6 @@ class PySparkAccessor(BaseAccessor):
             spark.DataFrame: time series in Spark dataframe
         """
         session = spark.SparkSession.builder.getOrCreate()
+        if isinstance(data, pyarrow.Table):
+            return session.createDataFrame(data.to_pandas())
         return session.createDataFrame(data=self.create_data(data), schema=columns)
@@ -0,0 +1,190 @@
+"""Asyncio APIs for time series operations"""
+
+from typing import Callable, List, Literal, Union
+from more_utils.persistence.modelardb import AsyncModelarDB
+from .base import Timeseries, TimeseriesFactory, ModelTable
+
+
+class AsyncTimeseries:
+    """[summary]
+    An asyncio wrapper over a Timeseries. Batches are pulled from the result
+    set generators on the thread pool of the ModelarDB connection, so
+    iterating a time series does not block the event loop.
+
+    Args:
+        time_series (Timeseries): time series to wrap.
+        modelardb_conn (AsyncModelarDB): connection whose thread pool runs
+                                         the blocking calls.
+    """
+
+    def __init__(self, time_series: Timeseries, modelardb_conn: AsyncModelarDB):
+        self._time_series = time_series
+        self._modelardb_conn = modelardb_conn
+
+    @property
+    def time_series(self) -> Timeseries:
+        """Return the wrapped Timeseries"""
+        return self._time_series
+
+    @property
+    def columns(self) -> List[str]:
+        """Return column labels"""
+        return self._time_series.columns
+
+    async def fetch_next(
+        self,
+        fetch_type: Literal["pandas", "spark", "json", "arrow"] = "pandas",
+        batch_size: int = 1,
+        batch_unit: Literal["rows", "bytes"] = "rows",
+    ):
+        """Asynchronously iterate time-series data batch_size at a time.
+
+        Args:
+            fetch_type (str, optional): Return time series data in
+                                        [pandas, json, spark, arrow] dataframe.
+                                        Defaults to "pandas".
+            batch_size (int, optional): size of the time series batch.
+                                        Defaults to 1.
+            batch_unit (str, optional): measure batch_size in "rows" or in
+                                        Arrow "bytes", see
+                                        Timeseries.fetch_next. Defaults to
+                                        "rows".
+
+        Yields:
+            A dataframe containing a batch of time series data.
+        """
+        ts_generator = self._time_series.fetch_next(
+            fetch_type=fetch_type, batch_size=batch_size, batch_unit=batch_unit
+        )
+        while True:
+            ts_data = await self._modelardb_conn.run(next, ts_generator, None)
+            if ts_data is None:
+                break
+            yield ts_data
+
+    async def fetch_all(
+        self, fetch_type: Literal["pandas", "spark", "json", "arrow"] = "pandas"
+    ):
+        """Return entire time-series data, see Timeseries.fetch_all."""
+        return await self._modelardb_conn.run(
+            self._time_series.fetch_all, fetch_type=fetch_type
+        )
+
+
+class AsyncTimeseriesFactory:
+    """[summary]
+    Asyncio counterpart of the TimeseriesFactory. Every API call runs the
+    blocking TimeseriesFactory call on the thread pool of the ModelarDB
+    connection and returns an AsyncTimeseries.
+
+    Args:
+        source_db_conn (AsyncModelarDB): async ModelarDB connection object.
+        sink_db_conn (AbstractDBLayer): database connection object to store
+                                        time series.
+        **kwargs: cache and spill options, see TimeseriesFactory.
+    """
+
+    def __init__(
+        self, source_db_conn: AsyncModelarDB, sink_db_conn=None, **kwargs
+    ) -> None:
+        self.source_db_conn = source_db_conn
+        self._ts_factory = TimeseriesFactory(
+            source_db_conn=source_db_conn.modelardb_conn,
+            sink_db_conn=sink_db_conn,
+            **kwargs,
+        )
+
+    async def create_time_series(self, *args, **kwargs) -> AsyncTimeseries:
+        """Fetch time-series data points, see
+        TimeseriesFactory.create_time_series."""
+        time_series = await self.source_db_conn.run(
+            self._ts_factory.create_time_series, *args, **kwargs
+        )
+        return AsyncTimeseries(time_series, self.source_db_conn)
+
+    async def create_time_series_from_ts_ids(self, *args, **kwargs) -> AsyncTimeseries:
+        """Fetch time-series data points for time series ids, see
+        TimeseriesFactory.create_time_series_from_ts_ids."""
+        time_series = await self.source_db_conn.run(
+            self._ts_factory.create_time_series_from_ts_ids, *args, **kwargs
+        )
+        return AsyncTimeseries(time_series, self.source_db_conn)
+
+    async def create_time_series_data_models_from_ts_ids(
+        self, *args, **kwargs
+    ) -> AsyncTimeseries:
+        """Fetch time-series data models for time series ids, see
+        TimeseriesFactory.create_time_series_data_models_from_ts_ids."""
+        time_series = await self.source_db_conn.run(
+            self._ts_factory.create_time_series_data_models_from_ts_ids,
+            *args,
+            **kwargs,
+        )
+        return AsyncTimeseries(time_series, self.source_db_conn)
+
+
+class AsyncModelTable:
+    """[summary]
+    Asyncio wrapper over a ModelTable to persist it without blocking the
+    event loop.
+
+    Args:
+        model_table (ModelTable): model table to persist.
+        modelardb_conn (AsyncModelarDB): connection whose thread pool runs
+                                         the blocking calls.
+    """
+
+    def __init__(
+        self, model_table: ModelTable, modelardb_conn: AsyncModelarDB
+    ) -> None:
+        self.model_table = model_table
+        self.modelardb_conn = modelardb_conn
+
+    @classmethod
+    async def from_parquet_file(
+        cls, modelardb_conn: AsyncModelarDB, file_path: str, **kwargs
+    ):
+        """Returns an instance of the AsyncModelTable from the parquet file."""
+        model_table = await modelardb_conn.run(
+            ModelTable.from_parquet_file,
+            modelardb_conn.modelardb_conn,
+            file_path,
+            **kwargs,
+        )
+        return cls(model_table, modelardb_conn)
+
+    @classmethod
+    async def from_arrow_table(
+        cls, modelardb_conn: AsyncModelarDB, arrow_table, **kwargs
+    ):
+        """Returns an instance of the AsyncModelTable from the arrow table."""
+        model_table = await modelardb_conn.run(
+            ModelTable.from_arrow_table,
+            modelardb_conn.modelardb_conn,
+            arrow_table,
+            **kwargs,
+        )
+        return cls(model_table, modelardb_conn)
+
+    async def persist(
+        self,
+        table_name: str,
+        error_bound: Union[float, int],
+        max_workers: int = 1,
+        retries: int = 0,
+        checkpoint_path: Union[str, None] = None,
+        progress_callback: Union[Callable, None] = None,
+    ):
+        """Persist the model table into ModelarDB, see ModelTable.persist.
+
+        The progress_callback is called from the worker threads.
+        """
+        return await self.modelardb_conn.run(
+            self.model_table.persist,
+            table_name,
+            error_bound,
+            max_workers=max_workers,
+            retries=retries,
+            checkpoint_path=checkpoint_path,
+            progress_callback=progress_callback,
+        )
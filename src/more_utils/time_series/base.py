@@ -1,35 +1,106 @@
 import itertools
-from typing import Dict, List, Union, Literal
-from uuid import uuid1
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Union, Literal
+from uuid import uuid1, uuid4
 import pyarrow
+import pyarrow.compute as pc
 import pandas as pd
 from more_utils.persistence.modelardb import ModelarDB
 
 import more_utils.persistence.cassandradb as cassandradb
 from more_utils.persistence.base import AbstractDBLayer
 from more_utils.logging import configure_logger
-from pyarrow import parquet
-from .accessors import JsonAccessor, PandasAccessor, PySparkAccessor
-from .query import safe_substitute, safe_substitute_v2
+from pyarrow import dataset, parquet
+from pymodelardb.types import ProgrammingError
+from .accessors import ArrowAccessor, JsonAccessor, PandasAccessor, PySparkAccessor
+from .cache import (
+    BatchCache,
+    ResultCache,
+    combine_time_ranges,
+    from_milliseconds,
+    to_milliseconds,
+)
+from .columnar import (
+    ArrowBatchStream,
+    concat_chunks,
+    merge_tables,
+    rows_to_table,
+    stack_tables,
+    table_to_rows,
+)
+from .ingest import IngestCheckpoint
+from .schema import SchemaCastPlan
+from .segments import DEFAULT_MODEL_TYPES, SegmentDecoder
+from .spill import DEFAULT_SPILL_BATCH_SIZE, LazyFrame, SpillBuffer
+from .query import (
+    build_aggregate_query,
+    normalize_aggregates,
+    safe_substitute,
+    safe_substitute_v2,
+)
 
 LOGGER = configure_logger(logger_name="Timeseries")
 LOGGER_mt = configure_logger(logger_name="ModelTable")
 TIME_SERIES_ID_LABEL = "TID"
 DEFAULT_VALUE_LABEL = "VALUE"
 TIMESTAMP_LABEL = "TIMESTAMP"
-
-
-class Timeseries(JsonAccessor, PandasAccessor, PySparkAccessor):
+DEFAULT_MAX_BATCH_SIZE = 65536
+DEFAULT_SHARD_WORKERS = 4
+DEFAULT_FETCH_CHUNK_SIZE = 65536
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_AGGREGATES = ["avg", "min", "max"]
+NULL_RESPONSE_MESSAGE = "NULL RESPONSE FROM SERVER."
+UNSUPPORTED_QUERY_MESSAGE = "unable to execute query due to:"
+BATCH_UNITS = ("rows", "bytes")
+PANDAS_AGGREGATES = {
+    "avg": "mean",
+    "min": "min",
+    "max": "max",
+    "sum": "sum",
+    "count": "count",
+    "median": "median",
+    "stddev": "std",
+}
+
+
+class Timeseries(ArrowAccessor, JsonAccessor, PandasAccessor, PySparkAccessor):
     """[summary]
     A Time-Series placeholder class that holds time series data. The class
     instance does not store any active DB session. The class is a sink for
     time series data fetched from DB. Once instantiates, this class provides
     APIs to retrieve data wholly or a batch at a time.
 
+    A result set generator either yields time series tuples or is an
+    `ArrowBatchStream` of record batches. Columnar result sets stay Arrow
+    tables end to end and are only converted by the requested accessor.
+
+    With a `BatchCache`, every decoded batch is kept in the cache so the time
+    series can be re-iterated, sliced by time and converted to several
+    output formats once the result set generators are exhausted, without
+    querying the DB again.
+
+    With a `spill_threshold`, `fetch_all` collects the batches in a
+    `SpillBuffer` that moves to a memory-mapped Arrow IPC file once the
+    batches exceed the threshold, so the memory held by a large time series
+    stays bounded.
+
     Args:
         result_generators (List): A list of result set generator per
                                     Timeseries.
         merge_on (Union[str, None]): common field to merge multiple Timeseries.
+        batch_cache (Union[BatchCache, None], optional): cache of decoded
+                                                         batches. Defaults to
+                                                         None.
+        spill_threshold (Union[int, None], optional): size in bytes past
+                                                      which fetch_all spills
+                                                      to disk. Defaults to
+                                                      None.
+        spill_dir (Union[str, None], optional): directory of the spill files.
+                                                Defaults to None.
     """
 
     def __init__(
@@ -37,12 +108,24 @@ class Timeseries(JsonAccessor, PandasAccessor, PySparkAccessor):
         result_generators: List,
         columns: Union[None, List[str]] = [],
         merge_on: Union[str, None] = None,  # used in legacy JVM based modelardb only.
+        batch_cache: Union[BatchCache, None] = None,
+        spill_threshold: Union[int, None] = None,
+        spill_dir: Union[str, None] = None,
     ) -> None:
         super(Timeseries, self).__init__()
         self._result_generators = result_generators
         self._merge_on = merge_on
         self._columns = columns
         self._result_set = []
+        self._batch_cache = batch_cache
+        self._cache_key = uuid4().hex
+        self._num_batches = 0
+        self._exhausted = False
+        self._spill_threshold = spill_threshold
+        self._spill_dir = spill_dir
+        self._mapped_table = None
+        self._pinned_table = None
+        self._row_sizes = {}
 
     def __len__(self) -> int:
         """no. of rows in current time series"""
@@ -62,11 +145,11 @@ class Timeseries(JsonAccessor, PandasAccessor, PySparkAccessor):
         return self._columns
 
     @property
-    def result_set(self) -> List[tuple]:
+    def result_set(self) -> Union[List[tuple], pyarrow.Table]:
         """Return current resultset
 
         Returns:
-            List[tuple]: current resultset
+            Union[List[tuple], pyarrow.Table]: current resultset
         """
         return self._result_set
 
@@ -78,19 +161,32 @@ class Timeseries(JsonAccessor, PandasAccessor, PySparkAccessor):
         """
         return len(self._result_set)
 
+    @property
+    def cache_stats(self) -> Union[dict, None]:
+        """Return the statistics of the batch cache, None without a cache."""
+        if self._batch_cache is None:
+            return None
+        return self._batch_cache.stats
+
     def fetch_next(
         self,
-        fetch_type: Literal["pandas", "spark", "json"] = "pandas",
+        fetch_type: Literal["pandas", "spark", "json", "arrow"] = "pandas",
         batch_size: int = 1,
+        batch_unit: Literal["rows", "bytes"] = "rows",
     ):
         """Return time-series data batch_size at a time.
 
         Args:
             fetch_type (str, optional): Return time series data in
-                                        [pandas, json, spark] dataframe.
+                                        [pandas, json, spark, arrow] dataframe.
                                         Defaults to "pandas".
             batch_size (int, optional): size of the time series batch.
                                         Defaults to 1.
+            batch_unit (str, optional): measure batch_size in "rows" or in
+                                        Arrow "bytes" per time series. Byte
+                                        sized batches are estimated from the
+                                        row size and hold at least one row.
+                                        Defaults to "rows".
 
         Returns:
             [Timeseries]: A dataframe containing time series data.
@@ -98,14 +194,22 @@ class Timeseries(JsonAccessor, PandasAccessor, PySparkAccessor):
         Raises:
             ValueError: if any param is not a valid argument.
         """
-        return self._create_ts_generator(fetch_type, batch_size)
+        if batch_unit not in BATCH_UNITS:
+            raise ValueError(f"batch_unit must be one of {BATCH_UNITS}.")
+        if self._batch_cache is not None and self._exhausted:
+            return self._replay_cached_batches(fetch_type, batch_size, batch_unit)
+        return self._create_ts_generator(fetch_type, batch_size, batch_unit)
 
-    def fetch_all(self, fetch_type: Literal["pandas", "spark", "json"] = "pandas"):
+    def fetch_all(self, fetch_type: Literal["pandas", "spark", "json", "arrow"] = "pandas"):
         """Return entire time-series data.
 
+        The result sets are read DEFAULT_FETCH_CHUNK_SIZE rows at a time and
+        each chunk is converted to Arrow right away, so the time series is
+        only held as Arrow columns until it is converted to `fetch_type`.
+
         Args:
             fetch_type (str, optional): Return time series data in
-                                        [pandas, json, spark] dataframe.
+                                        [pandas, json, spark, arrow] dataframe.
                                         Defaults to "pandas".
 
         Returns:
@@ -114,57 +218,392 @@ class Timeseries(JsonAccessor, PandasAccessor, PySparkAccessor):
         Raises:
             ValueError: if any param is not a valid argument.
         """
-        if self._result_set:
+        if self._spill_threshold is not None:
+            table = self.fetch_mapped()
+            if table is None:
+                return None
+            method = getattr(self, "to_" + fetch_type)
+            return method(columns=table.column_names, data=table)
+
+        if self._batch_cache is not None:
+            table = self._cached_table()
+            if table is None:
+                return None
             method = getattr(self, "to_" + fetch_type)
+            return method(columns=table.column_names, data=table)
+
+        method = getattr(self, "to_" + fetch_type)
+        if self._exhausted:
+            if not len(self._result_set):
+                return None
             return method(columns=self._columns, data=self._result_set)
 
-        ts_data = None
-        try:
-            ts_data = next(self._create_ts_generator(fetch_type))
-        except StopIteration:
-            ...
+        ts_data_args = []
+        for ts_columns, ts_data_gen in self._result_generators:
+            ts_data = self._collect_table(ts_columns, ts_data_gen)
+            if ts_data.num_rows:
+                ts_data_args.append((ts_columns, ts_data))
+        self._exhausted = True
+
+        if not ts_data_args:
+            return None
+        if len(ts_data_args) == 1:
+            self._columns, self._result_set = ts_data_args[0]
+        else:
+            self._columns, self._result_set = self._merge_time_series(
+                ts_data_args, self._merge_on
+            )
+        return method(columns=self._columns, data=self._result_set)
 
-        return ts_data
+    @staticmethod
+    def _collect_table(ts_columns: List[str], ts_data_gen) -> pyarrow.Table:
+        """Read a result set generator into an Arrow table chunk by chunk.
+
+        Args:
+            ts_columns (List[str]): column labels of the result set.
+            ts_data_gen (Generator): result set generator.
+
+        Returns:
+            pyarrow.Table: entire result set.
+        """
+        if isinstance(ts_data_gen, ArrowBatchStream):
+            return ts_data_gen.take(names=ts_columns)
+
+        chunks = []
+        while True:
+            rows = list(itertools.islice(ts_data_gen, DEFAULT_FETCH_CHUNK_SIZE))
+            if not rows:
+                break
+            chunks.append(rows_to_table(ts_columns, rows))
+        if not chunks:
+            return rows_to_table(ts_columns, [])
+        return concat_chunks(chunks)
+
+    def fetch_mapped(self) -> Union[pyarrow.Table, None]:
+        """Return the remaining time-series data as a memory-mapped table.
+
+        The batches are pulled DEFAULT_SPILL_BATCH_SIZE rows at a time and
+        spilled to an Arrow IPC file past `spill_threshold` bytes, or right
+        away without a threshold. Small time series stay in memory. The
+        table is kept, so subsequent calls return the same table.
+
+        Returns:
+            Union[pyarrow.Table, None]: time series, None if empty.
+        """
+        if self._mapped_table is None:
+            spill_buffer = SpillBuffer(self._spill_threshold or 0, self._spill_dir)
+            for batch in self._create_ts_generator("arrow", DEFAULT_SPILL_BATCH_SIZE):
+                spill_buffer.append(batch)
+            self._mapped_table = spill_buffer.to_table()
+        return self._mapped_table
+
+    def fetch_lazy(self) -> Union[LazyFrame, None]:
+        """Return the remaining time-series data as a lazy pandas view.
+
+        Only the rows or columns that are accessed are converted to pandas,
+        see fetch_mapped.
+
+        Returns:
+            Union[LazyFrame, None]: time series, None if empty.
+        """
+        table = self.fetch_mapped()
+        return LazyFrame(table) if table is not None else None
+
+    def between(
+        self,
+        from_date: Union[str, None] = None,
+        to_date: Union[str, None] = None,
+        fetch_type: Literal["pandas", "spark", "json", "arrow"] = "pandas",
+        timestamp_column: Union[str, None] = None,
+    ):
+        """Return the time-series data between two timestamps, inclusive.
+
+        The time series is sliced from the batch cache, so it is fetched from
+        the DB only once.
+
+        Args:
+            from_date (Union[str, None], optional): Start timestamp.
+                                                    Defaults to None.
+            to_date (Union[str, None], optional): End timestamp.
+                                                  Defaults to None.
+            fetch_type (str, optional): Return time series data in
+                                        [pandas, json, spark, arrow] dataframe.
+                                        Defaults to "pandas".
+            timestamp_column (Union[str, None], optional): column to slice on,
+                                                           the first timestamp
+                                                           column if None.
+                                                           Defaults to None.
+
+        Returns:
+            [Timeseries]: A dataframe containing time series data.
+
+        Raises:
+            ValueError: if the time series has no batch cache or no
+                        timestamp column.
+        """
+        if self._batch_cache is None:
+            raise ValueError("Slicing a time series requires a batch cache.")
+        table = self._cached_table()
+        if table is None:
+            return None
+
+        if timestamp_column is None:
+            timestamp_columns = [
+                field.name
+                for field in table.schema
+                if pyarrow.types.is_timestamp(field.type)
+            ]
+            if not timestamp_columns:
+                raise ValueError("Time series has no timestamp column.")
+            timestamp_column = timestamp_columns[0]
+
+        column = table.column(timestamp_column)
+        mask = pyarrow.array([True] * len(table))
+        if from_date:
+            start = pyarrow.scalar(pd.Timestamp(from_date), type=column.type)
+            mask = pc.and_(mask, pc.greater_equal(column, start))
+        if to_date:
+            end = pyarrow.scalar(pd.Timestamp(to_date), type=column.type)
+            mask = pc.and_(mask, pc.less_equal(column, end))
+        table = table.filter(mask)
+
+        method = getattr(self, "to_" + fetch_type)
+        return method(columns=table.column_names, data=table)
+
+    def _cached_table(self) -> Union[pyarrow.Table, None]:
+        """Fetch the remaining batches into the cache and combine all of them.
+
+        The batches fetched by this call are combined as they are produced,
+        the earlier ones are read from the cache. If the cache cannot hold
+        every batch, e.g. a batch is larger than its max_bytes, the combined
+        table is kept by the time series, so it can still be re-iterated.
+
+        Returns:
+            Union[pyarrow.Table, None]: entire time series, None if empty.
+
+        Raises:
+            ValueError: if a batch returned by fetch_next has been evicted
+                        from the cache before the time series was exhausted.
+        """
+        if self._pinned_table is not None:
+            return self._pinned_table
+
+        batches = [
+            self._batch_cache.get((self._cache_key, batch_no))
+            for batch_no in range(self._num_batches)
+        ]
+        if any(batch is None for batch in batches):
+            raise ValueError(
+                "Time series batches were evicted from the batch cache, "
+                "increase its max_bytes or fetch the time series again."
+            )
+        batches.extend(self._create_ts_generator("arrow", DEFAULT_FETCH_CHUNK_SIZE))
+        if not batches:
+            return None
+
+        table = pyarrow.concat_tables(batches)
+        if not all(
+            (self._cache_key, batch_no) in self._batch_cache
+            for batch_no in range(self._num_batches)
+        ):
+            self._pinned_table = table
+        return table
+
+    def _replay_cached_batches(
+        self,
+        fetch_type: Literal["pandas", "spark", "json", "arrow"],
+        batch_size=None,
+        batch_unit: Literal["rows", "bytes"] = "rows",
+    ):
+        """Create time series generator from the batch cache.
+
+        Args:
+            fetch_type (str): Return time series data in
+                                        [pandas, json, spark, arrow] dataframe.
+            batch_size (int, optional): size of the time series batch.
+                                        Defaults to None.
+            batch_unit (str, optional): measure batch_size in "rows" or
+                                        "bytes". Defaults to "rows".
+
+        Yields:
+            Generator: time series generator
+        """
+        table = self._cached_table()
+        if table is None:
+            return
+        method = getattr(self, "to_" + fetch_type)
+        if batch_size and batch_unit == "bytes":
+            batch_size = max(batch_size * len(table) // max(table.nbytes, 1), 1)
+        batch_size = batch_size or len(table)
+        for offset in range(0, len(table), batch_size):
+            self._columns = table.column_names
+            self._result_set = table.slice(offset, batch_size)
+            yield method(columns=self._columns, data=self._result_set)
 
     def _create_ts_generator(
-        self, fetch_type: Literal["pandas", "spark", "json"], batch_size=None
+        self,
+        fetch_type: Literal["pandas", "spark", "json", "arrow"],
+        batch_size=None,
+        batch_unit: Literal["rows", "bytes"] = "rows",
     ):
         """Create time series generator from `self._result_generators`
 
         Args:
             fetch_type (str): Return time series data in
-                                        [pandas, json, spark] dataframe.
+                                        [pandas, json, spark, arrow] dataframe.
                                         Defaults to "pandas".
             batch_size (int, optional): size of the time series batch.
                                         Defaults to None.
+            batch_unit (str, optional): measure batch_size in "rows" or
+                                        "bytes". Defaults to "rows".
 
         Yields:
             Generator: time series generator
         """
+        method = getattr(self, "to_" + fetch_type)
+        if self._merge_on and len(self._result_generators) > 1:
+            batches = self._merge_batches(batch_size, batch_unit)
+        else:
+            batches = self._stack_batches(batch_size, batch_unit)
+
+        for self._columns, self._result_set in batches:
+            if self._batch_cache is not None:
+                self._batch_cache.put(
+                    (self._cache_key, self._num_batches),
+                    self.to_arrow(columns=self._columns, data=self._result_set),
+                )
+                self._num_batches += 1
+
+            yield method(columns=self._columns, data=self._result_set)
+        self._exhausted = True
+
+    def _take(
+        self, index: int, ts_columns: List[str], ts_data_gen, batch_size, by_bytes
+    ):
+        """Take the next batch of a result set generator."""
+        if isinstance(ts_data_gen, ArrowBatchStream):
+            if by_bytes:
+                return ts_data_gen.take(names=ts_columns, max_bytes=batch_size)
+            return ts_data_gen.take(batch_size, names=ts_columns)
+        if by_bytes:
+            return self._take_rows_by_bytes(index, ts_columns, ts_data_gen, batch_size)
+        return list(
+            itertools.islice(ts_data_gen, batch_size) if batch_size else ts_data_gen
+        )
+
+    def _stack_batches(self, batch_size=None, batch_unit="rows"):
+        """Yield the next batch of every result set, stacked on axis = 0.
+
+        Yields:
+            Tuple[List[str], Union[list, pyarrow.Table]]: columns and batch.
+        """
+        by_bytes = bool(batch_size) and batch_unit == "bytes"
         while True:
             ts_data_args = []
-            for ts_columns, ts_data_gen in self._result_generators:
-                ts_data = list(
-                    itertools.islice(ts_data_gen, batch_size)
-                    if batch_size
-                    else ts_data_gen
+            for index, (ts_columns, ts_data_gen) in enumerate(self._result_generators):
+                ts_data = self._take(
+                    index, ts_columns, ts_data_gen, batch_size, by_bytes
                 )
-                if ts_data:
+                if len(ts_data):
                     ts_data_args.append((ts_columns, ts_data))
 
             if not ts_data_args:
-                break
-
-            method = getattr(self, "to_" + fetch_type)
+                return
             if len(ts_data_args) == 1:
-                self._columns = ts_data_args[0][0]
-                self._result_set = ts_data_args[0][1]
+                yield ts_data_args[0]
             else:
-                self._columns, self._result_set = self._merge_time_series(
-                    ts_data_args, self._merge_on
+                yield self._merge_time_series(ts_data_args)
+
+    def _merge_batches(self, batch_size=None, batch_unit="rows"):
+        """Yield the result sets merged on `merge_on` as a streaming k-way merge.
+
+        Every result set must be ordered on `merge_on`. A batch is pulled from
+        each result set that is not exhausted, and the rows up to the smallest
+        of the last keys seen are merged and emitted, the remaining rows wait
+        for the next batches. So every key is emitted once with the columns of
+        all the time series, whatever the batch size.
+
+        Yields:
+            Tuple[List[str], pyarrow.Table]: columns and merged batch.
+        """
+        by_bytes = bool(batch_size) and batch_unit == "bytes"
+        pending = [None] * len(self._result_generators)
+        exhausted = [False] * len(self._result_generators)
+        while True:
+            for index, (ts_columns, ts_data_gen) in enumerate(self._result_generators):
+                if exhausted[index]:
+                    continue
+                ts_data = self._take(
+                    index, ts_columns, ts_data_gen, batch_size, by_bytes
                 )
+                if not len(ts_data):
+                    exhausted[index] = True
+                    continue
+                table = self.to_arrow(columns=ts_columns, data=ts_data)
+                if pending[index] is not None:
+                    table = concat_chunks([pending[index], table])
+                pending[index] = table
+
+            if all(table is None or not table.num_rows for table in pending):
+                return
+
+            # Rows up to the watermark are complete, a later batch of any time
+            # series only holds larger keys.
+            last_keys = [
+                table.column(self._merge_on)[-1]
+                for table, done in zip(pending, exhausted)
+                if not done
+            ]
+            watermark = None
+            if last_keys:
+                watermark = min(last_keys, key=lambda key: key.as_py())
+
+            ready = []
+            for index, table in enumerate(pending):
+                if table is None:
+                    continue
+                if watermark is None:
+                    ready.append(table)
+                    pending[index] = table.slice(0, 0)
+                    continue
+                key = table.column(self._merge_on)
+                num_ready = pc.sum(pc.less_equal(key, watermark.cast(key.type)))
+                num_ready = num_ready.as_py() or 0
+                ready.append(table.slice(0, num_ready))
+                pending[index] = table.slice(num_ready)
+
+            merged_table = merge_tables(
+                ready, self._merge_on, drop_columns=[TIME_SERIES_ID_LABEL]
+            )
+            if merged_table.num_rows:
+                yield merged_table.column_names, merged_table
 
-            yield method(columns=self._columns, data=self._result_set)
+    def _take_rows_by_bytes(
+        self, index: int, ts_columns: List[str], ts_data_gen, max_bytes: int
+    ) -> List[tuple]:
+        """Take about `max_bytes` bytes of time series tuples.
+
+        The Arrow size of a row is estimated once per result set generator
+        from its first row.
+
+        Args:
+            index (int): index of the result set generator.
+            ts_columns (List[str]): column labels of the result set.
+            ts_data_gen (Generator): result set generator.
+            max_bytes (int): size of the batch in bytes.
+
+        Returns:
+            List[tuple]: at least one time series tuple, unless exhausted.
+        """
+        ts_data = []
+        if index not in self._row_sizes:
+            ts_data = list(itertools.islice(ts_data_gen, 1))
+            if not ts_data:
+                return ts_data
+            self._row_sizes[index] = max(rows_to_table(ts_columns, ts_data).nbytes, 1)
+        num_rows = max(max_bytes // self._row_sizes[index], 1) - len(ts_data)
+        ts_data.extend(itertools.islice(ts_data_gen, max(num_rows, 0)))
+        return ts_data
 
     def _merge_time_series(
         self, data_args: List[tuple], merge_on: Union[str, None] = None
@@ -179,24 +618,20 @@ class Timeseries(JsonAccessor, PandasAccessor, PySparkAccessor):
             merge_on (str): common field to merge multiple Timeseries.
 
         Returns:
-            List[str], List[tuple]: List of column labels, merged time series.
+            List[str], pyarrow.Table: List of column labels, merged time series.
         """
-        master_df = pd.DataFrame()
-        for ts_columns, ts_data in data_args:
-            current_df = self.to_pandas(columns=ts_columns, data=ts_data)
-            if master_df.empty:
-                master_df = current_df
-            elif merge_on:
-                current_df = current_df.drop(labels=TIME_SERIES_ID_LABEL, axis=1)
-                if TIME_SERIES_ID_LABEL in master_df.columns:
-                    master_df = master_df.drop(labels=TIME_SERIES_ID_LABEL, axis=1)
-                master_df = pd.merge(master_df, current_df, on=merge_on, how="outer")
-            else:
-                master_df = pd.concat([master_df, current_df])
+        tables = [
+            self.to_arrow(columns=ts_columns, data=ts_data)
+            for ts_columns, ts_data in data_args
+        ]
+        if merge_on:
+            master_table = merge_tables(
+                tables, merge_on, drop_columns=[TIME_SERIES_ID_LABEL]
+            )
+        else:
+            master_table = stack_tables(tables)
 
-        return list(master_df.columns), list(
-            master_df.itertuples(index=False, name=None)
-        )
+        return master_table.column_names, master_table
 
 
 class TimeseriesFactory:
@@ -209,20 +644,73 @@ class TimeseriesFactory:
     Args:
         db_conn (AbstractDBLayer): database connection object to create DB
                                    sessions.
+        result_cache (Union[ResultCache, None], optional): on-disk cache of
+                     query results. Time range queries without a limit are
+                     served from the cache and only the missing sub-ranges
+                     are fetched from the source DB. Defaults to None.
+        batch_cache (Union[BatchCache, None], optional): in-memory cache of
+                    decoded batches shared by the created time series.
+                    Defaults to None.
+        spill_threshold (Union[int, None], optional): size in bytes past
+                        which the created time series spill to disk in
+                        fetch_all. Defaults to None.
+        spill_dir (Union[str, None], optional): directory of the spill files.
+                                                Defaults to None.
     """
 
     def __init__(
         self,
         source_db_conn: AbstractDBLayer = None,
         sink_db_conn: AbstractDBLayer = None,
+        result_cache: Union[ResultCache, None] = None,
+        batch_cache: Union[BatchCache, None] = None,
+        spill_threshold: Union[int, None] = None,
+        spill_dir: Union[str, None] = None,
     ) -> None:
         self.source_db_conn = source_db_conn
         self.sink_db_conn = sink_db_conn
+        self.result_cache = result_cache
+        self.batch_cache = batch_cache
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self._high_water_marks = {}
+
+    def _create_timeseries(
+        self,
+        result_generators: List,
+        columns: Union[None, List[str]] = [],
+        merge_on: Union[str, None] = None,
+    ) -> Timeseries:
+        """Create a Timeseries with the cache and spill options of the factory."""
+        return Timeseries(
+            result_generators,
+            columns,
+            merge_on,
+            batch_cache=self.batch_cache,
+            spill_threshold=self.spill_threshold,
+            spill_dir=self.spill_dir,
+        )
+
+    def _create_session(self, columnar: bool = False):
+        """Open a session with the cloud interface of the source DB.
+
+        Args:
+            columnar (bool, optional): open an arrow session that keeps the
+                                       result set as record batches.
+                                       Defaults to False.
+
+        Returns:
+            AbstractDBSession: database session.
+        """
+        if columnar:
+            return self.source_db_conn.create_arrow_session(conn_type="cloud")
+        return self.source_db_conn.create_session(conn_type="cloud")
 
     def _execute(
         self,
         query_params: Dict[str, Union[str, int]],
         value_column_label: Union[str, None] = None,
+        columnar: bool = False,
     ):
         """Execute given query params on the source DB.
 
@@ -232,54 +720,358 @@ class TimeseriesFactory:
             value_column_label (Union[str, None], optional): Label to replace
                                                             value column.
                                                             Defaults to None.
+            columnar (bool, optional): keep the result set as Arrow record
+                                       batches. Defaults to False.
 
         Returns:
             Tuple[List[str], Generator]: Tuple of columns and result set
                                          generator
         """
-        with self.source_db_conn.create_session(conn_type="cloud") as session:
+        with self._create_session(columnar) as session:
             query = safe_substitute(query_params)
             LOGGER.debug(query)
             session.execute(query)
             if not session.columns:
-                raise ValueError("NULL RESPONSE FROM SERVER.")
+                raise ValueError(NULL_RESPONSE_MESSAGE)
             columns = [
                 value_column_label
                 if value_column_label and value[0] == DEFAULT_VALUE_LABEL
                 else value[0]
                 for value in session.columns
             ]
+            if columnar:
+                return (columns, ArrowBatchStream(session.result_set, session.schema))
             return (columns, session.result_set)
 
-    def _execute_v2(self, query_params: Dict[str, Union[str, int]]):
+    def _execute_v2(
+        self, query_params: Dict[str, Union[str, int]], columnar: bool = False
+    ):
         """Execute given query params on the source DB.
 
         Args:
             query_params (Dict[str, Union[str, int]]): query params to
                                                        create a query.
-            value_column_label (Union[str, None], optional): Label to replace
-                                                            value column.
-                                                            Defaults to None.
+            columnar (bool, optional): keep the result set as Arrow record
+                                       batches. Defaults to False.
 
         Returns:
             Tuple[List[str], Generator]: Tuple of columns and result set
                                          generator
         """
-        with self.source_db_conn.create_session(conn_type="cloud") as session:
-            query = safe_substitute_v2(query_params)
+        return self._execute_query(safe_substitute_v2(query_params), columnar)
+
+    def _execute_query(self, query: str, columnar: bool = False):
+        """Execute given query on the source DB.
+
+        Args:
+            query (str): query string.
+            columnar (bool, optional): keep the result set as Arrow record
+                                       batches. Defaults to False.
+
+        Returns:
+            Tuple[List[str], Generator]: Tuple of columns and result set
+                                         generator
+        """
+        with self._create_session(columnar) as session:
             LOGGER.debug(query)
             session.execute(query)
             if not session.columns:
-                raise ValueError("NULL RESPONSE FROM SERVER.")
+                raise ValueError(NULL_RESPONSE_MESSAGE)
             columns = [value[0] for value in session.columns]
+            if columnar:
+                return (columns, ArrowBatchStream(session.result_set, session.schema))
             return (columns, session.result_set)
 
+    @staticmethod
+    def _is_unsupported_query(error: Exception) -> bool:
+        """Return True if the server rejected a query or returned no result."""
+        if isinstance(error, ProgrammingError):
+            return str(error).startswith(UNSUPPORTED_QUERY_MESSAGE)
+        return str(error) == NULL_RESPONSE_MESSAGE
+
+    def _is_cacheable(self, query_params: Dict[str, Union[str, int]]) -> bool:
+        """Return True if the query result can be served from the cache.
+
+        Only queries whose time range filters a single timestamp column are
+        cacheable, as the cache splits a time range on that column. Segment
+        queries filter their start and end time columns, so a segment that
+        crosses a split point would be lost.
+        """
+        return (
+            self.result_cache is not None
+            and bool(query_params["START_TIME"])
+            and bool(query_params["END_TIME"])
+            and query_params["LIMIT"] is None
+            and query_params["START_TIME_COLUMN"] == query_params["END_TIME_COLUMN"]
+        )
+
+    def _execute_cached(
+        self,
+        query_params: Dict[str, Union[str, int]],
+        execute: Callable,
+        key: str,
+        timestamp_column: str,
+        columnar: bool = False,
+    ):
+        """Execute given query params through the result cache.
+
+        The cached parts of the time range are read from disk, the missing
+        sub-ranges are fetched with `execute` and stored in the cache, unless
+        they reach the current time. Rows in the time range of more than one
+        part are taken from the first part only.
+
+        Args:
+            query_params (Dict[str, Union[str, int]]): query params to
+                                                       create a query.
+            execute (Callable): executes query params in columnar mode and
+                                returns the columns and result set.
+            key (str): cache key of the query result.
+            timestamp_column (str): column filtered on the time range.
+            columnar (bool, optional): keep the result set as Arrow record
+                                       batches. Defaults to False.
+
+        Returns:
+            Tuple[List[str], Generator]: Tuple of columns and result set
+                                         generator
+        """
+        start = to_milliseconds(query_params["START_TIME"])
+        end = to_milliseconds(query_params["END_TIME"])
+        parts, missing = self.result_cache.lookup(key, start, end)
+        LOGGER.debug(f"{len(parts)} cached part(s), {len(missing)} missing part(s).")
+        for missing_start, missing_end in missing:
+            missing_params = dict(
+                query_params,
+                START_TIME=from_milliseconds(missing_start),
+                END_TIME=from_milliseconds(missing_end),
+            )
+            columns, result_set = execute(missing_params)
+            table = result_set.take(names=columns)
+            self.result_cache.store(key, missing_start, missing_end, table)
+            parts.append((missing_start, missing_end, table))
+
+        table = combine_time_ranges(parts, timestamp_column, start, end)
+        if columnar:
+            return (
+                table.column_names,
+                ArrowBatchStream(table.to_batches(), table.schema),
+            )
+        return (table.column_names, iter(table_to_rows(table)))
+
+    def _execute_sharded(
+        self,
+        query_params: Dict[str, Union[str, int]],
+        shard_size: Union[str, pd.Timedelta],
+        max_workers: Union[int, None] = None,
+        columnar: bool = False,
+    ):
+        """Execute given query params as time range shards on the source DB.
+
+        The time range is split into half-open shards of `shard_size`, only
+        the last shard includes the end time. At most `max_workers` shards
+        are fetched concurrently, each into memory, in a sliding window: the
+        next shard is submitted once the oldest one is handed to the
+        consumer. The shards are chained in time order into one stream.
+
+        Args:
+            query_params (Dict[str, Union[str, int]]): query params to
+                                                       create a query.
+            shard_size (Union[str, pd.Timedelta]): time range per shard, e.g.
+                                                   "1D".
+            max_workers (Union[int, None], optional): no. of concurrent
+                                                      shards. Defaults to
+                                                      DEFAULT_SHARD_WORKERS.
+            columnar (bool, optional): keep the result set as Arrow record
+                                       batches. Defaults to False.
+
+        Returns:
+            Tuple[List[str], Generator]: Tuple of columns and result set
+                                         generator
+
+        Raises:
+            ValueError: if the time range is not bounded or limited.
+        """
+        if not query_params["START_TIME"] or not query_params["END_TIME"]:
+            raise ValueError("Sharded scans require from_date and to_date.")
+        if query_params["LIMIT"] is not None:
+            raise ValueError("Sharded scans do not support a limit.")
+        shard_size = pd.Timedelta(shard_size)
+        if shard_size <= pd.Timedelta(0):
+            raise ValueError("shard_size must be positive.")
+
+        start = pd.Timestamp(query_params["START_TIME"])
+        end = pd.Timestamp(query_params["END_TIME"])
+        shards = []
+        while True:
+            shard_end = min(start + shard_size, end)
+            shards.append(
+                dict(
+                    query_params,
+                    START_TIME=start.isoformat(sep=" "),
+                    END_TIME=shard_end.isoformat(sep=" "),
+                    END_INCLUSIVE=shard_end == end,
+                )
+            )
+            if shard_end >= end:
+                break
+            start = shard_end
+        LOGGER.debug(f"Scanning {len(shards)} shard(s) of {shard_size}.")
+
+        def fetch_shard(shard_params):
+            columns, result_set = self._execute_v2(shard_params, columnar=columnar)
+            if columnar:
+                return columns, result_set.schema, list(result_set)
+            return columns, None, list(result_set)
+
+        max_workers = max_workers or DEFAULT_SHARD_WORKERS
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="moreutils-shard"
+        )
+        remaining_shards = iter(shards)
+        pending = deque()
+
+        def submit_next_shard():
+            shard_params = next(remaining_shards, None)
+            if shard_params is not None:
+                pending.append(executor.submit(fetch_shard, shard_params))
+
+        def shutdown():
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        for _ in range(max_workers):
+            submit_next_shard()
+
+        try:
+            columns, schema, first_shard = pending.popleft().result()
+        except BaseException:
+            shutdown()
+            raise
+        submit_next_shard()
+
+        def chain_shards():
+            try:
+                yield from first_shard
+                while pending:
+                    _, _, shard = pending.popleft().result()
+                    submit_next_shard()
+                    yield from shard
+            finally:
+                shutdown()
+
+        if columnar:
+            return (columns, ArrowBatchStream(chain_shards(), schema))
+        return (columns, chain_shards())
+
+    def _execute_all(
+        self,
+        query_args: List[tuple],
+        columnar: bool = False,
+        max_workers: Union[int, None] = None,
+    ) -> List[tuple]:
+        """Execute the queries of multiple time series on the source DB.
+
+        The queries are issued concurrently over a thread pool when
+        `max_workers` is greater than 1. Results are returned in the order of
+        `query_args` either way.
+
+        Args:
+            query_args (List[tuple]): List of (query_params,
+                                      value_column_label) tuples.
+            columnar (bool, optional): keep the result set as Arrow record
+                                       batches. Defaults to False.
+            max_workers (Union[int, None], optional): no. of concurrent
+                                                      queries. Defaults to
+                                                      None.
+
+        Returns:
+            List[tuple]: List of columns and result set generator tuples.
+        """
+
+        def execute(args):
+            query_params, value_column_label = args
+            if not self._is_cacheable(query_params):
+                return self._execute(
+                    query_params, value_column_label, columnar=columnar
+                )
+            columns, result_set = self._execute_cached(
+                query_params,
+                lambda params: self._execute(params, columnar=True),
+                ResultCache.create_key(
+                    query_params["SCHEMA"],
+                    query_params["TS_ID"],
+                    query_params.get("COLUMNS"),
+                    query_params["START_TIME_COLUMN"],
+                ),
+                query_params["START_TIME_COLUMN"],
+                columnar=columnar,
+            )
+            columns = [
+                value_column_label
+                if value_column_label and column == DEFAULT_VALUE_LABEL
+                else column
+                for column in columns
+            ]
+            return (columns, result_set)
+
+        if not max_workers or max_workers <= 1 or len(query_args) <= 1:
+            return [execute(args) for args in query_args]
+
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(query_args)),
+            thread_name_prefix="moreutils-ts",
+        ) as executor:
+            return list(executor.map(execute, query_args))
+
+    @staticmethod
+    def _split_by_ts_id(
+        result: tuple,
+        ts_ids: List[int],
+        value_column_labels: Union[List[str], None] = None,
+        columnar: bool = False,
+    ) -> List[tuple]:
+        """Split the result set of a `TID IN (...)` query into one per id.
+
+        Args:
+            result (tuple): columns and ArrowBatchStream of the query.
+            ts_ids (List[int]): time series ids in the order to return.
+            value_column_labels (Union[List[str], None], optional): label of
+                               the value column per id. Defaults to None.
+            columnar (bool, optional): return the result sets as Arrow record
+                                       batches. Defaults to False.
+
+        Returns:
+            List[tuple]: List of columns and result set generator tuples.
+        """
+        columns, result_set = result
+        table = result_set.take(names=columns)
+        result_generators = []
+        for index, ts_id in enumerate(ts_ids):
+            ts_table = table.filter(pc.equal(table.column(TIME_SERIES_ID_LABEL), ts_id))
+            ts_columns = [
+                value_column_labels[index]
+                if value_column_labels and column == DEFAULT_VALUE_LABEL
+                else column
+                for column in columns
+            ]
+            ts_table = ts_table.rename_columns(ts_columns)
+            if columnar:
+                ts_data = ArrowBatchStream(ts_table.to_batches(), ts_table.schema)
+            else:
+                ts_data = iter(table_to_rows(ts_table))
+            result_generators.append((ts_columns, ts_data))
+        return result_generators
+
     def create_time_series(
         self,
         model_table: str,
         from_date: Union[str, None] = None,
         to_date: Union[str, None] = None,
         limit: Union[int, None] = None,
+        columnar: bool = False,
+        columns: Union[List[str], None] = None,
+        shard_size: Union[str, pd.Timedelta, None] = None,
+        max_workers: Union[int, None] = None,
     ) -> Timeseries:
         """Fetch time-series data points for time series ids in `ts_ids`.
 
@@ -291,6 +1083,19 @@ class TimeseriesFactory:
                                                   Defaults to None.
             limit (Union[int, None], optional): No of data points to fetch.
                                                 Defaults to None.
+            columnar (bool, optional): keep the result set as Arrow record
+                                       batches from the Flight stream to the
+                                       accessor. Defaults to False.
+            columns (Union[List[str], None], optional): columns to fetch, all
+                                                        columns if None.
+                                                        Defaults to None.
+            shard_size (Union[str, pd.Timedelta, None], optional): split the
+                       time range into shards of this size, e.g. "7D", that
+                       are scanned concurrently and returned in time order.
+                       Requires from_date and to_date. Defaults to None.
+            max_workers (Union[int, None], optional): no. of shards to scan
+                                                      concurrently. Defaults
+                                                      to DEFAULT_SHARD_WORKERS.
 
         Returns:
             Timeseries: A time-series placeholder class containing time series.
@@ -300,6 +1105,11 @@ class TimeseriesFactory:
         """
         assert isinstance(model_table, str), "Time Series model_table must be a str."
 
+        def execute(params, columnar):
+            if shard_size is None:
+                return self._execute_v2(params, columnar=columnar)
+            return self._execute_sharded(params, shard_size, max_workers, columnar)
+
         result_generators = []
         query_params = {
             "MODEL_TABLE": model_table,
@@ -308,11 +1118,242 @@ class TimeseriesFactory:
             "START_TIME": from_date,
             "END_TIME": to_date,
             "LIMIT": limit,
+            "COLUMNS": columns,
         }
-        generator = self._execute_v2(query_params)
+        if self._is_cacheable(query_params):
+            generator = self._execute_cached(
+                query_params,
+                lambda params: execute(params, columnar=True),
+                ResultCache.create_key(
+                    model_table, columns, query_params["START_TIME_COLUMN"]
+                ),
+                query_params["START_TIME_COLUMN"],
+                columnar=columnar,
+            )
+        else:
+            generator = execute(query_params, columnar=columnar)
         result_generators.append(generator)
 
-        return Timeseries(result_generators=result_generators, columns=generator[0])
+        return self._create_timeseries(result_generators, columns=generator[0])
+
+    def create_aggregated_time_series(
+        self,
+        model_table: str,
+        bucket: str = "1h",
+        aggs: Union[List[str], None] = None,
+        columns: Union[List[str], None] = None,
+        from_date: Union[str, None] = None,
+        to_date: Union[str, None] = None,
+        timestamp_column: str = "datetime",
+        fallback: bool = True,
+    ) -> Timeseries:
+        """Fetch time-series data aggregated per time bucket.
+
+        The aggregation runs on ModelarDB with a GROUP BY on the time bucket,
+        so only one row per bucket is transferred. If the server rejects the
+        query, e.g. it lacks an aggregate function, or returns no result set,
+        the raw data points are fetched and aggregated on the client instead.
+        Any other error, e.g. an unreachable server, is raised.
+
+        Args:
+            model_table (str): time series model_table.
+            bucket (str, optional): width of a time bucket, e.g. "1min",
+                                    "1h" or "1d". Defaults to "1h".
+            aggs (Union[List[str], None], optional): aggregates per column,
+                                        any of [avg (or mean), min, max, sum,
+                                        count, median, stddev]. Defaults to
+                                        ["avg", "min", "max"].
+            columns (Union[List[str], None], optional): columns to aggregate.
+                                                        Defaults to all
+                                                        FIELD columns.
+            from_date (Union[str, None], optional): Start timestamp.
+                                                    Defaults to None.
+            to_date (Union[str, None], optional): End timestamp.
+                                                  Defaults to None.
+            timestamp_column (str, optional): timestamp column of the model
+                                              table. Defaults to "datetime".
+            fallback (bool, optional): aggregate on the client if the server
+                                       cannot. Defaults to True.
+
+        Returns:
+            Timeseries: A time-series placeholder class containing the
+                        aggregates labeled "<column>_<agg>" per bucket.
+
+        Raises:
+            ValueError: if any param is not a valid argument.
+        """
+        assert isinstance(model_table, str), "Time Series model_table must be a str."
+        if not re.match(r"^\d+\s*[a-zA-Z]+$", bucket):
+            raise ValueError(f"Invalid bucket: {bucket}")
+        bucket_width = pd.Timedelta(bucket)
+        bucket_ms = int(bucket_width / pd.Timedelta(milliseconds=1))
+        if bucket_ms <= 0:
+            raise ValueError(f"Invalid bucket: {bucket}")
+
+        aggs = normalize_aggregates(DEFAULT_AGGREGATES if aggs is None else aggs)
+        if columns is None:
+            schema = self.source_db_conn.table_schema(model_table)
+            columns = [
+                field.name
+                for field in schema
+                if pyarrow.types.is_floating(field.type)
+            ]
+
+        query = build_aggregate_query(
+            model_table,
+            timestamp_column,
+            bucket_ms,
+            columns,
+            aggs,
+            start_time=from_date,
+            end_time=to_date,
+        )
+        try:
+            generator = self._execute_query(query, columnar=True)
+            return self._create_timeseries([generator], columns=generator[0])
+        except (ValueError, ProgrammingError) as error:
+            if not fallback or not self._is_unsupported_query(error):
+                raise
+            LOGGER.warning(
+                f"Server-side aggregation failed, aggregating on the client: {error}"
+            )
+
+        raw_ts = self.create_time_series(
+            model_table,
+            from_date=from_date,
+            to_date=to_date,
+            columnar=True,
+            columns=[timestamp_column] + list(columns),
+        )
+        raw_df = raw_ts.fetch_all(fetch_type="pandas")
+        if raw_df is None:
+            raw_df = pd.DataFrame(columns=[timestamp_column] + list(columns))
+        raw_df[timestamp_column] = pd.to_datetime(raw_df[timestamp_column])
+        grouped_df = raw_df.groupby(
+            pd.Grouper(key=timestamp_column, freq=bucket_width, origin="epoch")
+        )
+        agg_df = grouped_df[list(columns)].agg([PANDAS_AGGREGATES[agg] for agg in aggs])
+        agg_df.columns = [column + "_" + agg for column in columns for agg in aggs]
+        # Drop empty buckets, the server only returns buckets with data points.
+        agg_df = agg_df[grouped_df.size() > 0].reset_index()
+
+        agg_table = pyarrow.Table.from_pandas(agg_df, preserve_index=False)
+        generator = (
+            agg_table.column_names,
+            ArrowBatchStream(agg_table.to_batches(), agg_table.schema),
+        )
+        return self._create_timeseries([generator], columns=generator[0])
+
+    def tail(
+        self,
+        model_table: str,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        from_date: Union[str, None] = None,
+        columns: Union[List[str], None] = None,
+        timestamp_column: str = "datetime",
+        max_polls: Union[int, None] = None,
+        stop_event: Union[threading.Event, None] = None,
+    ) -> Iterator[pyarrow.RecordBatch]:
+        """Poll a model table for new data points and yield them as they come.
+
+        A high-water mark, the latest timestamp seen, is kept on the factory
+        per model table, columns and timestamp column, so every poll only
+        fetches the rows from the mark on and a later `tail` of the same
+        columns resumes where the previous one stopped. Rows on the mark that were already yielded are dropped.
+        Polls run over the pooled Arrow session of the source DB.
+
+        Args:
+            model_table (str): time series model_table.
+            poll_interval (float, optional): seconds between polls. Defaults
+                                             to DEFAULT_POLL_INTERVAL.
+            from_date (Union[str, None], optional): Start timestamp of the
+                                                    first poll if there is no
+                                                    high-water mark yet, all
+                                                    rows if None. Defaults to
+                                                    None.
+            columns (Union[List[str], None], optional): columns to fetch, all
+                                                        columns if None.
+                                                        Defaults to None.
+            timestamp_column (str, optional): column to track. Defaults to
+                                              "datetime".
+            max_polls (Union[int, None], optional): stop after this no. of
+                                                    polls. Defaults to None.
+            stop_event (Union[threading.Event, None], optional): stop once
+                                                                the event is
+                                                                set. Defaults
+                                                                to None.
+
+        Yields:
+            pyarrow.RecordBatch: new data points, ordered by timestamp.
+        """
+        assert isinstance(model_table, str), "Time Series model_table must be a str."
+        if columns and timestamp_column not in columns:
+            columns = [timestamp_column] + list(columns)
+
+        tail_key = (model_table, tuple(columns or ()), timestamp_column)
+        high_water_mark, boundary_rows = self._high_water_marks.get(
+            tail_key, (None, set())
+        )
+        if high_water_mark is None and from_date:
+            high_water_mark = to_milliseconds(from_date)
+
+        polls = 0
+        while not (stop_event and stop_event.is_set()):
+            query_params = {
+                "MODEL_TABLE": model_table,
+                "START_TIME_COLUMN": timestamp_column,
+                "END_TIME_COLUMN": timestamp_column,
+                "START_TIME": from_milliseconds(high_water_mark)
+                if high_water_mark is not None
+                else None,
+                "END_TIME": None,
+                "LIMIT": None,
+                "COLUMNS": columns,
+            }
+            ts_columns, result_set = self._execute_v2(query_params, columnar=True)
+            table = result_set.take(names=ts_columns)
+
+            if high_water_mark is not None and table.num_rows:
+                timestamps = self._to_milliseconds(table.column(timestamp_column))
+                on_mark = table.filter(pc.equal(timestamps, high_water_mark))
+                unseen = [
+                    index
+                    for index, row in enumerate(table_to_rows(on_mark))
+                    if row not in boundary_rows
+                ]
+                table = pyarrow.concat_tables(
+                    [
+                        on_mark.take(pyarrow.array(unseen, pyarrow.int64())),
+                        table.filter(pc.greater(timestamps, high_water_mark)),
+                    ]
+                )
+            timestamps = self._to_milliseconds(table.column(timestamp_column))
+
+            if table.num_rows:
+                latest = pc.max(timestamps).as_py()
+                on_latest = set(
+                    table_to_rows(table.filter(pc.equal(timestamps, latest)))
+                )
+                if latest == high_water_mark:
+                    boundary_rows |= on_latest
+                else:
+                    high_water_mark, boundary_rows = latest, on_latest
+                self._high_water_marks[tail_key] = (high_water_mark, boundary_rows)
+                LOGGER.debug(f"{table.num_rows} new row(s) in {model_table}.")
+                yield from table.sort_by(timestamp_column).to_batches()
+
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                break
+            if stop_event:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+
+    @staticmethod
+    def _to_milliseconds(column: pyarrow.ChunkedArray) -> pyarrow.ChunkedArray:
+        """Convert a timestamp column to milliseconds since epoch."""
+        return column.cast(pyarrow.timestamp("ms")).cast(pyarrow.int64())
 
     def create_time_series_from_ts_ids(
         self,
@@ -322,6 +1363,9 @@ class TimeseriesFactory:
         merge_on: str = TIMESTAMP_LABEL,
         value_column_labels: Union[List[str], None] = None,
         limit: Union[int, None] = None,
+        columnar: bool = False,
+        max_workers: Union[int, None] = None,
+        batch_query: bool = False,
     ) -> Timeseries:
         """Fetch time-series data points for time series ids in `ts_ids`.
 
@@ -337,6 +1381,19 @@ class TimeseriesFactory:
             string to replace value column labels. Defaults to None.
             limit (Union[int, None], optional): No of data points to fetch.
                                                 Defaults to None.
+            columnar (bool, optional): keep the result set as Arrow record
+                                       batches from the Flight stream to the
+                                       accessor. Defaults to False.
+            max_workers (Union[int, None], optional): no. of time series ids
+                                                      to query concurrently.
+                                                      Defaults to None.
+            batch_query (bool, optional): fetch all the time series ids with
+                                          a single `TID IN (...)` query. The
+                                          result set is split by TID, so the
+                                          time series are labelled and merged
+                                          as with one query per id. Cannot be
+                                          combined with a limit. Defaults to
+                                          False.
 
         Returns:
             Timeseries: A time-series placeholder class containing time series.
@@ -348,6 +1405,10 @@ class TimeseriesFactory:
         assert isinstance(ts_ids, list) and all(
             isinstance(ts_id, int) for ts_id in ts_ids
         ), "Time Series Id (ts_ids) must be a list of int."
+        if batch_query and limit is not None:
+            raise ValueError(
+                "A limit per time series id cannot be used with batch_query."
+            )
 
         if value_column_labels is not None:
             assert len(ts_ids) == len(
@@ -360,7 +1421,28 @@ class TimeseriesFactory:
                 "Pass the argument as None to use default column label."
             )
 
-        result_generators = []
+        if batch_query:
+            query_params = {
+                "SCHEMA": "DataPoint",
+                "TS_IDS": ts_ids,
+                "START_TIME_COLUMN": "TIMESTAMP",
+                "END_TIME_COLUMN": "TIMESTAMP",
+                "START_TIME": from_date,
+                "END_TIME": to_date,
+                "LIMIT": limit,
+            }
+            value_column_labels = value_column_labels or [
+                DEFAULT_VALUE_LABEL + "_" + str(ts_id) for ts_id in ts_ids
+            ]
+            result_generators = self._split_by_ts_id(
+                self._execute(query_params, columnar=True),
+                ts_ids,
+                value_column_labels,
+                columnar=columnar,
+            )
+            return self._create_timeseries(result_generators, merge_on=merge_on)
+
+        query_args = []
         for index, ts_id in enumerate(ts_ids):
             query_params = {
                 "SCHEMA": "DataPoint",
@@ -377,10 +1459,12 @@ class TimeseriesFactory:
             else:
                 value_column_label = DEFAULT_VALUE_LABEL + "_" + str(ts_id)
 
-            generator = self._execute(query_params, value_column_label)
-            result_generators.append(generator)
+            query_args.append((query_params, value_column_label))
 
-        return Timeseries(result_generators, merge_on)
+        result_generators = self._execute_all(
+            query_args, columnar=columnar, max_workers=max_workers
+        )
+        return self._create_timeseries(result_generators, merge_on=merge_on)
 
     def create_time_series_data_models_from_ts_ids(
         self,
@@ -388,6 +1472,10 @@ class TimeseriesFactory:
         from_date: Union[str, None] = None,
         to_date: Union[str, None] = None,
         limit: Union[int, None] = None,
+        columnar: bool = False,
+        max_workers: Union[int, None] = None,
+        batch_query: bool = False,
+        overlapping: bool = False,
     ) -> Timeseries:
         """Fetch time-series data models for the given time series `ts_ids`.
 
@@ -399,6 +1487,24 @@ class TimeseriesFactory:
                                                   Defaults to None.
             limit (Union[int, None], optional): No of data points to fetch.
                                                 Defaults to None.
+            columnar (bool, optional): keep the result set as Arrow record
+                                       batches from the Flight stream to the
+                                       accessor. Defaults to False.
+            max_workers (Union[int, None], optional): no. of time series ids
+                                                      to query concurrently.
+                                                      Defaults to None.
+            batch_query (bool, optional): fetch all the time series ids with
+                                          a single `TID IN (...)` query. The
+                                          result set is split by TID, so the
+                                          data models are returned as with
+                                          one query per id. Cannot be
+                                          combined with a limit. Defaults to
+                                          False.
+            overlapping (bool, optional): fetch the segments overlapping the
+                                          window, i.e. END_TIME >= from_date
+                                          and START_TIME <= to_date, instead
+                                          of the segments contained in it.
+                                          Defaults to False.
 
         Returns:
             Timeseries: A time-series placeholder class containing time series.
@@ -410,64 +1516,270 @@ class TimeseriesFactory:
         assert isinstance(ts_ids, list) and all(
             isinstance(ts_id, int) for ts_id in ts_ids
         ), "Time Series Id (ts_ids) must be a list of int."
+        if batch_query and limit is not None:
+            raise ValueError(
+                "A limit per time series id cannot be used with batch_query."
+            )
 
-        result_generators = []
+        # A segment overlaps the window when it ends after its start and
+        # starts before its end.
+        start_time_column, end_time_column = (
+            ("END_TIME", "START_TIME") if overlapping else ("START_TIME", "END_TIME")
+        )
+
+        if batch_query:
+            query_params = {
+                "SCHEMA": "Segment",
+                "TS_IDS": ts_ids,
+                "START_TIME_COLUMN": start_time_column,
+                "END_TIME_COLUMN": end_time_column,
+                "START_TIME": from_date,
+                "END_TIME": to_date,
+                "LIMIT": limit,
+            }
+            return self._create_timeseries(
+                self._split_by_ts_id(
+                    self._execute(query_params, columnar=True),
+                    ts_ids,
+                    columnar=columnar,
+                )
+            )
+
+        query_args = []
         for ts_id in ts_ids:
             query_params = {
                 "SCHEMA": "Segment",
                 "TS_ID": ts_id,
-                "START_TIME_COLUMN": "START_TIME",
-                "END_TIME_COLUMN": "END_TIME",
+                "START_TIME_COLUMN": start_time_column,
+                "END_TIME_COLUMN": end_time_column,
                 "START_TIME": from_date,
                 "END_TIME": to_date,
                 "LIMIT": limit,
             }
-            generator = self._execute(query_params)
-            result_generators.append(generator)
+            query_args.append((query_params, None))
 
-        return Timeseries(result_generators)
+        result_generators = self._execute_all(
+            query_args, columnar=columnar, max_workers=max_workers
+        )
+        return self._create_timeseries(result_generators)
+
+    def create_time_series_from_data_models(
+        self,
+        ts_ids: List[int],
+        sampling_interval: Union[int, Dict[int, int]],
+        from_date: Union[str, None] = None,
+        to_date: Union[str, None] = None,
+        model_types: Dict[int, str] = DEFAULT_MODEL_TYPES,
+        max_workers: Union[int, None] = None,
+    ) -> Timeseries:
+        """Fetch time-series data models and reconstruct the data points locally.
+
+        Only the segments overlapping the requested window are transferred
+        and expanded into data points, instead of the decompressed data points.
+
+        Args:
+            ts_ids (List[int]): time series id(s).
+            sampling_interval (Union[int, Dict[int, int]]): sampling interval
+                              in milliseconds, for all or per time series id.
+            from_date (Union[str, None], optional): Start timestamp.
+                                                    Defaults to None.
+            to_date (Union[str, None], optional): End timestamp.
+                                                  Defaults to None.
+            model_types (Dict[int, str], optional): names of the model type
+                                                    ids. Defaults to
+                                                    DEFAULT_MODEL_TYPES.
+            max_workers (Union[int, None], optional): no. of time series ids
+                                                      to query concurrently.
+                                                      Defaults to None.
+
+        Returns:
+            Timeseries: A time-series placeholder class containing the data
+                        points with the columns TID, TIMESTAMP and VALUE.
+
+        Raises:
+            ValueError: if any param is not a valid argument.
+        """
+        ts_data_models = self.create_time_series_data_models_from_ts_ids(
+            ts_ids,
+            from_date=from_date,
+            to_date=to_date,
+            columnar=True,
+            max_workers=max_workers,
+            overlapping=True,
+        )
+        decoder = SegmentDecoder(sampling_interval, model_types=model_types)
 
-    def store_time_series(self, df: pd.DataFrame, namespace: str = None) -> uuid1:
+        result_generators = []
+        for ts_columns, ts_data_gen in ts_data_models._result_generators:
+            segments = ts_data_gen.take(names=ts_columns)
+            data_points = decoder.decode(segments, from_date=from_date, to_date=to_date)
+            result_generators.append(
+                (
+                    data_points.column_names,
+                    ArrowBatchStream(data_points.to_batches(), data_points.schema),
+                )
+            )
+
+        return self._create_timeseries(result_generators)
+
+    def store_time_series(
+        self,
+        df: pd.DataFrame,
+        namespace: str = None,
+        concurrency: int = cassandradb.DEFAULT_CONCURRENCY,
+        batch_size: Union[int, None] = None,
+        bucket: Literal[None, "day", "hour"] = None,
+    ) -> uuid1:
         """Store time series data into Cassandra cluster.
 
+        A long time series is best stored with a `bucket`, which splits it into
+        one partition per day or hour so no single partition grows unbounded.
+
         Args:
             df (pd.DataFrame): Input DataFrame
             namespace (str, optional): Namespace to insert the table to. Defaults to None.
+            concurrency (int, optional): no. of concurrent insert requests.
+                                         Defaults to DEFAULT_CONCURRENCY.
+            batch_size (Union[int, None], optional): no. of rows per UNLOGGED
+                                                     batch within a partition.
+                                                     Defaults to None.
+            bucket (Literal[None, "day", "hour"], optional): time bucket of the
+                                                             partitions. Defaults
+                                                             to None.
 
         Returns:
             uuid1: The uuid1 time-series id.
         """
-        ts_entity = cassandradb.create_Timeseries_entity(df)
-        with self.sink_db_conn.create_session() as session:
-            rows = session._execute(
-                "SELECT table_name FROM system_schema.tables WHERE keyspace_name='"
-                + ts_entity.__keyspace__
-                + "';"
-            )
-            tables = [row["table_name"] for row in rows.all()]
-            if not ts_entity.__table_name__ in tables:
-                session.create_schema(ts_entity)
-            time_series_id = session.insert(df, ts_entity)
+        return self.sink_db_conn.store(
+            df, namespace, bucket=bucket, batch_size=batch_size, concurrency=concurrency
+        )
+
+    def load_time_series(
+        self,
+        time_series_id: Union[uuid1, str],
+        from_date: Union[str, None] = None,
+        to_date: Union[str, None] = None,
+        columns: Union[List[str], None] = None,
+        namespace: str = None,
+        max_workers: int = cassandradb.DEFAULT_READ_WORKERS,
+        bucket: Literal[None, "day", "hour"] = None,
+    ) -> Timeseries:
+        """Load time series data stored with store_time_series.
 
-        return time_series_id
+        Args:
+            time_series_id (Union[uuid1, str]): The uuid1 time-series id.
+            from_date (Union[str, None], optional): Start timestamp.
+                                                    Defaults to None.
+            to_date (Union[str, None], optional): End timestamp.
+                                                  Defaults to None.
+            columns (Union[List[str], None], optional): columns to load, all
+                                                        columns if None.
+                                                        Defaults to None.
+            namespace (str, optional): Namespace of the table. Defaults to None.
+            max_workers (int, optional): no. of time ranges to read
+                                         concurrently. Defaults to
+                                         DEFAULT_READ_WORKERS.
+            bucket (Literal[None, "day", "hour"], optional): time bucket the
+                                                             time series was stored
+                                                             with. Defaults to None.
+
+        Returns:
+            Timeseries: A time-series placeholder class containing time series.
+        """
+        table = self.sink_db_conn.load(
+            time_series_id,
+            from_date,
+            to_date,
+            columns=columns,
+            keyspace=namespace,
+            max_workers=max_workers,
+            bucket=bucket,
+        )
+        generator = (
+            table.column_names,
+            ArrowBatchStream(table.to_batches(), table.schema),
+        )
+        return self._create_timeseries([generator], columns=generator[0])
 
 
 class ModelTable:
-    def __init__(self, modelardb_conn: ModelarDB, arrow_table) -> None:
+    """[summary]
+    A table of time series data to persist into a ModelarDB model table. The
+    data is either an in-memory Arrow table or a Parquet dataset that is
+    streamed from disk batch by batch when the model table is persisted.
+
+    Args:
+        modelardb_conn (ModelarDB): ModelarDB connection object
+        arrow_table (Union[pyarrow.Table, None]): pyarrow table format
+        source (Union[dataset.Dataset, None], optional): Parquet dataset to
+                                                         stream. Defaults to
+                                                         None.
+        filter (Union[dataset.Expression, None], optional): predicate pushed
+                                                            down into the
+                                                            dataset scan.
+                                                            Defaults to None.
+        max_batch_size (int, optional): maximum no. of rows per record batch
+                                        written to ModelarDB. Defaults to
+                                        DEFAULT_MAX_BATCH_SIZE.
+    """
+
+    def __init__(
+        self,
+        modelardb_conn: ModelarDB,
+        arrow_table: Union[pyarrow.Table, None],
+        source: Union[dataset.Dataset, None] = None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        filter: Union[dataset.Expression, None] = None,
+    ) -> None:
         self.modelardb_conn = modelardb_conn
         self.arrow_table = arrow_table
+        self.source = source
+        self.filter = filter
+        self.max_batch_size = max_batch_size
+        self._fragments = None
+        if arrow_table is not None:
+            self.schema = arrow_table.schema
+            self._cast_plan = None
+        else:
+            # Partition columns, e.g. turbine=T1 or date=2022-01-01, are tags.
+            self._cast_plan = SchemaCastPlan(
+                source.schema, tag_columns=self._partition_columns(source)
+            )
+            self.schema = self._cast_plan.target_schema
+
+    @staticmethod
+    def _partition_columns(source: dataset.Dataset) -> List[str]:
+        """Return the columns of a dataset that come from its partitioning.
+
+        The partitioning discovered for a single file reports all the columns
+        of the file, so only the columns missing from the files are taken.
+        """
+        partitioning = getattr(source, "partitioning", None)
+        if partitioning is None:
+            return []
+        fragment = next(iter(source.get_fragments()), None)
+        file_columns = set(fragment.physical_schema.names) if fragment else set()
+        return [name for name in partitioning.schema.names if name not in file_columns]
 
     @classmethod
     def from_parquet_file(
         cls,
         modelardb_conn: ModelarDB,
         file_path: str,
+        streaming: bool = False,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
     ):
         """Returns an instance of the ModelTable from the parquet file.
 
         Args:
             modelardb_conn (ModelarDB): ModelarDB connection object
             file_path (str): parquet file path
+            streaming (bool, optional): stream the file batch by batch on
+                                        persist instead of reading it into
+                                        memory. Defaults to False.
+            max_batch_size (int, optional): maximum no. of rows per record
+                                            batch. Defaults to
+                                            DEFAULT_MAX_BATCH_SIZE.
 
         Returns:
             ModelTable: Returns an instance of the ModelTable from the parquet file.
@@ -476,25 +1788,36 @@ class ModelTable:
             ValueError: if any param is not a valid argument.
         """
 
+        if streaming:
+            # Open Apache Parquet file or folder without reading it.
+            source = dataset.dataset(file_path, format="parquet", partitioning="hive")
+            return ModelTable(
+                modelardb_conn, None, source=source, max_batch_size=max_batch_size
+            )
+
         # Read Apache Parquet file or folder.
         arrow_table = parquet.read_table(file_path)
 
         # Ensure the schema only uses supported features.
         arrow_table = cls.validate_schema_fields(arrow_table)
 
-        return ModelTable(modelardb_conn, arrow_table)
+        return ModelTable(modelardb_conn, arrow_table, max_batch_size=max_batch_size)
 
     @classmethod
     def from_arrow_table(
         cls,
         modelardb_conn: ModelarDB,
         arrow_table: pyarrow.Table,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
     ):
         """Returns an instance of the ModelTable from the arrow table.
 
         Args:
             modelardb_conn (ModelarDB): ModelarDB connection object
             arrow_table (pyarrow.Table): pyarrow table format
+            max_batch_size (int, optional): maximum no. of rows per record
+                                            batch. Defaults to
+                                            DEFAULT_MAX_BATCH_SIZE.
 
         Returns:
             ModelTable: Returns an instance of the ModelTable from the arrow_table.
@@ -506,23 +1829,231 @@ class ModelTable:
         # Ensure the schema only uses supported features.
         arrow_table = cls.validate_schema_fields(arrow_table)
 
-        return ModelTable(modelardb_conn, arrow_table)
+        return ModelTable(modelardb_conn, arrow_table, max_batch_size=max_batch_size)
+
+    @classmethod
+    def from_dataset(
+        cls,
+        modelardb_conn: ModelarDB,
+        source: Union[str, List[str]],
+        filter: Union[dataset.Expression, None] = None,
+        timestamp_column: Union[str, None] = None,
+        from_date: Union[str, None] = None,
+        to_date: Union[str, None] = None,
+        partitioning: Union[str, None] = "hive",
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ):
+        """Returns an instance of the ModelTable from a Parquet dataset.
+
+        The files of the dataset are discovered from a folder, or given as a
+        list of paths, and are only read when the model table is persisted.
+
+        Args:
+            modelardb_conn (ModelarDB): ModelarDB connection object
+            source (Union[str, List[str]]): dataset folder or list of files
+            filter (Union[dataset.Expression, None], optional): predicate on
+                   the partition or data columns pushed down into the scan.
+                   Defaults to None.
+            timestamp_column (Union[str, None], optional): column to filter
+                                                           on from_date and
+                                                           to_date. Defaults
+                                                           to None.
+            from_date (Union[str, None], optional): Start timestamp.
+                                                    Defaults to None.
+            to_date (Union[str, None], optional): End timestamp.
+                                                  Defaults to None.
+            partitioning (Union[str, None], optional): partitioning scheme of
+                                                       the folder. Defaults to
+                                                       "hive".
+            max_batch_size (int, optional): maximum no. of rows per record
+                                            batch. Defaults to
+                                            DEFAULT_MAX_BATCH_SIZE.
+
+        Returns:
+            ModelTable: Returns an instance of the ModelTable from the dataset.
+
+        Raises:
+            ValueError: if any param is not a valid argument.
+        """
+        if (from_date or to_date) and not timestamp_column:
+            raise ValueError("timestamp_column is required to filter on dates.")
+
+        source = dataset.dataset(source, format="parquet", partitioning=partitioning)
+        if from_date:
+            predicate = dataset.field(timestamp_column) >= pd.Timestamp(from_date)
+            filter = predicate if filter is None else filter & predicate
+        if to_date:
+            predicate = dataset.field(timestamp_column) <= pd.Timestamp(to_date)
+            filter = predicate if filter is None else filter & predicate
+
+        return ModelTable(
+            modelardb_conn,
+            None,
+            source=source,
+            max_batch_size=max_batch_size,
+            filter=filter,
+        )
+
+    @property
+    def files(self) -> List[str]:
+        """Return the files of the dataset that match the filter.
+
+        Returns:
+            List[str]: file paths, empty for an in-memory table.
+        """
+        if self.source is None:
+            return []
+        return list(self._fragments_by_path())
+
+    def _fragments_by_path(self) -> dict:
+        """Return the fragments of the dataset that match the filter by path."""
+        if self._fragments is None:
+            self._fragments = {
+                fragment.path: fragment
+                for fragment in self.source.get_fragments(filter=self.filter)
+            }
+        return self._fragments
+
+    def iter_batches(self, file_path: Union[str, None] = None):
+        """Iterate the record batches to persist, at most max_batch_size rows each.
+
+        Args:
+            file_path (Union[str, None], optional): iterate a single file of
+                                                    the dataset. Defaults to
+                                                    None.
+
+        Yields:
+            pyarrow.RecordBatch: record batch with a ModelarDB compatible schema.
+        """
+        if self.arrow_table is not None:
+            yield from self.arrow_table.to_batches(max_chunksize=self.max_batch_size)
+            return
+
+        if file_path is None:
+            record_batches = self.source.to_batches(
+                filter=self.filter, batch_size=self.max_batch_size
+            )
+        else:
+            fragment = self._fragments_by_path()[file_path]
+            record_batches = fragment.to_batches(
+                schema=self.source.schema,
+                filter=self.filter,
+                batch_size=self.max_batch_size,
+            )
+
+        for record_batch in record_batches:
+            if record_batch.num_rows:
+                yield self._cast_plan.apply(record_batch)
 
     def persist(
         self,
         table_name: str,
         error_bound: float,
+        max_workers: int = 1,
+        retries: int = 0,
+        checkpoint_path: Union[str, None] = None,
+        progress_callback: Union[Callable, None] = None,
     ):
-        if not table_name in self.modelardb_conn.list_tables():
+        """Persist the data into the ModelarDB model table `table_name`.
+
+        The model table is created first if it does not exist. An in-memory
+        table is streamed through a single do_put. A dataset is persisted
+        file by file over `max_workers` concurrent do_put streams when
+        `max_workers` is greater than 1 or a `checkpoint_path` is given.
+
+        Args:
+            table_name (str): name of the model table.
+            error_bound (float): error bound of the FIELD columns.
+            max_workers (int, optional): no. of concurrent do_put streams.
+                                         Defaults to 1.
+            retries (int, optional): no. of times a failed file is persisted
+                                     again. The whole file is re-sent, so a
+                                     retried file may be inserted partially
+                                     twice. Defaults to 0.
+            checkpoint_path (Union[str, None], optional): JSON file recording
+                                                          the persisted files
+                                                          to resume from.
+                                                          Defaults to None.
+            progress_callback (Union[Callable, None], optional): called with
+                   (file_path, num_rows, completed_files, total_files) after
+                   every persisted file. Defaults to None.
+        """
+        if not self.modelardb_conn.has_table(table_name):
             # insert model table schema
-            self.create_model_table(table_name, self.arrow_table.schema, error_bound)
+            self.create_model_table(table_name, self.schema, error_bound)
 
-        # insert parquet file data
-        with self.modelardb_conn.create_arrow_session(conn_type="edge") as session:
-            session.insert(table_name, self.arrow_table)
+        if self.source is not None and (max_workers > 1 or checkpoint_path):
+            self._persist_files(
+                table_name, max_workers, retries, checkpoint_path, progress_callback
+            )
+        else:
+            # stream the data batch by batch into a single do_put
+            with self.modelardb_conn.create_arrow_session(conn_type="edge") as session:
+                session.insert_batches(table_name, self.schema, self.iter_batches())
 
         LOGGER_mt.info(f"Data inserted successfully into the table '{table_name}'.")
 
+    def _persist_files(
+        self,
+        table_name: str,
+        max_workers: int,
+        retries: int,
+        checkpoint_path: Union[str, None],
+        progress_callback: Union[Callable, None],
+    ):
+        """Persist the dataset file by file over concurrent do_put streams."""
+        checkpoint = IngestCheckpoint(checkpoint_path)
+        file_paths = self.files
+        pending_paths = checkpoint.pending(file_paths)
+        if len(pending_paths) < len(file_paths):
+            LOGGER_mt.info(
+                f"Resuming from checkpoint, {len(file_paths) - len(pending_paths)} "
+                f"of {len(file_paths)} files already persisted."
+            )
+
+        def persist_file(file_path):
+            for attempt in range(retries + 1):
+                num_rows = 0
+
+                def count_rows(record_batches):
+                    nonlocal num_rows
+                    for record_batch in record_batches:
+                        num_rows += record_batch.num_rows
+                        yield record_batch
+
+                try:
+                    with self.modelardb_conn.create_arrow_session(
+                        conn_type="edge"
+                    ) as session:
+                        session.insert_batches(
+                            table_name,
+                            self.schema,
+                            count_rows(self.iter_batches(file_path)),
+                        )
+                    break
+                except Exception as error:
+                    if attempt == retries:
+                        raise
+                    LOGGER_mt.warning(
+                        f"Failed to persist '{file_path}' (attempt {attempt + 1}), "
+                        f"retrying: {error}"
+                    )
+                    time.sleep(2**attempt)
+
+            checkpoint.complete(file_path)
+            LOGGER_mt.info(
+                f"Persisted {num_rows} rows from '{file_path}' "
+                f"({len(checkpoint)}/{len(file_paths)} files)."
+            )
+            if progress_callback:
+                progress_callback(file_path, num_rows, len(checkpoint), len(file_paths))
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="moreutils-ingest"
+        ) as executor:
+            for _ in executor.map(persist_file, pending_paths):
+                ...
+
     def create_model_table(self, table_name, schema, error_bound):
         columns = []
         for field in schema:
@@ -539,32 +2070,29 @@ class ModelTable:
 
         with self.modelardb_conn.create_arrow_session(conn_type="manager") as session:
             session.execute_action("CommandStatementUpdate", str.encode(sql))
+        self.modelardb_conn.register_table(table_name, schema)
 
         LOGGER_mt.info(f"Model Table '{table_name}' created.")
 
     # Ensure the schema only uses supported features.
     @classmethod
-    def validate_schema_fields(cls, arrow_table):
-        columns = []
-        column_names = []
-        for field in arrow_table.schema:
-            # Ensure that none of the field names contain whitespace.
-            safe_name = field.name.replace(" ", "_")
-            column_names.append(safe_name)
-
-            # Ensure all fields are float32 as float64 are not supported.
-            if field.type == pyarrow.float64():
-                columns.append((safe_name, pyarrow.float32()))
-            elif field.type == pyarrow.int64():
-                columns.append((safe_name, pyarrow.float32()))
-            elif field.type == pyarrow.timestamp("us"):
-                columns.append((field.name, pyarrow.timestamp("ms")))
-            else:
-                columns.append((safe_name, field.type))
-
-        safe_schema = pyarrow.schema(columns)
+    def validate_schema_fields(
+        cls,
+        arrow_table: pyarrow.Table,
+        cast_plan: Union[SchemaCastPlan, None] = None,
+    ):
+        """Rename and cast the table to a ModelarDB compatible schema.
 
-        # Rename columns to remove whitespaces and cast them to remove float64.
-        arrow_table = arrow_table.rename_columns(column_names)
+        Args:
+            arrow_table (pyarrow.Table): pyarrow table format
+            cast_plan (Union[SchemaCastPlan, None], optional): cast plan
+                      computed from the schema of the table, to reuse it
+                      across tables. Defaults to None.
 
-        return arrow_table.cast(safe_schema)
+        Returns:
+            pyarrow.Table: the table itself if it is already compatible,
+                           otherwise the renamed and cast table.
+        """
+        if cast_plan is None:
+            cast_plan = SchemaCastPlan(arrow_table.schema)
+        return cast_plan.apply(arrow_table)
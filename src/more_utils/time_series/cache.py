@@ -0,0 +1,371 @@
+"""
+Cache utils to keep time series query results on local disk and decoded
+batches in memory.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Tuple, Union
+from uuid import uuid4
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.ipc
+from more_utils.logging import configure_logger
+
+LOGGER = configure_logger(logger_name="ResultCache")
+INDEX_FILE_NAME = "index.json"
+DEFAULT_MAX_BYTES = 1024**3
+
+
+def to_milliseconds(timestamp: Union[str, pd.Timestamp]) -> int:
+    """Convert a timestamp to milliseconds since epoch."""
+    return int(pd.Timestamp(timestamp).value // 1_000_000)
+
+
+def from_milliseconds(milliseconds: int) -> str:
+    """Convert milliseconds since epoch to a timestamp string for a query."""
+    return pd.Timestamp(milliseconds, unit="ms").isoformat(sep=" ")
+
+
+class ResultCache:
+    """[summary]
+    An on-disk cache of time series query results. Results are stored as
+    Arrow IPC files keyed by the queried table or time series id and the
+    fetched columns, together with the time range they cover. A lookup
+    returns the cached data of a time range plus the sub-ranges that are not
+    cached, so only those have to be fetched from the database. Files are
+    evicted in least recently used order once the cache exceeds `max_bytes`.
+    Time ranges reaching the current time or the future are not cached, as
+    their data may still change.
+
+    The cache is safe to share between threads, but not between processes.
+
+    Args:
+        directory (str): directory of the cache files.
+        max_bytes (int, optional): size limit of the cache files in bytes.
+                                   Defaults to DEFAULT_MAX_BYTES.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, INDEX_FILE_NAME)
+        self._entries = {}
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r") as index_file:
+                self._entries = json.load(index_file)
+
+    @property
+    def size(self) -> int:
+        """Return the total size of the cache files in bytes."""
+        with self._lock:
+            return sum(
+                entry["size"] for entries in self._entries.values() for entry in entries
+            )
+
+    @staticmethod
+    def create_key(*parts) -> str:
+        """Create a cache key from the parts identifying a query result.
+
+        Args:
+            *parts: e.g. table or time series id and the fetched columns.
+
+        Returns:
+            str: cache key.
+        """
+        return hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+
+    def lookup(
+        self, key: str, start: int, end: int
+    ) -> Tuple[List[Tuple[int, int, pyarrow.Table]], List[Tuple[int, int]]]:
+        """Look up the cached data of the time range [start, end].
+
+        The cache files are read outside the lock, so concurrent lookups do
+        not wait on each other's disk reads.
+
+        Args:
+            key (str): cache key.
+            start (int): start of the time range in milliseconds.
+            end (int): end of the time range in milliseconds, inclusive.
+
+        Returns:
+            Tuple[List[Tuple[int, int, pyarrow.Table]], List[Tuple[int, int]]]:
+            cached parts overlapping the time range as (start, end, table),
+            and the inclusive sub-ranges that are not cached.
+        """
+        with self._lock:
+            entries = sorted(
+                (
+                    entry
+                    for entry in self._entries.get(key, [])
+                    if entry["start"] <= end and entry["end"] >= start
+                ),
+                key=lambda entry: entry["start"],
+            )
+
+        parts = []
+        unreadable = []
+        for entry in entries:
+            try:
+                parts.append((entry["start"], entry["end"], self._read(entry["path"])))
+            except (OSError, pyarrow.ArrowInvalid):
+                unreadable.append(entry)
+
+        missing = []
+        covered_until = start - 1
+        for part_start, part_end, _ in parts:
+            if part_start > covered_until + 1:
+                missing.append((covered_until + 1, part_start - 1))
+            covered_until = max(covered_until, part_end)
+        if covered_until < end:
+            missing.append((covered_until + 1, end))
+
+        with self._lock:
+            for entry in unreadable:
+                LOGGER.warning(f"Dropping unreadable cache file {entry['path']}.")
+                self._remove(key, entry)
+            now = time.time()
+            for entry in entries:
+                entry["last_access"] = now
+            self._save_index()
+        return parts, missing
+
+    def store(self, key: str, start: int, end: int, table: pyarrow.Table) -> bool:
+        """Store the data of the time range [start, end].
+
+        A time range ending at or after the current time is not stored.
+
+        Args:
+            key (str): cache key.
+            start (int): start of the time range in milliseconds.
+            end (int): end of the time range in milliseconds, inclusive.
+            table (pyarrow.Table): data of the time range.
+
+        Returns:
+            bool: True if the data was stored.
+        """
+        if end >= to_milliseconds(pd.Timestamp.now(tz="UTC")):
+            LOGGER.debug("Not caching a time range reaching the current time.")
+            return False
+
+        path = os.path.join(self.directory, key + "_" + uuid4().hex + ".arrow")
+        with pyarrow.OSFile(path, "wb") as sink:
+            with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        with self._lock:
+            self._entries.setdefault(key, []).append(
+                {
+                    "start": start,
+                    "end": end,
+                    "path": path,
+                    "size": os.path.getsize(path),
+                    "last_access": time.time(),
+                }
+            )
+            self._evict()
+            self._save_index()
+        return True
+
+    def clear(self):
+        """Remove all the cache files."""
+        with self._lock:
+            for key, entries in list(self._entries.items()):
+                for entry in list(entries):
+                    self._remove(key, entry)
+            self._save_index()
+
+    @staticmethod
+    def _read(path: str) -> pyarrow.Table:
+        with pyarrow.memory_map(path, "r") as source:
+            return pyarrow.ipc.open_file(source).read_all()
+
+    def _evict(self):
+        """Remove least recently used files until the cache fits max_bytes."""
+        entries = sorted(
+            (
+                (entry["last_access"], key, entry)
+                for key, entries in self._entries.items()
+                for entry in entries
+            ),
+            key=lambda item: item[0],
+        )
+        size = sum(entry["size"] for _, _, entry in entries)
+        for _, key, entry in entries:
+            if size <= self.max_bytes:
+                break
+            size -= entry["size"]
+            self._remove(key, entry)
+
+    def _remove(self, key: str, entry: dict):
+        # The entry may have been removed since it was looked up.
+        if entry not in self._entries.get(key, []):
+            return
+        self._entries[key].remove(entry)
+        if not self._entries[key]:
+            del self._entries[key]
+        try:
+            os.remove(entry["path"])
+        except FileNotFoundError:
+            pass
+
+    def _save_index(self):
+        temp_path = self._index_path + ".tmp"
+        with open(temp_path, "w") as index_file:
+            json.dump(self._entries, index_file)
+        os.replace(temp_path, self._index_path)
+
+
+def combine_time_ranges(
+    parts: List[Tuple[int, int, pyarrow.Table]],
+    timestamp_column: str,
+    start: int,
+    end: int,
+) -> pyarrow.Table:
+    """Combine cached and fetched parts into one sorted table of [start, end].
+
+    Only the rows of a part falling in the time range of an earlier part are
+    dropped, rows sharing a timestamp within a part, e.g. of several time
+    series or tags, are all kept.
+
+    Args:
+        parts (List[Tuple[int, int, pyarrow.Table]]): tables with the
+                                                     inclusive time range
+                                                     they cover.
+        timestamp_column (str): timestamp column of the tables.
+        start (int): start of the time range in milliseconds.
+        end (int): end of the time range in milliseconds, inclusive.
+
+    Returns:
+        pyarrow.Table: rows of [start, end] sorted on the timestamp column.
+    """
+    parts = sorted(parts, key=lambda part: part[0])
+    schema = parts[0][2].schema
+    tables = []
+    covered_until = start - 1
+    for part_start, part_end, table in parts:
+        if table.schema != schema:
+            table = table.cast(schema)
+        timestamps = (
+            table.column(timestamp_column)
+            .cast(pyarrow.timestamp("ms"))
+            .cast(pyarrow.int64())
+            .to_numpy()
+        )
+        keep = (timestamps > covered_until) & (timestamps <= end)
+        tables.append(table.filter(pyarrow.array(keep)))
+        covered_until = max(covered_until, part_end)
+
+    table = pyarrow.concat_tables(tables)
+    timestamps = (
+        table.column(timestamp_column)
+        .cast(pyarrow.timestamp("ms"))
+        .cast(pyarrow.int64())
+        .to_numpy()
+    )
+    return table.take(pyarrow.array(np.argsort(timestamps, kind="stable")))
+
+
+class BatchCache:
+    """[summary]
+    An in-memory cache of decoded time series batches with a byte budget.
+    Batches are stored as Arrow tables per time series and evicted in least
+    recently used order once their total size exceeds `max_bytes`. A cache
+    can be shared by all the time series of a TimeseriesFactory.
+
+    Args:
+        max_bytes (int, optional): size limit of the cached batches in bytes.
+                                   Defaults to DEFAULT_MAX_BYTES.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._batches = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._batches)
+
+    def __contains__(self, key: Tuple[str, int]) -> bool:
+        with self._lock:
+            return key in self._batches
+
+    @property
+    def stats(self) -> dict:
+        """Return the hit, miss and eviction counts and the cached bytes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "batches": len(self._batches),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def get(self, key: Tuple[str, int]) -> Union[pyarrow.Table, None]:
+        """Return a cached batch or None if it is not cached.
+
+        Args:
+            key (Tuple[str, int]): time series key and batch no.
+
+        Returns:
+            Union[pyarrow.Table, None]: cached batch.
+        """
+        with self._lock:
+            batch = self._batches.get(key)
+            if batch is None:
+                self.misses += 1
+                return None
+            self._batches.move_to_end(key)
+            self.hits += 1
+            return batch
+
+    def put(self, key: Tuple[str, int], batch: pyarrow.Table):
+        """Cache a batch, evicting least recently used batches if needed.
+
+        Batches larger than the budget are not cached.
+
+        Args:
+            key (Tuple[str, int]): time series key and batch no.
+            batch (pyarrow.Table): decoded batch.
+        """
+        with self._lock:
+            if key in self._batches:
+                self._bytes -= self._batches.pop(key).nbytes
+            if batch.nbytes > self.max_bytes:
+                self.evictions += 1
+                return
+            self._batches[key] = batch
+            self._bytes += batch.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._batches.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def discard(self, series_key: str):
+        """Remove all the cached batches of a time series.
+
+        Args:
+            series_key (str): time series key.
+        """
+        with self._lock:
+            for key in [key for key in self._batches if key[0] == series_key]:
+                self._bytes -= self._batches.pop(key).nbytes
+
+    def clear(self):
+        """Remove all the cached batches."""
+        with self._lock:
+            self._batches.clear()
+            self._bytes = 0
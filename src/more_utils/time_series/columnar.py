@@ -0,0 +1,289 @@
+"""
+Columnar util to keep time series results as Arrow record batches.
+"""
+
+from typing import Iterable, Iterator, List, Union
+import pyarrow
+import pyarrow.compute as pc
+
+
+class ArrowBatchStream:
+    """[summary]
+    A single-use stream of `pyarrow.RecordBatch` objects, e.g. the record
+    batches of a Flight stream. The stream re-chunks the incoming record
+    batches into tables of the requested number of rows without copying the
+    underlying buffers.
+
+    Args:
+        record_batches (Iterable[pyarrow.RecordBatch]): source record batches.
+        schema (Union[pyarrow.Schema, None], optional): schema of the record
+                                                        batches. Defaults to
+                                                        None.
+    """
+
+    def __init__(
+        self,
+        record_batches: Iterable[pyarrow.RecordBatch],
+        schema: Union[pyarrow.Schema, None] = None,
+    ) -> None:
+        self._record_batches = iter(record_batches)
+        self._schema = schema
+        self._pending = None
+
+    @property
+    def schema(self) -> Union[pyarrow.Schema, None]:
+        """Return the schema of the stream, if already known.
+
+        Returns:
+            Union[pyarrow.Schema, None]: schema of the record batches.
+        """
+        return self._schema
+
+    def __iter__(self) -> Iterator[pyarrow.RecordBatch]:
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            yield pending
+        for record_batch in self._record_batches:
+            if self._schema is None:
+                self._schema = record_batch.schema
+            yield record_batch
+
+    def take(
+        self,
+        num_rows: Union[int, None] = None,
+        names: Union[List[str], None] = None,
+        max_bytes: Union[int, None] = None,
+    ) -> pyarrow.Table:
+        """Take the next `num_rows` rows, or about `max_bytes` bytes, from
+        the stream.
+
+        Args:
+            num_rows (Union[int, None], optional): no. of rows to take. Takes
+                                                   the rest of the stream if
+                                                   None. Defaults to None.
+            names (Union[List[str], None], optional): column labels of the
+                                                      returned table. Defaults
+                                                      to None.
+            max_bytes (Union[int, None], optional): size in bytes to take,
+                                                    instead of `num_rows`.
+                                                    The last record batch is
+                                                    sliced on its average row
+                                                    size and at least one row
+                                                    is taken. Defaults to
+                                                    None.
+
+        Returns:
+            pyarrow.Table: table with at most `num_rows` rows.
+        """
+        record_batches = []
+        remaining = num_rows
+        remaining_bytes = max_bytes
+        for record_batch in self:
+            if remaining_bytes is not None:
+                row_size = max(record_batch.nbytes / max(record_batch.num_rows, 1), 1)
+                remaining = int(remaining_bytes // row_size)
+                if not record_batches:
+                    remaining = max(remaining, 1)
+                elif remaining <= 0:
+                    self._pending = record_batch
+                    break
+            if remaining is not None and record_batch.num_rows > remaining:
+                self._pending = record_batch.slice(remaining)
+                record_batch = record_batch.slice(0, remaining)
+            record_batches.append(record_batch)
+            if remaining_bytes is not None:
+                remaining_bytes -= record_batch.nbytes
+                if remaining_bytes <= 0:
+                    break
+            elif remaining is not None:
+                remaining -= record_batch.num_rows
+                if remaining <= 0:
+                    break
+
+        if record_batches:
+            table = pyarrow.Table.from_batches(record_batches)
+        elif self._schema is not None:
+            table = self._schema.empty_table()
+        else:
+            table = pyarrow.table({})
+
+        if names and table.num_columns == len(names):
+            table = table.rename_columns(names)
+        return table
+
+
+def _column_to_array(values: Iterable) -> pyarrow.Array:
+    """Create an Arrow array, stringifying the values of a mixed-type column."""
+    try:
+        return pyarrow.array(values)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        return pyarrow.array(
+            [None if value is None else str(value) for value in values],
+            type=pyarrow.string(),
+        )
+
+
+def rows_to_table(columns: List[str], data: List[tuple]) -> pyarrow.Table:
+    """Create an Arrow table from a list of time series tuples.
+
+    A column holding values of different types, which Arrow cannot infer a
+    type for, is converted to strings.
+
+    Args:
+        columns (List[str]): List of column labels
+        data (List[tuple]): List of time series tuples
+
+    Returns:
+        pyarrow.Table: time series in Arrow table
+    """
+    if isinstance(data, tuple):
+        data = [data]
+    if not data:
+        return pyarrow.Table.from_arrays(
+            [pyarrow.array([], type=pyarrow.null()) for _ in columns], names=columns
+        )
+    arrays = [_column_to_array(values) for values in zip(*data)]
+    return pyarrow.Table.from_arrays(arrays, names=list(columns))
+
+
+def concat_chunks(tables: List[pyarrow.Table]) -> pyarrow.Table:
+    """Concatenate tables built from chunks of the same result set.
+
+    The types of the chunks are inferred independently, e.g. a chunk with
+    only nulls has null columns, so the chunks are cast to their unified
+    schema first. Columns with conflicting types across chunks, e.g. a
+    mixed-type column stringified in some chunks only, are converted to
+    strings.
+
+    Args:
+        tables (List[pyarrow.Table]): chunks in order.
+
+    Returns:
+        pyarrow.Table: concatenated table.
+    """
+    try:
+        schema = pyarrow.unify_schemas([table.schema for table in tables])
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        field_types = {}
+        for table in tables:
+            for field in table.schema:
+                if field.type != pyarrow.null():
+                    field_types.setdefault(field.name, set()).add(field.type)
+        conflicting = {name for name, types in field_types.items() if len(types) > 1}
+        tables = [_stringify_columns(table, conflicting) for table in tables]
+        schema = pyarrow.unify_schemas([table.schema for table in tables])
+    return pyarrow.concat_tables(
+        [table if table.schema == schema else table.cast(schema) for table in tables]
+    )
+
+
+def _stringify_columns(table: pyarrow.Table, names: set) -> pyarrow.Table:
+    for index, name in enumerate(table.column_names):
+        if name in names:
+            column = pc.cast(table.column(index), pyarrow.string())
+            table = table.set_column(index, name, column)
+    return table
+
+
+def table_to_rows(table: pyarrow.Table) -> List[tuple]:
+    """Create a list of time series tuples from an Arrow table.
+
+    Args:
+        table (pyarrow.Table): time series in Arrow table
+
+    Returns:
+        List[tuple]: List of time series tuples
+    """
+    return list(zip(*[column.to_pylist() for column in table.columns]))
+
+
+def merge_tables(
+    tables: List[pyarrow.Table],
+    merge_on: str,
+    drop_columns: Union[List[str], None] = None,
+) -> pyarrow.Table:
+    """Align multiple time series tables on the common `merge_on` field.
+
+    The merge keys of all tables are merged into one sorted key column in a
+    single pass and every table is aligned to it with a vectorized lookup,
+    i.e. an outer join of all tables at once. Keys must be unique within each
+    table, as is the case for the timestamps of a single time series. The
+    columns of empty tables are kept as null columns, so the merged table has
+    the same columns whichever tables have rows.
+
+    Args:
+        tables (List[pyarrow.Table]): time series tables to merge.
+        merge_on (str): common field to merge the tables.
+        drop_columns (Union[List[str], None], optional): columns to leave out
+                                                         of the merged table.
+                                                         Defaults to None.
+
+    Returns:
+        pyarrow.Table: merged time series sorted on `merge_on`.
+
+    Raises:
+        ValueError: if a table has duplicate `merge_on` keys.
+    """
+    drop_columns = set(drop_columns or [])
+    if not any(table.num_rows for table in tables):
+        return pyarrow.table({})
+
+    keys = [table.column(merge_on).combine_chunks() for table in tables]
+    key_type = next(key.type for key in keys if key.type != pyarrow.null())
+    keys = [key if key.type == key_type else key.cast(key_type) for key in keys]
+    for key in keys:
+        if len(pc.unique(key)) != len(key):
+            raise ValueError(
+                f"Duplicate {merge_on} keys, time series with repeated keys "
+                "cannot be merged. Pass merge_on=None to stack them instead."
+            )
+    merged_keys = pc.unique(pyarrow.concat_arrays(keys))
+    merged_keys = merged_keys.take(pc.sort_indices(merged_keys))
+
+    names = [merge_on]
+    arrays = [merged_keys]
+    for table, key in zip(tables, keys):
+        indices = pc.index_in(merged_keys, value_set=key)
+        for name, column in zip(table.column_names, table.columns):
+            if name == merge_on or name in drop_columns:
+                continue
+            names.append(name)
+            arrays.append(column.take(indices))
+
+    return pyarrow.Table.from_arrays(arrays, names=names)
+
+
+def stack_tables(tables: List[pyarrow.Table]) -> pyarrow.Table:
+    """Stack multiple time series tables vertically on axis = 0.
+
+    Columns missing from a table are filled with nulls, so tables with
+    different value columns are stacked in a single pass.
+
+    Args:
+        tables (List[pyarrow.Table]): time series tables to stack.
+
+    Returns:
+        pyarrow.Table: stacked time series.
+    """
+    fields = {}
+    for table in tables:
+        for field in table.schema:
+            if fields.get(field.name, pyarrow.null()) == pyarrow.null():
+                fields[field.name] = field.type
+
+    aligned_tables = []
+    for table in tables:
+        arrays = []
+        for name, data_type in fields.items():
+            if name in table.column_names:
+                column = table.column(name)
+                arrays.append(
+                    column if column.type == data_type else column.cast(data_type)
+                )
+            else:
+                arrays.append(pyarrow.nulls(table.num_rows, type=data_type))
+        aligned_tables.append(
+            pyarrow.Table.from_arrays(arrays, names=list(fields.keys()))
+        )
+
+    return pyarrow.concat_tables(aligned_tables)
@@ -0,0 +1,54 @@
+"""
+Ingest util to keep track of the files persisted into a model table.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Iterable, Union
+
+
+class IngestCheckpoint:
+    """[summary]
+    A resume checkpoint for a multi-file ingestion. The paths of the files
+    that have been persisted completely are stored in a JSON file, which is
+    rewritten atomically after every file, so a crashed ingestion restarts
+    with the files that were not persisted yet.
+
+    Args:
+        checkpoint_path (Union[str, None]): location of the checkpoint file.
+                                            The checkpoint is kept in memory
+                                            only if None.
+    """
+
+    def __init__(self, checkpoint_path: Union[str, None]) -> None:
+        self.checkpoint_path = checkpoint_path
+        self._lock = threading.Lock()
+        self._completed = set()
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r") as checkpoint_file:
+                self._completed = set(json.load(checkpoint_file)["completed"])
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self._completed
+
+    def __len__(self) -> int:
+        return len(self._completed)
+
+    def pending(self, file_paths: Iterable[str]):
+        """Return the file paths that have not been persisted yet."""
+        return [file_path for file_path in file_paths if file_path not in self]
+
+    def complete(self, file_path: str):
+        """Mark the file as persisted and save the checkpoint."""
+        with self._lock:
+            self._completed.add(file_path)
+            if not self.checkpoint_path:
+                return
+            directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+            with tempfile.NamedTemporaryFile(
+                "w", dir=directory, delete=False, suffix=".tmp"
+            ) as checkpoint_file:
+                json.dump({"completed": sorted(self._completed)}, checkpoint_file)
+            os.replace(checkpoint_file.name, self.checkpoint_path)
@@ -2,75 +2,343 @@
 Query util to perform all query related operations.
 """
 
-from string import Template
-from typing import Dict, Union
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple, Union
 
 SPACE = " "
 AND_OPERATOR = "AND"
 WHERE = "WHERE"
-SELECT = "SELECT * FROM $SCHEMA WHERE TID = $TS_ID"
-SELECT_v2 = "SELECT * FROM $MODEL_TABLE"
-FROM_TIMESTAMP = "$START_TIME_COLUMN >= '$START_TIME'"
-TO_TIMESTAMP = "$END_TIME_COLUMN <= '$END_TIME'"
-LIMIT = "LIMIT $LIMIT"
+SELECT = "SELECT {columns} FROM {table}"
+TID_EQUALS = "TID = {ts_id}"
+TID_IN = "TID IN ({ts_ids})"
+FROM_TIMESTAMP = "{start_time_column} >= {{start_time}}"
+TO_TIMESTAMP = "{end_time_column} <= {{end_time}}"
+TO_TIMESTAMP_EXCLUSIVE = "{end_time_column} < {{end_time}}"
+LIMIT = "LIMIT {limit}"
+TIME_BUCKET = (
+    "DATE_BIN(INTERVAL '{bucket_ms} milliseconds', {timestamp_column}, "
+    "TIMESTAMP '1970-01-01T00:00:00')"
+)
+GROUP_BY_BUCKET = "GROUP BY 1 ORDER BY 1"
+QUERY_CACHE_SIZE = 256
+SQL_AGGREGATES = {
+    "avg": "AVG",
+    "min": "MIN",
+    "max": "MAX",
+    "sum": "SUM",
+    "count": "COUNT",
+    "median": "MEDIAN",
+    "stddev": "STDDEV",
+}
+AGGREGATE_ALIASES = {"mean": "avg"}
 
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
-def safe_substitute(query_params: Dict[str, Union[str, int]]):
-    """safely substitue query_params into the query string.
+
+def quote_identifier(identifier: str) -> str:
+    """Quote a table or column name if it is not a plain identifier.
 
     Args:
-        query_params (Dict[str, Union[str, int]]): params to
-                                                   create a query.
+        identifier (str): table or column name.
 
     Returns:
-        [str]: A complete query string with placeholder values.
+        str: identifier safe to use in a query.
+    """
+    if identifier == "*" or _IDENTIFIER.match(identifier):
+        return identifier
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def quote_literal(value: Union[str, int, float, datetime]) -> str:
+    """Render a value as a SQL literal.
 
+    Args:
+        value (Union[str, int, float, datetime]): value to render.
+
+    Returns:
+        str: literal safe to use in a query.
     """
-    query = SELECT + SPACE
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, datetime):
+        value = value.isoformat(sep=" ")
+    return "'" + str(value).replace("'", "''") + "'"
 
-    if query_params["START_TIME"]:
-        query += AND_OPERATOR + SPACE + FROM_TIMESTAMP + SPACE
 
-    if query_params["END_TIME"]:
-        query += AND_OPERATOR + SPACE + TO_TIMESTAMP + SPACE
+def normalize_aggregates(aggs: Sequence[str]) -> List[str]:
+    """Resolve aggregate aliases and drop repeated aggregates, keeping the order.
 
-    if query_params["LIMIT"] is None:
-        query_params["LIMIT"] = "NULL"
+    Args:
+        aggs (Sequence[str]): aggregates, see SQL_AGGREGATES and AGGREGATE_ALIASES.
 
-    query += LIMIT
+    Returns:
+        List[str]: unique aggregate names.
 
-    return Template(query).safe_substitute(query_params)
+    Raises:
+        ValueError: if an aggregate is not supported.
+    """
+    unsupported = [
+        agg for agg in aggs if AGGREGATE_ALIASES.get(agg, agg) not in SQL_AGGREGATES
+    ]
+    if unsupported:
+        raise ValueError(f"Unsupported aggregate(s): {unsupported}")
+    return list(dict.fromkeys(AGGREGATE_ALIASES.get(agg, agg) for agg in aggs))
 
 
-def safe_substitute_v2(query_params: Dict[str, Union[str, int]]):
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(
+    table: str,
+    columns: Union[Tuple[str, ...], None] = None,
+    ts_id_filter: Union[str, None] = None,
+    start_time_column: Union[str, None] = None,
+    end_time_column: Union[str, None] = None,
+    end_inclusive: bool = True,
+    has_limit: bool = False,
+    projection: Union[str, None] = None,
+) -> str:
+    """Compile the shape of a query into a format string.
+
+    The compiled shape only depends on the table and the set of filters, so
+    it is cached and reused for every query with the same shape.
+
+    Args:
+        table (str): table to query.
+        columns (Union[Tuple[str, ...], None], optional): columns to project.
+                                                          Defaults to None.
+        ts_id_filter (Union[str, None], optional): "equals" or "in" to filter
+                                                   on TID. Defaults to None.
+        start_time_column (Union[str, None], optional): column filtered on
+                                                        the start time.
+                                                        Defaults to None.
+        end_time_column (Union[str, None], optional): column filtered on the
+                                                      end time. Defaults to
+                                                      None.
+        end_inclusive (bool, optional): include the end time. Defaults to
+                                        True.
+        has_limit (bool, optional): limit the no. of rows. Defaults to False.
+        projection (Union[str, None], optional): rendered SELECT list used
+                                                 instead of `columns`.
+                                                 Defaults to None.
+
+    Returns:
+        str: format string of the query.
+    """
+
+    def escape(text):
+        # Escape braces, only the value placeholders remain in the shape.
+        return text.replace("{", "{{").replace("}", "}}")
+
+    def identifier(name):
+        return escape(quote_identifier(name))
+
+    if projection is None:
+        projection = ", ".join(identifier(column) for column in columns or ("*",))
+    else:
+        projection = escape(projection)
+    query = SELECT.format(columns=projection, table=identifier(table))
+
+    predicates = []
+    if ts_id_filter == "equals":
+        predicates.append(TID_EQUALS)
+    elif ts_id_filter == "in":
+        predicates.append(TID_IN)
+    if start_time_column:
+        predicates.append(
+            FROM_TIMESTAMP.format(start_time_column=identifier(start_time_column))
+        )
+    if end_time_column:
+        end_predicate = TO_TIMESTAMP if end_inclusive else TO_TIMESTAMP_EXCLUSIVE
+        predicates.append(
+            end_predicate.format(end_time_column=identifier(end_time_column))
+        )
+    if predicates:
+        query += SPACE + WHERE + SPACE + (SPACE + AND_OPERATOR + SPACE).join(predicates)
+
+    if has_limit:
+        query += SPACE + LIMIT
+
+    return query
+
+
+def build_query(
+    table: str,
+    columns: Union[Sequence[str], None] = None,
+    ts_ids: Union[int, Sequence[int], None] = None,
+    start_time_column: Union[str, None] = None,
+    start_time: Union[str, datetime, None] = None,
+    end_time_column: Union[str, None] = None,
+    end_time: Union[str, datetime, None] = None,
+    end_inclusive: bool = True,
+    limit: Union[int, None] = None,
+    projection: Union[str, None] = None,
+) -> str:
+    """Build a query from its compiled shape and the given values.
+
+    Args:
+        table (str): table to query.
+        columns (Union[Sequence[str], None], optional): columns to project,
+                                                        all columns if None.
+                                                        Defaults to None.
+        ts_ids (Union[int, Sequence[int], None], optional): time series
+                                                            id(s) to select.
+                                                            Defaults to None.
+        start_time_column (Union[str, None], optional): column filtered on
+                                                        start_time. Defaults
+                                                        to None.
+        start_time (Union[str, datetime, None], optional): Start timestamp.
+                                                           Defaults to None.
+        end_time_column (Union[str, None], optional): column filtered on
+                                                      end_time. Defaults to
+                                                      None.
+        end_time (Union[str, datetime, None], optional): End timestamp.
+                                                         Defaults to None.
+        end_inclusive (bool, optional): include end_time. Defaults to True.
+        limit (Union[int, None], optional): No of rows to fetch. Defaults to
+                                            None.
+        projection (Union[str, None], optional): rendered SELECT list of
+                                                 expressions, e.g. aggregates,
+                                                 instead of `columns`.
+                                                 Defaults to None.
+
+    Returns:
+        [str]: A complete query string.
+
+    Raises:
+        ValueError: if ts_ids is an empty sequence.
+    """
+    if ts_ids is None:
+        ts_id_filter = None
+    elif isinstance(ts_ids, int):
+        ts_id_filter = "equals"
+    elif len(ts_ids) == 0:
+        raise ValueError("ts_ids must not be empty.")
+    else:
+        ts_id_filter = "in"
+
+    query = compile_query(
+        table,
+        tuple(columns) if columns else None,
+        ts_id_filter,
+        start_time_column if start_time else None,
+        end_time_column if end_time else None,
+        end_inclusive,
+        limit is not None,
+        projection,
+    )
+    return query.format(
+        ts_id=int(ts_ids) if ts_id_filter == "equals" else "",
+        ts_ids=", ".join(str(int(ts_id)) for ts_id in ts_ids)
+        if ts_id_filter == "in"
+        else "",
+        start_time=quote_literal(start_time) if start_time else "",
+        end_time=quote_literal(end_time) if end_time else "",
+        limit=int(limit) if limit is not None else "",
+    )
+
+
+def build_aggregate_query(
+    table: str,
+    timestamp_column: str,
+    bucket_ms: int,
+    columns: Sequence[str],
+    aggs: Sequence[str],
+    start_time: Union[str, datetime, None] = None,
+    end_time: Union[str, datetime, None] = None,
+) -> str:
+    """Build a query that aggregates columns per time bucket on the server.
+
+    Args:
+        table (str): table to query.
+        timestamp_column (str): column to bucket on.
+        bucket_ms (int): width of a time bucket in milliseconds.
+        columns (Sequence[str]): columns to aggregate.
+        aggs (Sequence[str]): aggregates per column, see SQL_AGGREGATES.
+                              Aliases are resolved and repeated aggregates
+                              are dropped, see normalize_aggregates.
+        start_time (Union[str, datetime, None], optional): Start timestamp.
+                                                           Defaults to None.
+        end_time (Union[str, datetime, None], optional): End timestamp.
+                                                         Defaults to None.
+
+    Returns:
+        [str]: A complete query string. The aggregates are labeled
+               "<column>_<agg>".
+
+    Raises:
+        ValueError: if an aggregate is not supported.
+    """
+    aggs = normalize_aggregates(aggs)
+    time_bucket = TIME_BUCKET.format(
+        bucket_ms=int(bucket_ms), timestamp_column=quote_identifier(timestamp_column)
+    )
+    projection = [time_bucket + " AS " + quote_identifier(timestamp_column)]
+    for column in columns:
+        for agg in aggs:
+            projection.append(
+                SQL_AGGREGATES[agg]
+                + "("
+                + quote_identifier(column)
+                + ") AS "
+                + quote_identifier(column + "_" + agg)
+            )
+
+    query = build_query(
+        table,
+        start_time_column=timestamp_column,
+        start_time=start_time,
+        end_time_column=timestamp_column,
+        end_time=end_time,
+        projection=", ".join(projection),
+    )
+    return query + SPACE + GROUP_BY_BUCKET
+
+
+def safe_substitute(query_params: Dict[str, Union[str, int, List[int]]]):
     """safely substitue query_params into the query string.
 
     Args:
-        query_params (Dict[str, Union[str, int]]): params to
-                                                   create a query.
+        query_params (Dict[str, Union[str, int, List[int]]]): params to
+                                                              create a query.
 
     Returns:
         [str]: A complete query string with placeholder values.
 
     """
-    query = SELECT_v2 + SPACE
-
-    # if any(key in query_params for key in ["START_TIME","END_TIME"]):
-    #     query += WHERE + SPACE + AND_OPERATOR + SPACE
+    return build_query(
+        table=query_params["SCHEMA"],
+        columns=query_params.get("COLUMNS"),
+        ts_ids=query_params.get("TS_IDS", query_params.get("TS_ID")),
+        start_time_column=query_params["START_TIME_COLUMN"],
+        start_time=query_params["START_TIME"],
+        end_time_column=query_params["END_TIME_COLUMN"],
+        end_time=query_params["END_TIME"],
+        end_inclusive=query_params.get("END_INCLUSIVE", True),
+        limit=query_params["LIMIT"],
+    )
 
-    if query_params["START_TIME"]:
-        query += WHERE + SPACE + FROM_TIMESTAMP + SPACE
 
-    if query_params["END_TIME"]:
-        if query_params["START_TIME"]:
-            query += AND_OPERATOR + SPACE
-        else:
-            query += WHERE + SPACE
-        query += TO_TIMESTAMP + SPACE
+def safe_substitute_v2(query_params: Dict[str, Union[str, int]]):
+    """safely substitue query_params into the query string.
 
-    if query_params["LIMIT"] is None:
-        query_params["LIMIT"] = "NULL"
+    Args:
+        query_params (Dict[str, Union[str, int]]): params to
+                                                   create a query.
 
-    query += LIMIT
+    Returns:
+        [str]: A complete query string with placeholder values.
 
-    return Template(query).safe_substitute(query_params)
+    """
+    return build_query(
+        table=query_params["MODEL_TABLE"],
+        columns=query_params.get("COLUMNS"),
+        start_time_column=query_params["START_TIME_COLUMN"],
+        start_time=query_params["START_TIME"],
+        end_time_column=query_params["END_TIME_COLUMN"],
+        end_time=query_params["END_TIME"],
+        end_inclusive=query_params.get("END_INCLUSIVE", True),
+        limit=query_params["LIMIT"],
+    )
@@ -0,0 +1,128 @@
+"""
+Schema util to make Arrow data compatible with ModelarDB model tables.
+"""
+
+from typing import List, Union
+import pyarrow
+import pyarrow.compute as pc
+
+MODELARDB_TIMESTAMP_TYPE = pyarrow.timestamp("ms")
+MODELARDB_FIELD_TYPE = pyarrow.float32()
+MODELARDB_TAG_TYPE = pyarrow.string()
+
+
+class SchemaCastPlan:
+    """[summary]
+    A cast plan from an Arrow schema to a ModelarDB compatible schema. The
+    plan is computed once from the source schema and then applied to every
+    table or record batch with that schema, e.g. every batch of a stream.
+
+    Column names with whitespace are renamed, timestamps of any unit are
+    cast to timestamp[ms], integers and floats are cast to float32 fields and
+    (dictionary encoded) strings are cast to string tags. Columns in
+    `tag_columns`, e.g. the partition columns of a hive partitioned dataset,
+    are cast to string tags whatever their type. The nullability of the
+    source fields is kept. Only the columns whose type changes are cast,
+    and data that already has the target schema is returned as is.
+
+    Args:
+        schema (pyarrow.Schema): schema of the source data.
+        tag_columns (Union[List[str], None], optional): columns to cast to
+                                                        tags. Defaults to None.
+    """
+
+    def __init__(
+        self, schema: pyarrow.Schema, tag_columns: Union[List[str], None] = None
+    ) -> None:
+        tag_columns = set(tag_columns or [])
+        self.source_schema = schema
+        self.target_schema = pyarrow.schema(
+            [
+                pyarrow.field(
+                    field.name.replace(" ", "_"),
+                    MODELARDB_TAG_TYPE
+                    if field.name in tag_columns
+                    else self.target_type(field.type),
+                    nullable=field.nullable,
+                )
+                for field in schema
+            ]
+        )
+        self._cast_columns = [
+            index
+            for index, (source_field, target_field) in enumerate(
+                zip(schema, self.target_schema)
+            )
+            if source_field.type != target_field.type
+        ]
+        self._rename_columns = schema.names != self.target_schema.names
+
+    @property
+    def is_noop(self) -> bool:
+        """Return True if the source schema is already ModelarDB compatible."""
+        return not self._cast_columns and not self._rename_columns
+
+    @staticmethod
+    def target_type(data_type: pyarrow.DataType) -> pyarrow.DataType:
+        """Return the ModelarDB compatible type of an Arrow type.
+
+        Args:
+            data_type (pyarrow.DataType): source type.
+
+        Returns:
+            pyarrow.DataType: ModelarDB compatible type.
+        """
+        if pyarrow.types.is_timestamp(data_type):
+            return MODELARDB_TIMESTAMP_TYPE
+        if pyarrow.types.is_integer(data_type) or pyarrow.types.is_floating(data_type):
+            return MODELARDB_FIELD_TYPE
+        if pyarrow.types.is_dictionary(data_type) and (
+            pyarrow.types.is_string(data_type.value_type)
+            or pyarrow.types.is_large_string(data_type.value_type)
+        ):
+            return MODELARDB_TAG_TYPE
+        if pyarrow.types.is_large_string(data_type):
+            return MODELARDB_TAG_TYPE
+        return data_type
+
+    def apply(
+        self, data: Union[pyarrow.Table, pyarrow.RecordBatch]
+    ) -> Union[pyarrow.Table, pyarrow.RecordBatch]:
+        """Apply the cast plan to a table or record batch.
+
+        Args:
+            data (Union[pyarrow.Table, pyarrow.RecordBatch]): data with the
+                                                              source schema.
+
+        Returns:
+            Union[pyarrow.Table, pyarrow.RecordBatch]: data with the target
+                                                       schema.
+        """
+        if self.is_noop:
+            return data
+
+        columns = list(data.columns)
+        for index in self._cast_columns:
+            columns[index] = self._cast(columns[index], self.target_schema[index].type)
+
+        if isinstance(data, pyarrow.RecordBatch):
+            return pyarrow.RecordBatch.from_arrays(columns, schema=self.target_schema)
+        return pyarrow.Table.from_arrays(columns, schema=self.target_schema)
+
+    @staticmethod
+    def _cast(column, data_type: pyarrow.DataType):
+        """Cast a column, decoding dictionary encoded columns first."""
+        if pyarrow.types.is_dictionary(column.type):
+            column = pc.cast(column, column.type.value_type)
+        if pyarrow.types.is_timestamp(column.type) and column.type.unit in ("us", "ns"):
+            # Truncate sub-millisecond precision instead of failing the cast.
+            return pc.cast(column, data_type, safe=False)
+        return pc.cast(column, data_type)
+
+    def __repr__(self) -> str:
+        changes: List[str] = [
+            f"{source.name}: {source.type} -> {target.name}: {target.type}"
+            for source, target in zip(self.source_schema, self.target_schema)
+            if source.name != target.name or source.type != target.type
+        ]
+        return "SchemaCastPlan(" + (", ".join(changes) or "no-op") + ")"
@@ -0,0 +1,238 @@
+"""
+Segment util to reconstruct data points from ModelarDB segments.
+"""
+
+from typing import Dict, Union
+import numpy as np
+import pandas as pd
+import pyarrow
+
+TID_LABEL = "TID"
+TIMESTAMP_LABEL = "TIMESTAMP"
+VALUE_LABEL = "VALUE"
+
+PMC_MEAN = "pmc_mean"
+SWING = "swing"
+GORILLA = "gorilla"
+
+# Model type ids of the JVM-based ModelarDB with its default model types.
+DEFAULT_MODEL_TYPES = {2: PMC_MEAN, 3: SWING, 4: GORILLA}
+
+
+class _BitReader:
+    """Read a big-endian bit stream one field at a time."""
+
+    def __init__(self, data: bytes) -> None:
+        self._value = int.from_bytes(data, "big")
+        self._remaining = len(data) * 8
+
+    def read(self, num_bits: int) -> int:
+        self._remaining -= num_bits
+        if self._remaining < 0:
+            raise ValueError("Gorilla model ended before all values were decoded.")
+        return (self._value >> self._remaining) & ((1 << num_bits) - 1)
+
+
+def decode_gorilla(model: bytes, num_values: int) -> np.ndarray:
+    """Decode the values of a Gorilla model.
+
+    The values are XOR compressed float32 values as described in the Gorilla
+    paper, with 5 bits for the no. of leading zeros and 6 bits for the no. of
+    meaningful bits. The bit stream is sequential, so it is decoded value by
+    value, but only for the segments that are requested.
+
+    Args:
+        model (bytes): model of the segment.
+        num_values (int): no. of values in the segment.
+
+    Returns:
+        np.ndarray: float32 values of the segment.
+    """
+    reader = _BitReader(model)
+    bits = np.empty(num_values, dtype=np.uint32)
+    previous = reader.read(32)
+    bits[0] = previous
+    leading_zeros = trailing_zeros = 0
+    for index in range(1, num_values):
+        if reader.read(1) == 0:
+            bits[index] = previous
+            continue
+        if reader.read(1) == 1:
+            leading_zeros = reader.read(5)
+            meaningful_bits = reader.read(6) or 32
+            trailing_zeros = 32 - leading_zeros - meaningful_bits
+        meaningful_bits = 32 - leading_zeros - trailing_zeros
+        previous ^= reader.read(meaningful_bits) << trailing_zeros
+        bits[index] = previous
+    return bits.view(np.float32)
+
+
+class SegmentDecoder:
+    """[summary]
+    Decoder that expands ModelarDB segments into data points on the client,
+    so only the compact models have to be transferred. PMC-Mean and Swing
+    segments are expanded for all segments at once with NumPy, Gorilla
+    segments are decoded one segment at a time.
+
+    A segment is expected to hold the values of a single time series with a
+    regular sampling interval, i.e. segments of time series groups with gaps
+    are not supported.
+
+    Args:
+        sampling_interval (Union[int, Dict[int, int]]): sampling interval in
+                          milliseconds, for all or per time series id.
+        model_types (Dict[int, str], optional): names of the model type ids.
+                                                Defaults to
+                                                DEFAULT_MODEL_TYPES.
+        byteorder (str, optional): byte order of the models. Defaults to ">".
+    """
+
+    def __init__(
+        self,
+        sampling_interval: Union[int, Dict[int, int]],
+        model_types: Dict[int, str] = DEFAULT_MODEL_TYPES,
+        byteorder: str = ">",
+    ) -> None:
+        self.sampling_interval = sampling_interval
+        self.model_types = model_types
+        self.byteorder = byteorder
+
+    def decode(
+        self,
+        segments: Union[pd.DataFrame, pyarrow.Table],
+        from_date: Union[str, None] = None,
+        to_date: Union[str, None] = None,
+    ) -> pyarrow.Table:
+        """Expand segments into data points.
+
+        Args:
+            segments (Union[pd.DataFrame, pyarrow.Table]): segments with the
+                     columns TID, START_TIME, END_TIME, MTID and MODEL.
+            from_date (Union[str, None], optional): Start timestamp of the
+                                                    data points to keep.
+                                                    Defaults to None.
+            to_date (Union[str, None], optional): End timestamp of the data
+                                                  points to keep. Defaults to
+                                                  None.
+
+        Returns:
+            pyarrow.Table: data points with the columns TID, TIMESTAMP and
+                           VALUE, ordered as the segments.
+
+        Raises:
+            ValueError: if a segment has an unknown model type.
+        """
+        if isinstance(segments, pyarrow.Table):
+            segments = segments.to_pandas()
+
+        if from_date or to_date:
+            start_times = pd.to_datetime(segments["START_TIME"])
+            end_times = pd.to_datetime(segments["END_TIME"])
+            overlapping = np.ones(len(segments), dtype=bool)
+            if from_date:
+                overlapping &= (end_times >= pd.Timestamp(from_date)).to_numpy()
+            if to_date:
+                overlapping &= (start_times <= pd.Timestamp(to_date)).to_numpy()
+            segments = segments[overlapping]
+
+        tids = segments["TID"].to_numpy(dtype=np.int64)
+        start_times = self._to_milliseconds(segments["START_TIME"])
+        end_times = self._to_milliseconds(segments["END_TIME"])
+        if isinstance(self.sampling_interval, dict):
+            sampling_intervals = np.array(
+                [self.sampling_interval[tid] for tid in tids], dtype=np.int64
+            )
+        else:
+            sampling_intervals = np.full(len(tids), self.sampling_interval, np.int64)
+
+        counts = (end_times - start_times) // sampling_intervals + 1
+        total = int(counts.sum())
+        first_index = np.cumsum(counts) - counts
+        positions = np.arange(total, dtype=np.int64) - np.repeat(first_index, counts)
+        timestamps = np.repeat(start_times, counts) + positions * np.repeat(
+            sampling_intervals, counts
+        )
+
+        values = np.empty(total, dtype=np.float32)
+        model_types = np.array(
+            [self.model_types.get(mtid) for mtid in segments["MTID"]], dtype=object
+        )
+        models = [self._to_bytes(model) for model in segments["MODEL"]]
+        unknown = [
+            mtid
+            for mtid, model_type in zip(segments["MTID"], model_types)
+            if model_type is None
+        ]
+        if unknown:
+            raise ValueError(f"Unknown model type id(s): {sorted(set(unknown))}")
+
+        point_model_types = np.repeat(model_types, counts)
+
+        pmc_mean = model_types == PMC_MEAN
+        if pmc_mean.any():
+            means = np.array(
+                [
+                    np.frombuffer(models[index], self.byteorder + "f4", count=1)[0]
+                    for index in np.flatnonzero(pmc_mean)
+                ],
+                dtype=np.float32,
+            )
+            values[point_model_types == PMC_MEAN] = np.repeat(means, counts[pmc_mean])
+
+        swing = model_types == SWING
+        if swing.any():
+            coefficients = np.array(
+                [
+                    self._swing_coefficients(models[index])
+                    for index in np.flatnonzero(swing)
+                ],
+                dtype=np.float64,
+            ).reshape(-1, 2)
+            swing_points = point_model_types == SWING
+            slopes = np.repeat(coefficients[:, 0], counts[swing])
+            intercepts = np.repeat(coefficients[:, 1], counts[swing])
+            values[swing_points] = (
+                slopes * timestamps[swing_points] + intercepts
+            ).astype(np.float32)
+
+        for index in np.flatnonzero(model_types == GORILLA):
+            start = first_index[index]
+            values[start : start + counts[index]] = decode_gorilla(
+                models[index], int(counts[index])
+            )
+
+        data_points = pyarrow.Table.from_arrays(
+            [
+                pyarrow.array(np.repeat(tids, counts)),
+                pyarrow.array(timestamps, type=pyarrow.timestamp("ms")),
+                pyarrow.array(values),
+            ],
+            names=[TID_LABEL, TIMESTAMP_LABEL, VALUE_LABEL],
+        )
+
+        if from_date or to_date:
+            keep = np.ones(total, dtype=bool)
+            if from_date:
+                keep &= timestamps >= self._to_milliseconds(pd.Series([from_date]))[0]
+            if to_date:
+                keep &= timestamps <= self._to_milliseconds(pd.Series([to_date]))[0]
+            data_points = data_points.filter(pyarrow.array(keep))
+        return data_points
+
+    def _swing_coefficients(self, model: bytes):
+        """Return the slope and intercept of a Swing model."""
+        dtype = self.byteorder + ("f8" if len(model) >= 16 else "f4")
+        return np.frombuffer(model, dtype, count=2)
+
+    @staticmethod
+    def _to_bytes(model) -> bytes:
+        if isinstance(model, str):
+            return model.encode("latin-1")
+        return bytes(model)
+
+    @staticmethod
+    def _to_milliseconds(timestamps: pd.Series) -> np.ndarray:
+        if pd.api.types.is_integer_dtype(timestamps):
+            return timestamps.to_numpy(dtype=np.int64)
+        timestamps = pd.to_datetime(timestamps).astype("datetime64[ms]")
+        return timestamps.to_numpy().astype(np.int64)
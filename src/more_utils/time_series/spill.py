@@ -0,0 +1,178 @@
+"""
+Spill util to keep large time series in memory-mapped Arrow IPC files.
+"""
+
+import os
+import tempfile
+from typing import Iterator, List, Union
+import pandas as pd
+import pyarrow
+import pyarrow.ipc
+from more_utils.logging import configure_logger
+from .columnar import concat_chunks
+
+LOGGER = configure_logger(logger_name="SpillBuffer")
+DEFAULT_SPILL_BATCH_SIZE = 65536
+
+
+class SpillBuffer:
+    """[summary]
+    A buffer of time series batches that moves to disk once it grows past
+    `memory_limit` bytes. Up to the limit, batches are kept in memory. Past
+    the limit, the buffered and all subsequent batches are written to an
+    Arrow IPC file, which is memory mapped when the buffer is read, so the
+    data is paged in by the OS instead of held in the Python heap.
+
+    The types of the batches are inferred independently, e.g. a batch with
+    only nulls has null columns. The batches are written with their unified
+    schema, and a batch widening it starts a new spill file.
+
+    Args:
+        memory_limit (int): size of the in-memory batches in bytes before
+                            spilling to disk.
+        spill_dir (Union[str, None], optional): directory of the spill file,
+                                                the system temp directory if
+                                                None. Defaults to None.
+    """
+
+    def __init__(self, memory_limit: int, spill_dir: Union[str, None] = None):
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self._tables: List[pyarrow.Table] = []
+        self._bytes = 0
+        self._paths: List[str] = []
+        self._sink = None
+        self._writer = None
+        self._writer_schema = None
+
+    @property
+    def spilled(self) -> bool:
+        """Return True if the buffer has been written to disk."""
+        return bool(self._paths)
+
+    def append(self, table: pyarrow.Table):
+        """Append a batch to the buffer.
+
+        Args:
+            table (pyarrow.Table): time series batch.
+        """
+        if self._writer is not None:
+            schema = pyarrow.unify_schemas([self._writer_schema, table.schema])
+            if schema != self._writer_schema:
+                self._open_writer(schema)
+            self._write(table)
+            return
+
+        self._tables.append(table)
+        self._bytes += table.nbytes
+        if self._bytes > self.memory_limit:
+            self._spill()
+
+    def _spill(self):
+        """Move the in-memory batches into a new spill file."""
+        LOGGER.debug(f"Spilling {self._bytes} bytes.")
+        self._open_writer(pyarrow.unify_schemas([t.schema for t in self._tables]))
+        for table in self._tables:
+            self._write(table)
+        self._tables = []
+        self._bytes = 0
+
+    def _open_writer(self, schema: pyarrow.Schema):
+        """Finish the current spill file and start a new one with `schema`."""
+        self._close_writer()
+        file_descriptor, path = tempfile.mkstemp(
+            suffix=".arrow", prefix="moreutils-ts-", dir=self.spill_dir
+        )
+        os.close(file_descriptor)
+        LOGGER.debug(f"Opening spill file {path}.")
+        self._paths.append(path)
+        self._writer_schema = schema
+        self._sink = pyarrow.OSFile(path, "wb")
+        self._writer = pyarrow.ipc.new_file(self._sink, schema)
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = None
+            self._sink = None
+
+    def _write(self, table: pyarrow.Table):
+        if table.schema != self._writer_schema:
+            table = table.cast(self._writer_schema)
+        self._writer.write_table(table)
+
+    def to_table(self) -> Union[pyarrow.Table, None]:
+        """Finish the buffer and return its batches as one table.
+
+        A spilled buffer is returned as a memory-mapped table. The spill files
+        are unlinked right after mapping them, the mappings stay valid until
+        the table is garbage collected.
+
+        Returns:
+            Union[pyarrow.Table, None]: buffered time series, None if empty.
+        """
+        if not self.spilled:
+            if not self._tables:
+                return None
+            return concat_chunks(self._tables)
+
+        self._close_writer()
+        tables = []
+        for path in self._paths:
+            source = pyarrow.memory_map(path, "r")
+            tables.append(pyarrow.ipc.open_file(source).read_all())
+            try:
+                os.remove(path)
+            except OSError:
+                # The file cannot be removed while mapped on some platforms.
+                LOGGER.warning(f"Could not remove spill file {path}.")
+        return tables[0] if len(tables) == 1 else concat_chunks(tables)
+
+
+class LazyFrame:
+    """[summary]
+    A pandas view of an Arrow table that converts only the rows or columns
+    that are accessed, so a memory-mapped time series is not materialised
+    as a whole.
+
+    Args:
+        table (pyarrow.Table): time series in Arrow table.
+    """
+
+    def __init__(self, table: pyarrow.Table) -> None:
+        self.table = table
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def columns(self) -> List[str]:
+        """Return column labels"""
+        return self.table.column_names
+
+    def __getitem__(self, column: str) -> pd.Series:
+        return self.table.column(column).to_pandas()
+
+    def head(self, num_rows: int = 5) -> pd.DataFrame:
+        """Return the first rows as a pandas dataframe."""
+        return self.table.slice(0, num_rows).to_pandas()
+
+    def iter_frames(
+        self, batch_size: int = DEFAULT_SPILL_BATCH_SIZE
+    ) -> Iterator[pd.DataFrame]:
+        """Iterate the time series as pandas dataframes of batch_size rows.
+
+        Args:
+            batch_size (int, optional): no. of rows per dataframe. Defaults to
+                                        DEFAULT_SPILL_BATCH_SIZE.
+
+        Yields:
+            pd.DataFrame: time series batch.
+        """
+        for offset in range(0, self.table.num_rows, batch_size):
+            yield self.table.slice(offset, batch_size).to_pandas()
+
+    def to_pandas(self) -> pd.DataFrame:
+        """Materialise the entire time series as a pandas dataframe."""
+        return self.table.to_pandas()
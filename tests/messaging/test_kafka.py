@@ -0,0 +1,306 @@
+"""Test class for Kafka producers and consumers"""
+
+import threading
+import time
+import pyarrow
+import pytest
+from confluent_kafka import KafkaError, KafkaException
+from confluent_kafka.serialization import SerializationError
+from google.protobuf.descriptor_pb2 import DescriptorProto
+from more_utils.messaging.kafka import (
+    QUEUE_FULL_POLL_TIMEOUT,
+    JSONDeserializer,
+    JSONSerializer,
+    KafkaConsumer,
+    KafkaConsumerGroup,
+    KafkaProducer,
+    ProtobufDeserializer,
+)
+
+
+def create_message(mocker, topic, value, partition=0, error=None):
+    message = mocker.MagicMock()
+    message.topic.return_value = topic
+    message.partition.return_value = partition
+    message.value.return_value = value
+    message.error.return_value = error
+    return message
+
+
+class TestKafkaProducer:
+    def test_produce_many_batches_and_retries_full_queue(self, mocker):
+        producer_class = mocker.patch("more_utils.messaging.kafka.Producer")
+        producer = producer_class.return_value
+        queued = []
+        full_queue = [False, True]
+
+        def produce_side_effect(topic, key, value, on_delivery, **kwargs):
+            # The local queue is full once, on the second record.
+            if len(queued) == 1 and full_queue.pop():
+                raise BufferError()
+            queued.append((value, on_delivery))
+
+        def deliver(timeout=None):
+            # Queued records are only delivered once the linger time passed.
+            if timeout == 0:
+                return len(queued)
+            while queued:
+                value, on_delivery = queued.pop(0)
+                err = mocker.MagicMock() if value == b'{"value": -1}' else None
+                on_delivery(err, mocker.MagicMock())
+            return 0
+
+        producer.produce.side_effect = produce_side_effect
+        producer.poll.side_effect = deliver
+        producer.flush.side_effect = deliver
+        producer.__len__.side_effect = lambda: len(queued)
+
+        kafka_producer = KafkaProducer(
+            "localhost",
+            9092,
+            {"wind": JSONSerializer()},
+            flush_each_message=False,
+            **{"linger.ms": 5},
+        )
+        assert producer_class.call_args[0][0] == {
+            "bootstrap.servers": "localhost:9092",
+            "linger.ms": 5,
+        }
+
+        records = [{"value": 1}, {"value": 2}, "invalid", {"value": -1}]
+        assert kafka_producer.produce_many(records, "wind") == 3
+        assert producer.produce.call_count == 4
+        producer.poll.assert_any_call(QUEUE_FULL_POLL_TIMEOUT)
+        producer.flush.assert_not_called()
+        assert kafka_producer.stats["produced"] == 3
+        assert kafka_producer.stats["delivered"] == 1
+        assert kafka_producer.stats["pending"] == 2
+
+        kafka_producer.close()
+        producer.flush.assert_called_once_with()
+        stats = kafka_producer.stats
+        assert (stats["produced"], stats["delivered"], stats["failed"]) == (3, 2, 1)
+        assert stats["pending"] == 0
+
+    def test_stats_rate_since_last_read(self, mocker):
+        producer = mocker.patch("more_utils.messaging.kafka.Producer").return_value
+        producer.__len__.return_value = 0
+        mocker.patch(
+            "more_utils.messaging.kafka.time.perf_counter", side_effect=[0.0, 2.0, 3.0]
+        )
+
+        kafka_producer = KafkaProducer("localhost", 9092, {"wind": JSONSerializer()})
+        kafka_producer.delivered = 10
+        assert kafka_producer.stats["messages_per_second"] == 5.0
+        kafka_producer.delivered = 12
+        assert kafka_producer.stats["messages_per_second"] == 2.0
+
+    def test_produce_flushes_each_message(self, mocker):
+        producer = mocker.patch("more_utils.messaging.kafka.Producer").return_value
+        producer.flush.return_value = 0
+
+        kafka_producer = KafkaProducer("localhost", 9092, {"wind": JSONSerializer()})
+        kafka_producer.produce({"value": 1}, "wind")
+        kafka_producer.produce({"value": 2}, "wind", partition=None)
+
+        assert producer.flush.call_count == 2
+        assert producer.produce.call_args_list[0][1]["partition"] == 0
+        assert "partition" not in producer.produce.call_args_list[1][1]
+        assert producer.produce.call_args_list[1][1]["value"] == b'{"value": 2}'
+
+
+class TestKafkaConsumer:
+    @pytest.fixture
+    def consumer(self, mocker):
+        consumer = mocker.patch("more_utils.messaging.kafka.Consumer").return_value
+        consumer.consume.return_value = [
+            create_message(mocker, "wind", b'{"speed": 1.0}'),
+            # A tombstone, a malformed record and a consumer error.
+            create_message(mocker, "wind", None),
+            create_message(mocker, "wind", b'{"speed": 2.0},{"speed": 3.0}'),
+            create_message(mocker, "wind", None, error=KafkaError(KafkaError._FAIL)),
+            create_message(mocker, "wind", b'{"speed": 4.0}', partition=1),
+            create_message(
+                mocker, "turbine", DescriptorProto(name="t1").SerializeToString()
+            ),
+        ]
+        return consumer
+
+    def test_consume_batch_outputs(self, consumer):
+        kafka_consumer = KafkaConsumer(
+            "localhost",
+            9092,
+            {
+                "wind": JSONDeserializer(),
+                "turbine": ProtobufDeserializer(DescriptorProto),
+            },
+        )
+        consumer.subscribe.assert_called_once_with(["wind", "turbine"])
+
+        batch = kafka_consumer.consume_batch(max_messages=10, timeout=0.5)
+        consumer.consume.assert_called_with(num_messages=10, timeout=0.5)
+        assert batch["wind"] == [{"speed": 1.0}, None, {"speed": 4.0}]
+        assert [record.name for record in batch["turbine"]] == ["t1"]
+
+        batch = kafka_consumer.consume_batch(output="arrow")
+        assert isinstance(batch["wind"], pyarrow.RecordBatch)
+        assert batch["wind"].column("speed").to_pylist() == [1.0, 4.0]
+        assert batch["turbine"].column("name").to_pylist() == ["t1"]
+
+        batch = kafka_consumer.consume_batch(output="pandas")
+        assert list(batch["wind"]["speed"]) == [1.0, 4.0]
+
+        with pytest.raises(ValueError):
+            kafka_consumer.consume_batch(output="json")
+
+    def test_consume_partitions_and_commit(self, consumer):
+        kafka_consumer = KafkaConsumer(
+            "localhost",
+            9092,
+            {
+                "wind": JSONDeserializer(),
+                "turbine": ProtobufDeserializer(DescriptorProto),
+            },
+            **{"enable.auto.commit": False},
+        )
+        batch = kafka_consumer.consume_partitions()
+        assert batch[("wind", 0)] == [{"speed": 1.0}, None]
+        assert batch[("wind", 1)] == [{"speed": 4.0}]
+        assert len(batch[("turbine", 0)]) == 1
+
+        kafka_consumer.commit()
+        consumer.commit.assert_called_once_with(asynchronous=False)
+        # Nothing consumed since the last commit is not an error.
+        consumer.commit.side_effect = KafkaException(KafkaError(KafkaError._NO_OFFSET))
+        kafka_consumer.commit()
+        consumer.commit.side_effect = KafkaException(KafkaError(KafkaError._FAIL))
+        with pytest.raises(KafkaException):
+            kafka_consumer.commit()
+
+    def test_json_deserialize_many_requires_one_record_per_payload(self):
+        deserializer = JSONDeserializer()
+        assert deserializer.deserialize_many([b"1", b'{"a": 2}'], None) == [1, {"a": 2}]
+        with pytest.raises(SerializationError):
+            deserializer.deserialize_many([b"1,2", b"3"], None)
+        with pytest.raises(SerializationError):
+            deserializer.deserialize_many([b"1", None], None)
+        assert deserializer(None, None) is None
+
+
+class TestKafkaConsumerGroup:
+    def test_thread_workers_handle_then_commit(self, mocker):
+        events = []
+        lock = threading.Lock()
+        handled = threading.Event()
+        consumers = []
+
+        def create_consumer(configs):
+            # Each worker is assigned one partition of the topic.
+            consumer = mocker.MagicMock()
+            with lock:
+                partition = len(consumers)
+                consumers.append(consumer)
+            batches = [
+                [
+                    create_message(mocker, "wind", b'{"speed": 1.0}', partition),
+                    create_message(mocker, "wind", b'{"speed": 2.0}', partition),
+                ]
+            ]
+
+            def consume_side_effect(num_messages, timeout):
+                on_assign = consumer.subscribe.call_args[1]["on_assign"]
+                on_revoke = consumer.subscribe.call_args[1]["on_revoke"]
+                if batches:
+                    on_assign(consumer, [partition])
+                    return batches.pop()
+                if not consumer.revoked:
+                    consumer.revoked = True
+                    on_revoke(consumer, [partition])
+                time.sleep(0.01)
+                return []
+
+            def commit_side_effect(asynchronous):
+                with lock:
+                    events.append(("commit", partition))
+
+            consumer.revoked = False
+            consumer.consume.side_effect = consume_side_effect
+            consumer.commit.side_effect = commit_side_effect
+            consumer.configs = configs
+            return consumer
+
+        def handler(records, topic, partition):
+            with lock:
+                speeds = tuple(record["speed"] for record in records)
+                events.append(("handle", partition, speeds))
+                if sum(event[0] == "handle" for event in events) == 2:
+                    handled.set()
+
+        mocker.patch("more_utils.messaging.kafka.Consumer", side_effect=create_consumer)
+
+        group = KafkaConsumerGroup(
+            "localhost",
+            9092,
+            {"wind": JSONDeserializer()},
+            handler,
+            num_workers=2,
+            use_threads=True,
+            timeout=0.01,
+        )
+        with group:
+            assert handled.wait(5)
+            deadline = time.time() + 5
+            while time.time() < deadline and not all(
+                consumer.revoked for consumer in consumers
+            ):
+                time.sleep(0.01)
+        assert not group.running
+
+        assert len(consumers) == 2
+        for partition, consumer in enumerate(consumers):
+            assert consumer.configs["enable.auto.commit"] is False
+            consumer.close.assert_called_once_with()
+            worker_events = [event for event in events if event[1] == partition]
+            # The batch is handled in offset order and committed after the
+            # handler, then again when the partition is revoked.
+            assert worker_events == [
+                ("handle", partition, (1.0, 2.0)),
+                ("commit", partition),
+                ("commit", partition),
+            ]
+
+    def test_failed_worker_is_raised(self, mocker):
+        def create_consumer(configs):
+            consumer = mocker.MagicMock()
+            batches = [[create_message(mocker, "wind", b'{"speed": -1.0}')]]
+
+            def consume_side_effect(num_messages, timeout):
+                if batches:
+                    return batches.pop()
+                time.sleep(0.01)
+                return []
+
+            consumer.consume.side_effect = consume_side_effect
+            return consumer
+
+        def handler(records, topic, partition):
+            if records[0]["speed"] < 0:
+                raise ValueError("negative wind speed")
+
+        mocker.patch("more_utils.messaging.kafka.Consumer", side_effect=create_consumer)
+        group = KafkaConsumerGroup(
+            "localhost",
+            9092,
+            {"wind": JSONDeserializer()},
+            handler,
+            use_threads=True,
+            timeout=0.01,
+        )
+        group.start()
+        with pytest.raises(RuntimeError) as error:
+            group.join(5)
+        assert isinstance(error.value.__cause__, ValueError)
+        assert group.failed_workers == ["mygroup-worker-0"]
+        assert not group.running
+        with pytest.raises(RuntimeError):
+            group.shutdown()
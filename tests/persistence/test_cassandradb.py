@@ -0,0 +1,195 @@
+"""Test class for CassandraDB session"""
+
+from uuid import UUID
+import pandas as pd
+import pytest
+from cassandra.query import tuple_factory
+from more_utils.persistence.cassandradb import (
+    CassandraDB,
+    CassandraDBSession,
+    create_timeseries_entity,
+    to_column_values,
+)
+
+
+class TestCassandraDB:
+    def test_to_column_values(self):
+        timestamps = pd.Series(pd.to_datetime(["1970-01-01 00:00:01", None]))
+        assert to_column_values(timestamps) == [1000, None]
+        assert to_column_values(pd.Series(["a", None])) == ["a", None]
+        assert to_column_values(pd.Series([1, 2])) == [1, 2]
+
+    def test_insert_concurrently(self, mocker):
+        mocker.patch("more_utils.persistence.cassandradb.register_connection")
+        execute_mock = mocker.patch(
+            "more_utils.persistence.cassandradb.execute_concurrent_with_args"
+        )
+        cursor = mocker.MagicMock()
+        df = pd.DataFrame(
+            {
+                "timestamp": pd.date_range("2022-01-01", periods=3, freq="1h"),
+                "value": [1.0, 2.0, 3.0],
+            }
+        )
+
+        session = CassandraDBSession("default", cursor)
+        time_series_id = session.insert(df, create_timeseries_entity(df), concurrency=8)
+
+        query = cursor.prepare.call_args[0][0]
+        assert '("time_series_id", "ts_timestamp", "value")' in query
+        rows = execute_mock.call_args[0][2]
+        assert isinstance(time_series_id, UUID)
+        assert [row[0] for row in rows] == [time_series_id] * 3
+        assert [row[2] for row in rows] == [1.0, 2.0, 3.0]
+        assert execute_mock.call_args[1]["concurrency"] == 8
+
+    def test_store_caches_entity_and_schema(self, mocker):
+        mocker.patch("more_utils.persistence.cassandradb.register_connection")
+        mocker.patch("more_utils.persistence.cassandradb.execute_concurrent_with_args")
+        sync_mock = mocker.patch("more_utils.persistence.cassandradb.sync_table")
+        cluster = mocker.MagicMock()
+        cursor = cluster.connect.return_value
+        cursor.execute.return_value = []
+        df = pd.DataFrame(
+            {
+                "timestamp": pd.date_range("2022-01-01", periods=3, freq="1h"),
+                "value": [1.0, 2.0, 3.0],
+            }
+        )
+
+        sink_conn = CassandraDB("default", "moreutils", cluster)
+        sink_conn.store(df)
+        sink_conn.store(df.copy())
+        assert cursor.execute.call_count == 1
+        assert sync_mock.call_count == 1
+        assert len(sink_conn._entities) == 1
+
+        sink_conn.invalidate_schema("moreutils")
+        sink_conn.store(df)
+        assert cursor.execute.call_count == 2
+
+        # One session and one prepared INSERT serve all the stores.
+        assert cluster.connect.call_count == 1
+        assert cursor.prepare.call_count == 1
+        sink_conn.close()
+        cursor.shutdown.assert_called_once()
+
+    def test_load_time_series_ranges(self, mocker):
+        from datetime import datetime
+        from uuid import uuid1
+
+        mocker.patch("more_utils.persistence.cassandradb.register_connection")
+        cluster = mocker.MagicMock()
+        table = cluster.metadata.keyspaces["moreutils"].tables["time_series"]
+        table.name = "time_series"
+        table.clustering_key = [mocker.MagicMock()]
+        table.clustering_key[0].name = "ts_timestamp"
+        table.columns = {"time_series_id": None, "ts_timestamp": None, "value": None}
+
+        def execute_side_effect(statement):
+            result = mocker.MagicMock()
+            start = statement.values[1]
+            result.column_names = ["ts_timestamp", "value"]
+            result.current_rows = [(start, 1.0)]
+            result.has_more_pages = False
+            return result
+
+        cursor = cluster.connect.return_value
+        cursor.execute.side_effect = execute_side_effect
+        cursor.prepare.return_value.bind.side_effect = lambda params: mocker.MagicMock(
+            values=params
+        )
+
+        sink_conn = CassandraDB("default", "moreutils", cluster)
+        data = sink_conn.load(
+            str(uuid1()), "2022-01-01 00:00", "2022-01-01 04:00", max_workers=2
+        )
+        assert data.column_names == ["timestamp", "value"]
+        assert data.column("timestamp").to_pylist() == [
+            datetime(2022, 1, 1, 0),
+            datetime(2022, 1, 1, 2),
+        ]
+        queries = [call[0][0] for call in cursor.prepare.call_args_list]
+        assert any('"ts_timestamp" < ?' in query for query in queries)
+        assert any('"ts_timestamp" <= ?' in query for query in queries)
+
+        # The shared session yields tuples and keeps its prepared statements.
+        sink_conn.load(
+            str(uuid1()), "2022-01-01 00:00", "2022-01-01 04:00", max_workers=2
+        )
+        assert cluster.connect.call_count == 1
+        assert cursor.prepare.call_count == 2
+        assert sink_conn.shared_session().row_factory is tuple_factory
+
+    def test_bucketed_entity_and_insert(self, mocker):
+        mocker.patch("more_utils.persistence.cassandradb.register_connection")
+        execute_mock = mocker.patch(
+            "more_utils.persistence.cassandradb.execute_concurrent_with_args"
+        )
+        cursor = mocker.MagicMock()
+        df = pd.DataFrame(
+            {
+                "timestamp": pd.date_range("2022-01-01 23:00", periods=3, freq="1h"),
+                "value": [1.0, 2.0, 3.0],
+            }
+        )
+
+        entity = create_timeseries_entity(df, bucket="day")
+        assert list(entity._partition_keys) == ["time_series_id", "bucket"]
+        assert entity.__table_name__ == "TIME_SERIES_BY_DAY"
+
+        session = CassandraDBSession("default", cursor)
+        session.insert(df, entity, bucket="day")
+
+        query = cursor.prepare.call_args[0][0]
+        assert '("time_series_id", "bucket", "ts_timestamp", "value")' in query
+        rows = execute_mock.call_args[0][2]
+        day = 24 * 3600 * 1000
+        assert [row[1] for row in rows] == [18993 * day, 18994 * day, 18994 * day]
+
+        df.loc[1, "timestamp"] = pd.NaT
+        with pytest.raises(ValueError):
+            session.insert(df, entity, bucket="day")
+        assert execute_mock.call_count == 1
+
+    def test_load_bucketed_time_series_drops_bucket(self, mocker):
+        from datetime import datetime
+        from uuid import uuid1
+
+        mocker.patch("more_utils.persistence.cassandradb.register_connection")
+        cluster = mocker.MagicMock()
+        table = cluster.metadata.keyspaces["moreutils"].tables["time_series_by_day"]
+        table.name = "time_series_by_day"
+        table.clustering_key = [mocker.MagicMock()]
+        table.clustering_key[0].name = "ts_timestamp"
+        table.columns = {
+            "time_series_id": None,
+            "bucket": None,
+            "ts_timestamp": None,
+            "value": None,
+        }
+
+        def execute_side_effect(statement):
+            result = mocker.MagicMock()
+            result.column_names = ["ts_timestamp", "value"]
+            result.current_rows = [(statement.values[1], 1.0)]
+            result.has_more_pages = False
+            return result
+
+        cursor = cluster.connect.return_value
+        cursor.execute.side_effect = execute_side_effect
+        cursor.prepare.return_value.bind.side_effect = lambda params: mocker.MagicMock(
+            values=params
+        )
+
+        sink_conn = CassandraDB("default", "moreutils", cluster)
+        data = sink_conn.load(
+            str(uuid1()), "2022-01-01 12:00", "2022-01-02 12:00", bucket="day"
+        )
+        assert data.column_names == ["timestamp", "value"]
+        assert data.column("timestamp").to_pylist() == [
+            datetime(2022, 1, 1),
+            datetime(2022, 1, 2),
+        ]
+        queries = [call[0][0] for call in cursor.prepare.call_args_list]
+        assert all(query.startswith('SELECT "ts_timestamp", "value" ') for query in queries)
@@ -1,8 +1,12 @@
 """Test class for ModelarDB connection and session"""
 
+import time
 import types
+import pytest
 from more_utils.persistence import ModelarDBSession
+from more_utils.persistence.arrow import FlightClientPool
 from pymodelardb.cursors import ArrowCursor
+from pymodelardb.types import ProgrammingError
 
 
 class TestModelarDB:
@@ -37,3 +41,60 @@ class TestModelarDB:
         assert isinstance(session.result_set(), types.GeneratorType)
         assert len(list(session.result_set())) == 3
         session.close()
+
+    def test_arrow_sessions_reuse_flight_clients(self, modelardb_conn):
+        with modelardb_conn.create_arrow_session(conn_type="edge"):
+            ...
+        pool = modelardb_conn._flight_client_pools["edge"]
+        assert len(pool) == 1
+        client = pool.acquire()
+        pool.release(client)
+
+        with modelardb_conn.create_arrow_session(conn_type="edge"):
+            assert len(pool) == 0
+        assert len(pool) == 1
+        assert pool.acquire() is client
+
+    def test_flight_client_pool_evicts_idle_clients_and_closes(self, mocker):
+        pool = FlightClientPool("grpc://localhost:9999", max_size=1, idle_timeout=60)
+        client = pool.acquire()
+        other_client = pool.acquire()
+        pool.release(client)
+        # The pool is full, the client is dropped.
+        pool.release(other_client)
+        assert len(pool) == 1
+
+        mocker.patch(
+            "more_utils.persistence.arrow.time.monotonic",
+            return_value=time.monotonic() + 61,
+        )
+        assert pool.acquire() is not client
+        assert len(pool) == 0
+
+        pool.release(client)
+        pool.close()
+        assert len(pool) == 0
+        pool.release(other_client)
+        assert len(pool) == 0
+        with pytest.raises(ProgrammingError):
+            pool.acquire()
+
+    def test_list_tables_is_cached(self, mocker):
+        from more_utils.persistence import ModelarDB
+
+        list_mock = mocker.patch(
+            "more_utils.persistence.ModelarDBSession.list",
+            return_value=iter([[b"wind_turbine"]]),
+        )
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        assert conn_obj.list_tables() == ["wind_turbine"]
+        assert conn_obj.has_table("wind_turbine")
+
+        conn_obj.register_table("solar_panel")
+        assert conn_obj.list_tables() == ["wind_turbine", "solar_panel"]
+        assert list_mock.call_count == 1
+
+        list_mock.return_value = iter([[b"wind_turbine"]])
+        assert conn_obj.refresh() == ["wind_turbine"]
+        assert list_mock.call_count == 2
+        conn_obj.close()
@@ -4,7 +4,9 @@ Conf test file for service module
 
 from datetime import datetime
 import socket
+import pyarrow
 import pytest
+from more_utils.time_series.columnar import ArrowBatchStream
 
 
 DEFAULT_PORT_NUMBER = 9999
@@ -115,6 +117,55 @@ def data_models_tid_1(data_model_columns):
     return (data_model_columns, (data for data in ts_data))
 
 
+@pytest.fixture(scope="function")
+def patch_execute_v2(mocker):
+    """Patch TimeseriesFactory._execute_v2 with canned result sets.
+
+    A result is either an Arrow table, which is streamed as an
+    ArrowBatchStream like a Flight result set, or a (columns, rows) tuple.
+    A single callable is called with the query params of every query and
+    returns such a result.
+    """
+
+    def to_result_set(result):
+        if isinstance(result, pyarrow.Table):
+            return (
+                result.column_names,
+                ArrowBatchStream(result.to_batches(), result.schema),
+            )
+        return result
+
+    def patch(*results):
+        if len(results) == 1 and callable(results[0]):
+            source = results[0]
+
+            def side_effect(query_params, *args, **kwargs):
+                return to_result_set(source(query_params))
+
+        else:
+            side_effect = [to_result_set(result) for result in results]
+        return mocker.patch(
+            "more_utils.time_series.TimeseriesFactory._execute_v2",
+            side_effect=side_effect,
+        )
+
+    return patch
+
+
+@pytest.fixture(scope="function")
+def patch_execute_by_tid(mocker, data_points_tid_1, data_points_tid_2, data_points_tid_3):
+    """Patch TimeseriesFactory._execute with the data points of TIDs 1, 2 and 3."""
+    data_points = {1: data_points_tid_1, 2: data_points_tid_2, 3: data_points_tid_3}
+
+    def ts_data_side_effect(*args, **kwargs):
+        return data_points[args[0]["TS_ID"]]
+
+    return mocker.patch(
+        "more_utils.time_series.TimeseriesFactory._execute",
+        side_effect=ts_data_side_effect,
+    )
+
+
 def parse_ts(timestamp: str):
     """Parse timestamps from str to datetime.datetime objects."""
     return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S.%f")
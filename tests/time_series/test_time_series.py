@@ -1,9 +1,33 @@
-from more_utils.persistence import ModelarDB
-from more_utils.time_series import TimeseriesFactory
+import asyncio
+import struct
+import pandas as pd
+import pyarrow
+import pytest
+from pymodelardb.types import ProgrammingError
+from pyarrow import parquet
+from more_utils.persistence import AsyncModelarDB, ModelarDB
+from more_utils.time_series import (
+    AsyncTimeseriesFactory,
+    BatchCache,
+    ModelTable,
+    ResultCache,
+    TimeseriesFactory,
+)
+from more_utils.time_series.base import Timeseries
+from more_utils.time_series.cache import combine_time_ranges
+from more_utils.time_series.columnar import ArrowBatchStream, table_to_rows
+from more_utils.time_series.query import (
+    build_aggregate_query,
+    build_query,
+    safe_substitute,
+)
+from more_utils.time_series.schema import SchemaCastPlan
+from more_utils.time_series.segments import SegmentDecoder
+from more_utils.time_series.spill import SpillBuffer
 
 
 class TestTimeseriesFactory:
-    
+
     def test_execute_query(self, mocker, data_points_tid_1):
         mocker.patch(
             "more_utils.persistence.ModelarDBSession.columns",
@@ -29,15 +53,9 @@ class TestTimeseriesFactory:
         conn_obj.close()
 
     def test_create_time_series_fetch_next(
-        self, mocker, data_points_model_table
+        self, patch_execute_v2, data_points_model_table
     ):
-        def ts_data_side_effect(*args, **kwargs):
-            return data_points_model_table
-
-        mocker.patch(
-            "more_utils.time_series.TimeseriesFactory._execute_v2",
-            side_effect=ts_data_side_effect,
-        )
+        patch_execute_v2(lambda query_params: data_points_model_table)
 
         conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
         ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
@@ -53,22 +71,7 @@ class TestTimeseriesFactory:
         ]
         conn_obj.close()
 
-    def test_get_time_series_data_from_ts_ids_fetch_all(
-        self, mocker, data_points_tid_1, data_points_tid_2, data_points_tid_3
-    ):
-        def ts_data_side_effect(*args, **kwargs):
-            if 1 == args[0]["TS_ID"]:
-                return data_points_tid_1
-            if 2 == args[0]["TS_ID"]:
-                return data_points_tid_2
-            if 3 == args[0]["TS_ID"]:
-                return data_points_tid_3
-
-        mocker.patch(
-            "more_utils.time_series.TimeseriesFactory._execute",
-            side_effect=ts_data_side_effect,
-        )
-
+    def test_get_time_series_data_from_ts_ids_fetch_all(self, patch_execute_by_tid):
         conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
         ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
         decompressed_ts = ts_factory.create_time_series_from_ts_ids(
@@ -78,9 +81,10 @@ class TestTimeseriesFactory:
             limit=3,
             value_column_labels=["active power", "rotor speed", "wind speed"],
         )
-        assert len(decompressed_ts.fetch_all(fetch_type="pandas")) == 9
+        ts_df = decompressed_ts.fetch_all(fetch_type="pandas")
+        assert len(ts_df) == 3
+        assert list(ts_df["rotor speed"]) == [0.44, 0.55, 0.77]
         assert decompressed_ts.columns == [
-            "TID",
             "TIMESTAMP",
             "active power",
             "rotor speed",
@@ -88,22 +92,56 @@ class TestTimeseriesFactory:
         ]
         conn_obj.close()
 
-    def test_get_time_series_data_from_ts_ids_fetch_next(
-        self, mocker, data_points_tid_1, data_points_tid_2, data_points_tid_3
-    ):
-        def ts_data_side_effect(*args, **kwargs):
-            if 1 == args[0]["TS_ID"]:
-                return data_points_tid_1
-            if 2 == args[0]["TS_ID"]:
-                return data_points_tid_2
-            if 3 == args[0]["TS_ID"]:
-                return data_points_tid_3
+    def test_get_time_series_data_from_ts_ids_batch_query(self, mocker):
+        data_points = pyarrow.table(
+            {
+                "TID": [2, 1, 2, 1, 1],
+                "TIMESTAMP": pyarrow.array(
+                    [0, 0, 1000, 1000, 2000], type=pyarrow.timestamp("ms")
+                ),
+                "VALUE": pyarrow.array([20, 10, 21, 11, 12], pyarrow.float32()),
+            }
+        )
+
+        def ts_data_side_effect(query_params, value_column_label=None, columnar=False):
+            # Only the ids of the query, with the value column labelled.
+            ts_ids = query_params.get("TS_IDS") or [query_params["TS_ID"]]
+            table = data_points.filter(
+                pyarrow.compute.is_in(data_points.column("TID"), pyarrow.array(ts_ids))
+            )
+            columns = [
+                value_column_label if value_column_label and name == "VALUE" else name
+                for name in table.column_names
+            ]
+            if columnar:
+                return (columns, ArrowBatchStream(table.to_batches(), table.schema))
+            return (columns, iter(table_to_rows(table)))
 
         mocker.patch(
             "more_utils.time_series.TimeseriesFactory._execute",
             side_effect=ts_data_side_effect,
         )
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
+        for kwargs in [
+            {"value_column_labels": ["active power", "wind speed"]},
+            {"merge_on": None},
+        ]:
+            per_id_df, batch_df = [
+                ts_factory.create_time_series_from_ts_ids(
+                    [1, 2], batch_query=batch_query, **kwargs
+                ).fetch_all(fetch_type="pandas")
+                for batch_query in (False, True)
+            ]
+            pd.testing.assert_frame_equal(batch_df, per_id_df)
+        assert list(batch_df["TID"]) == [1, 1, 1, 2, 2]
+        assert list(per_id_df.columns) == ["TID", "TIMESTAMP", "VALUE_1", "VALUE_2"]
+
+        with pytest.raises(ValueError):
+            ts_factory.create_time_series_from_ts_ids([1, 2], limit=2, batch_query=True)
+        conn_obj.close()
 
+    def test_get_time_series_data_from_ts_ids_fetch_next(self, patch_execute_by_tid):
         conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
         ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
         decompressed_ts = ts_factory.create_time_series_from_ts_ids(
@@ -116,9 +154,8 @@ class TestTimeseriesFactory:
         for ts_data in decompressed_ts.fetch_next(
             batch_size=1, fetch_type="pandas"
         ):
-            assert len(ts_data) == 3
+            assert len(ts_data) == 1
         assert decompressed_ts.columns == [
-            "TID",
             "TIMESTAMP",
             "active power",
             "rotor speed",
@@ -148,3 +185,835 @@ class TestTimeseriesFactory:
         assert len(ts_data_models.fetch_all(fetch_type="pandas")) == 4
         assert ts_data_models.columns == data_model_columns
         conn_obj.close()
+
+    def test_create_time_series_from_data_models_overlapping_window(self, mocker):
+        segments = pyarrow.table(
+            {
+                "TID": [1, 1],
+                "START_TIME": pyarrow.array(
+                    pd.to_datetime(["2019-01-01 00:00:00", "2019-01-01 00:00:06"]),
+                    pyarrow.timestamp("ms"),
+                ),
+                "END_TIME": pyarrow.array(
+                    pd.to_datetime(["2019-01-01 00:00:04", "2019-01-01 00:00:08"]),
+                    pyarrow.timestamp("ms"),
+                ),
+                "MTID": [2, 2],
+                "MODEL": [struct.pack(">f", 1.5), struct.pack(">f", 2.5)],
+            }
+        )
+
+        def ts_data_side_effect(query_params, *args, **kwargs):
+            # Filter the segments like the server does for the query.
+            starts = pd.Series(
+                segments.column(query_params["START_TIME_COLUMN"]).to_pandas()
+            )
+            ends = pd.Series(
+                segments.column(query_params["END_TIME_COLUMN"]).to_pandas()
+            )
+            mask = (starts >= pd.Timestamp(query_params["START_TIME"])) & (
+                ends <= pd.Timestamp(query_params["END_TIME"])
+            )
+            table = segments.filter(pyarrow.array(mask))
+            return (
+                table.column_names,
+                ArrowBatchStream(table.to_batches(), table.schema),
+            )
+
+        mocker.patch(
+            "more_utils.time_series.TimeseriesFactory._execute",
+            side_effect=ts_data_side_effect,
+        )
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
+        data_points = ts_factory.create_time_series_from_data_models(
+            [1],
+            sampling_interval=2000,
+            from_date="2019-01-01 00:00:02",
+            to_date="2019-01-01 00:00:06",
+        ).fetch_all(fetch_type="pandas")
+        # Both segments only partly overlap the window, they are still fetched
+        # and their data points are trimmed to it.
+        assert list(data_points["TIMESTAMP"]) == list(
+            pd.to_datetime(
+                ["2019-01-01 00:00:02", "2019-01-01 00:00:04", "2019-01-01 00:00:06"]
+            )
+        )
+        assert list(data_points["VALUE"]) == [1.5, 1.5, 2.5]
+        conn_obj.close()
+
+    def test_create_time_series_columnar_fetch_next(self, patch_execute_v2):
+        record_batch = pyarrow.RecordBatch.from_pydict(
+            {"wind_speed": [4.79, 4.23, 3.86], "active_power": [0.37, 0.55, 0.73]}
+        )
+        patch_execute_v2(
+            lambda query_params: pyarrow.Table.from_batches([record_batch] * 2)
+        )
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
+        decompressed_ts = ts_factory.create_time_series(
+            model_table="wind_turbine", columnar=True
+        )
+        batch_lengths = [
+            len(ts_batch)
+            for ts_batch in decompressed_ts.fetch_next(fetch_type="arrow", batch_size=4)
+        ]
+        assert batch_lengths == [4, 2]
+        assert isinstance(decompressed_ts.result_set, pyarrow.Table)
+        assert len(decompressed_ts.fetch_all(fetch_type="pandas")) == 2
+        conn_obj.close()
+
+    def test_merge_time_series_on_timestamp(
+        self, data_points_tid_1, data_points_tid_2, data_points_tid_3
+    ):
+        decompressed_ts = Timeseries(
+            [data_points_tid_1, data_points_tid_2, data_points_tid_3],
+            merge_on="TIMESTAMP",
+        )
+        ts_df = decompressed_ts.fetch_all(fetch_type="pandas")
+        assert len(ts_df) == 3
+        assert decompressed_ts.columns == [
+            "TIMESTAMP",
+            "active power",
+            "rotor speed",
+            "wind speed",
+        ]
+        assert list(ts_df["rotor speed"]) == [0.44, 0.55, 0.77]
+
+    def test_merge_time_series_rejects_duplicate_keys(
+        self, data_points_tid_1, data_points_tid_2
+    ):
+        columns, data = data_points_tid_1
+        duplicated = (columns, (row for row in list(data) * 2))
+        decompressed_ts = Timeseries(
+            [duplicated, data_points_tid_2], merge_on="TIMESTAMP"
+        )
+        with pytest.raises(ValueError, match="Duplicate TIMESTAMP"):
+            decompressed_ts.fetch_all(fetch_type="pandas")
+
+    def test_merge_time_series_streams_misaligned_batches(self):
+        def series(label, seconds):
+            rows = [
+                (pd.Timestamp(second, unit="s"), float(second)) for second in seconds
+            ]
+            return (["TIMESTAMP", label], iter(rows))
+
+        def create_time_series():
+            return Timeseries(
+                [
+                    series("a", [0, 1, 2, 3, 4, 5]),
+                    series("b", [0, 2, 4, 6]),
+                    series("c", [5, 6, 7]),
+                ],
+                merge_on="TIMESTAMP",
+            )
+
+        expected = create_time_series().fetch_all(fetch_type="pandas")
+        assert len(expected) == 8
+        for batch_size in [1, 2, 3]:
+            time_series = create_time_series()
+            batches = list(time_series.fetch_next(batch_size=batch_size))
+            # Every timestamp is emitted once, with the columns of all series.
+            assert all(
+                list(batch.columns) == ["TIMESTAMP", "a", "b", "c"] for batch in batches
+            )
+            merged = pd.concat(batches, ignore_index=True)
+            pd.testing.assert_frame_equal(merged, expected)
+
+    def test_get_time_series_data_from_ts_ids_concurrently(self, patch_execute_by_tid):
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
+        decompressed_ts = ts_factory.create_time_series_from_ts_ids(
+            ts_ids=[3, 1, 2],
+            value_column_labels=["wind speed", "active power", "rotor speed"],
+            max_workers=3,
+            merge_on=None,
+        )
+        ts_df = decompressed_ts.fetch_all(fetch_type="pandas")
+        assert list(ts_df["TID"]) == [3, 3, 3, 1, 1, 1, 2, 2, 2]
+        conn_obj.close()
+
+    def test_async_create_time_series_fetch_next(
+        self, patch_execute_v2, data_points_model_table
+    ):
+        columns, rows = data_points_model_table
+        rows = list(rows)
+        patch_execute_v2(lambda query_params: (columns, iter(rows)))
+
+        async def fetch_batches():
+            conn_obj = AsyncModelarDB(
+                ModelarDB.connect(hostname="localhost", interface="arrow")
+            )
+            ts_factory = AsyncTimeseriesFactory(source_db_conn=conn_obj)
+            decompressed_ts = await ts_factory.create_time_series(
+                model_table="wind_turbine", limit=3
+            )
+            batches = [
+                ts_batch
+                async for ts_batch in decompressed_ts.fetch_next(batch_size=2)
+            ]
+            decompressed_ts = await ts_factory.create_time_series(
+                model_table="wind_turbine", limit=3
+            )
+            byte_batches = [
+                ts_batch
+                async for ts_batch in decompressed_ts.fetch_next(
+                    batch_size=1, batch_unit="bytes"
+                )
+            ]
+            await conn_obj.close()
+            return batches, byte_batches
+
+        batches, byte_batches = asyncio.run(fetch_batches())
+        assert [len(ts_batch) for ts_batch in batches] == [2, 1]
+        # A byte sized batch holds at least one row.
+        assert [len(ts_batch) for ts_batch in byte_batches] == [1, 1, 1]
+
+    def test_fetch_all_mixed_type_column(self, mocker, patch_execute_v2):
+        mocker.patch("more_utils.time_series.base.DEFAULT_FETCH_CHUNK_SIZE", 2)
+        rows = [(1.0, "ok"), (2.0, 3), (3.0, 4), (4.0, None)]
+        patch_execute_v2((["wind_speed", "status"], iter(rows)))
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
+        table = ts_factory.create_time_series("wind_turbine").fetch_all(
+            fetch_type="arrow"
+        )
+        assert table.column("wind_speed").to_pylist() == [1.0, 2.0, 3.0, 4.0]
+        assert table.column("status").to_pylist() == ["ok", "3", "4", None]
+        conn_obj.close()
+
+    def test_create_aggregated_time_series_client_fallback(self, mocker):
+        raw_table = pyarrow.table(
+            {
+                "datetime": pyarrow.array(
+                    [0, 30_000, 60_000, 180_000], type=pyarrow.timestamp("ms")
+                ),
+                "wind_speed": pyarrow.array([1.0, 3.0, 5.0, 7.0], pyarrow.float32()),
+            }
+        )
+
+        def query_side_effect(query, columnar=False):
+            if "GROUP BY" in query:
+                raise ValueError("NULL RESPONSE FROM SERVER.")
+            return (
+                raw_table.column_names,
+                ArrowBatchStream(raw_table.to_batches(), raw_table.schema),
+            )
+
+        mocker.patch(
+            "more_utils.time_series.TimeseriesFactory._execute_query",
+            side_effect=query_side_effect,
+        )
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
+        aggregated_ts = ts_factory.create_aggregated_time_series(
+            "wind_turbine",
+            bucket="1min",
+            aggs=["avg", "mean", "max"],
+            columns=["wind_speed"],
+        )
+        ts_df = aggregated_ts.fetch_all(fetch_type="pandas")
+        assert list(ts_df.columns) == ["datetime", "wind_speed_avg", "wind_speed_max"]
+        assert list(ts_df["wind_speed_avg"]) == [2.0, 5.0, 7.0]
+
+        errors = {
+            "GROUP BY": ProgrammingError("unable to execute query due to: stddev"),
+            "SELECT": ProgrammingError("unable to connect to: grpc://localhost"),
+        }
+
+        def error_side_effect(query, columnar=False):
+            raise next(error for key, error in errors.items() if key in query)
+
+        mocker.patch(
+            "more_utils.time_series.TimeseriesFactory._execute_query",
+            side_effect=error_side_effect,
+        )
+        # Only an unsupported query falls back, other errors are raised.
+        with pytest.raises(ProgrammingError, match="unable to connect"):
+            ts_factory.create_aggregated_time_series(
+                "wind_turbine", columns=["wind_speed"]
+            )
+        errors["GROUP BY"] = errors["SELECT"]
+        with pytest.raises(ProgrammingError, match="unable to connect"):
+            ts_factory.create_aggregated_time_series(
+                "wind_turbine", columns=["wind_speed"]
+            )
+        assert ts_factory._execute_query.call_count == 3
+        conn_obj.close()
+
+    def test_create_time_series_served_from_result_cache(
+        self, patch_execute_v2, tmp_path
+    ):
+        timestamps = pd.date_range("2022-01-01", periods=10, freq="1s")
+        raw_table = pyarrow.table(
+            {
+                "datetime": pyarrow.array(timestamps, type=pyarrow.timestamp("ms")),
+                "wind_speed": pyarrow.array(range(10), pyarrow.float32()),
+            }
+        )
+        fetched_ranges = []
+
+        def ts_data_side_effect(query_params):
+            start = pd.Timestamp(query_params["START_TIME"])
+            end = pd.Timestamp(query_params["END_TIME"])
+            fetched_ranges.append((start, end))
+            mask = (timestamps >= start) & (timestamps <= end)
+            return raw_table.filter(pyarrow.array(mask))
+
+        patch_execute_v2(ts_data_side_effect)
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(
+            source_db_conn=conn_obj, result_cache=ResultCache(str(tmp_path))
+        )
+        first_ts = ts_factory.create_time_series(
+            "wind_turbine", "2022-01-01 00:00:00", "2022-01-01 00:00:04"
+        )
+        assert len(first_ts.fetch_all(fetch_type="pandas")) == 5
+
+        second_ts = ts_factory.create_time_series(
+            "wind_turbine", "2022-01-01 00:00:02", "2022-01-01 00:00:07", columnar=True
+        )
+        ts_df = second_ts.fetch_all(fetch_type="pandas")
+        assert list(ts_df["wind_speed"]) == [2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+        assert fetched_ranges[1] == (
+            pd.Timestamp("2022-01-01 00:00:04.001"),
+            pd.Timestamp("2022-01-01 00:00:07"),
+        )
+        conn_obj.close()
+
+    def test_segment_queries_bypass_result_cache(self, mocker, tmp_path):
+        segments = pyarrow.table(
+            {
+                "TID": [1, 1, 1],
+                "START_TIME": pyarrow.array(
+                    [0, 3000, 6000], type=pyarrow.timestamp("ms")
+                ),
+                "END_TIME": pyarrow.array(
+                    [3000, 6000, 9000], type=pyarrow.timestamp("ms")
+                ),
+            }
+        )
+        queried = []
+
+        def ts_data_side_effect(query_params, value_column_label=None, columnar=False):
+            queried.append(query_params)
+            start_column = segments.column(query_params["START_TIME_COLUMN"])
+            end_column = segments.column(query_params["END_TIME_COLUMN"])
+            table = segments.filter(
+                pyarrow.compute.and_(
+                    pyarrow.compute.greater_equal(
+                        start_column, pd.Timestamp(query_params["START_TIME"])
+                    ),
+                    pyarrow.compute.less_equal(
+                        end_column, pd.Timestamp(query_params["END_TIME"])
+                    ),
+                )
+            )
+            return (
+                table.column_names,
+                ArrowBatchStream(table.to_batches(), table.schema),
+            )
+
+        mocker.patch(
+            "more_utils.time_series.TimeseriesFactory._execute",
+            side_effect=ts_data_side_effect,
+        )
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(
+            source_db_conn=conn_obj, result_cache=ResultCache(str(tmp_path))
+        )
+        from_date, to_date = "1970-01-01 00:00:02", "1970-01-01 00:00:08"
+        segment_counts = [
+            len(
+                ts_factory.create_time_series_data_models_from_ts_ids(
+                    [1], from_date, to_date, columnar=True, overlapping=overlapping
+                ).fetch_all(fetch_type="pandas")
+            )
+            for overlapping in (False, True, False)
+        ]
+        assert segment_counts == [1, 3, 1]
+        # Every query reached the server with the full time range.
+        assert [(params["START_TIME"], params["END_TIME"]) for params in queried] == [
+            (from_date, to_date)
+        ] * 3
+        conn_obj.close()
+
+    def test_result_cache_keeps_rows_sharing_a_timestamp(self, tmp_path):
+        def part(timestamps, values):
+            return pyarrow.table(
+                {
+                    "datetime": pyarrow.array(timestamps, pyarrow.timestamp("ms")),
+                    "value": pyarrow.array(values, pyarrow.float64()),
+                }
+            )
+
+        # Two time series share the timestamps, the second part overlaps the
+        # first on 2000 ms.
+        first = part([0, 0, 1000, 1000, 2000, 2000], [1, 2, 3, 4, 5, 6])
+        second = part([2000, 2000, 3000, 3000], [5, 6, 7, 8])
+        table = combine_time_ranges(
+            [(2000, 3000, second), (0, 2000, first)], "datetime", 0, 3000
+        )
+        assert table.column("value").to_pylist() == [1, 2, 3, 4, 5, 6, 7, 8]
+
+        cache = ResultCache(str(tmp_path))
+        assert cache.store("key", 0, 2000, first)
+        now = int(pd.Timestamp.now(tz="UTC").value // 1_000_000)
+        assert not cache.store("key", 3000, now + 60_000, second)
+        parts, missing = cache.lookup("key", 0, now)
+        assert [(start, end) for start, end, _ in parts] == [(0, 2000)]
+        assert parts[0][2].equals(first)
+        assert missing == [(2001, now)]
+
+    def test_time_series_reiterated_from_batch_cache(self, patch_execute_v2):
+        raw_table = pyarrow.table(
+            {
+                "datetime": pyarrow.array(
+                    [0, 1000, 2000, 3000, 4000], type=pyarrow.timestamp("ms")
+                ),
+                "wind_speed": pyarrow.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+            }
+        )
+        patch_execute_v2(raw_table)
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        batch_cache = BatchCache(max_bytes=1024**2)
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj, batch_cache=batch_cache)
+        time_series = ts_factory.create_time_series("wind_turbine", columnar=True)
+
+        first_pass = [len(batch) for batch in time_series.fetch_next(batch_size=2)]
+        second_pass = [len(batch) for batch in time_series.fetch_next(batch_size=3)]
+        assert first_pass == [2, 2, 1]
+        assert second_pass == [3, 2]
+        assert len(time_series.fetch_all(fetch_type="pandas")) == 5
+        assert time_series.fetch_all(fetch_type="arrow").num_rows == 5
+
+        ts_df = time_series.between("1970-01-01 00:00:01", "1970-01-01 00:00:03")
+        assert list(ts_df["wind_speed"]) == [2.0, 3.0, 4.0]
+        assert time_series.cache_stats["evictions"] == 0
+        assert time_series.cache_stats["batches"] == 3
+        conn_obj.close()
+
+    def test_time_series_larger_than_batch_cache(self, patch_execute_v2):
+        raw_table = pyarrow.table(
+            {
+                "datetime": pyarrow.array(
+                    [0, 1000, 2000, 3000, 4000], type=pyarrow.timestamp("ms")
+                ),
+                "wind_speed": pyarrow.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+            }
+        )
+        patch_execute_v2(raw_table)
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        # Smaller than a single batch, so no batch is cached.
+        batch_cache = BatchCache(max_bytes=8)
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj, batch_cache=batch_cache)
+        time_series = ts_factory.create_time_series("wind_turbine", columnar=True)
+
+        assert time_series.fetch_all(fetch_type="arrow").equals(raw_table)
+        batches = list(time_series.fetch_next(batch_size=2))
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        ts_df = time_series.between("1970-01-01 00:00:01", "1970-01-01 00:00:03")
+        assert list(ts_df["wind_speed"]) == [2.0, 3.0, 4.0]
+        assert time_series.cache_stats["batches"] == 0
+        conn_obj.close()
+
+    def test_fetch_all_spills_to_memory_mapped_table(self, patch_execute_v2, tmp_path):
+        record_batch = pyarrow.RecordBatch.from_pydict(
+            {"wind_speed": [4.79, 4.23, 3.86], "active_power": [0.37, 0.55, 0.73]}
+        )
+        patch_execute_v2(pyarrow.Table.from_batches([record_batch] * 4))
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(
+            source_db_conn=conn_obj, spill_threshold=1, spill_dir=str(tmp_path)
+        )
+        time_series = ts_factory.create_time_series("wind_turbine", columnar=True)
+        mapped_table = time_series.fetch_all(fetch_type="arrow")
+        assert mapped_table.num_rows == 12
+        assert time_series.fetch_mapped() is mapped_table
+        assert list(tmp_path.iterdir()) == []
+
+        lazy_df = time_series.fetch_lazy()
+        assert len(lazy_df) == 12
+        assert list(lazy_df.head(2)["wind_speed"]) == [4.79, 4.23]
+        assert [len(frame) for frame in lazy_df.iter_frames(batch_size=5)] == [5, 5, 2]
+        conn_obj.close()
+
+    def test_spill_buffer_unifies_null_columns(self, tmp_path):
+        spill_buffer = SpillBuffer(memory_limit=0, spill_dir=str(tmp_path))
+        spill_buffer.append(
+            pyarrow.table({"wind_speed": [1.0], "status": pyarrow.nulls(1)})
+        )
+        assert spill_buffer.spilled
+        spill_buffer.append(pyarrow.table({"wind_speed": [2.0], "status": ["ok"]}))
+        spill_buffer.append(
+            pyarrow.table({"wind_speed": [3.0], "status": pyarrow.nulls(1)})
+        )
+
+        table = spill_buffer.to_table()
+        assert table.schema.field("status").type == pyarrow.string()
+        assert table.column("status").to_pylist() == [None, "ok", None]
+        assert table.column("wind_speed").to_pylist() == [1.0, 2.0, 3.0]
+        assert list(tmp_path.iterdir()) == []
+
+    def test_create_time_series_sharded_scan(self, patch_execute_v2):
+        timestamps = pd.date_range("2022-01-01", periods=10, freq="1h")
+        raw_table = pyarrow.table(
+            {
+                "datetime": pyarrow.array(timestamps, type=pyarrow.timestamp("ms")),
+                "wind_speed": pyarrow.array(range(10), pyarrow.float32()),
+            }
+        )
+        shard_params = []
+
+        def ts_data_side_effect(query_params):
+            shard_params.append(query_params)
+            start = pd.Timestamp(query_params["START_TIME"])
+            end = pd.Timestamp(query_params["END_TIME"])
+            if query_params["END_INCLUSIVE"]:
+                mask = (timestamps >= start) & (timestamps <= end)
+            else:
+                mask = (timestamps >= start) & (timestamps < end)
+            return raw_table.filter(pyarrow.array(mask))
+
+        patch_execute_v2(ts_data_side_effect)
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
+        time_series = ts_factory.create_time_series(
+            "wind_turbine",
+            "2022-01-01 00:00:00",
+            "2022-01-01 09:00:00",
+            columnar=True,
+            shard_size="3h",
+            max_workers=2,
+        )
+        ts_df = time_series.fetch_all(fetch_type="pandas")
+        assert list(ts_df["wind_speed"]) == list(range(10))
+        assert [params["END_INCLUSIVE"] for params in shard_params] == [
+            False,
+            False,
+            True,
+        ]
+        conn_obj.close()
+
+    def test_fetch_next_batch_size_in_bytes(
+        self, patch_execute_v2, data_points_model_table
+    ):
+        record_batch = pyarrow.RecordBatch.from_pydict(
+            {"wind_speed": [4.79, 4.23, 3.86, 4.1], "active_power": [0.37] * 4}
+        )
+        patch_execute_v2(
+            pyarrow.Table.from_batches([record_batch] * 2), data_points_model_table
+        )
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
+        columnar_ts = ts_factory.create_time_series("wind_turbine", columnar=True)
+        batch_lengths = [
+            len(ts_batch)
+            for ts_batch in columnar_ts.fetch_next(
+                fetch_type="arrow", batch_size=48, batch_unit="bytes"
+            )
+        ]
+        assert batch_lengths == [3, 3, 2]
+
+        row_ts = ts_factory.create_time_series("wind_turbine")
+        assert len(row_ts.fetch_all(fetch_type="pandas")) == 3
+        assert len(row_ts.fetch_all(fetch_type="arrow")) == 3
+        conn_obj.close()
+
+    def test_tail_model_table(self, patch_execute_v2):
+        def poll_result(timestamps, values):
+            return pyarrow.table(
+                {
+                    "datetime": pyarrow.array(timestamps, pyarrow.timestamp("ms")),
+                    "wind_speed": pyarrow.array(values, pyarrow.float32()),
+                }
+            )
+
+        execute_mock = patch_execute_v2(
+            poll_result([0, 1000], [1.0, 2.0]),
+            poll_result([1000, 1000, 2000], [2.0, 2.5, 3.0]),
+            poll_result([2000], [3.0]),
+            poll_result([0, 1000, 2000], [1.0, 2.0, 3.0]),
+            poll_result([2000, 3000], [3.0, 4.0]),
+        )
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        ts_factory = TimeseriesFactory(source_db_conn=conn_obj)
+        batches = list(ts_factory.tail("wind_turbine", poll_interval=0, max_polls=3))
+        values = pyarrow.Table.from_batches(batches)["wind_speed"].to_pylist()
+        assert values == [1.0, 2.0, 2.5, 3.0]
+        assert execute_mock.call_args_list[0][0][0]["START_TIME"] is None
+        assert (
+            execute_mock.call_args_list[1][0][0]["START_TIME"]
+            == "1970-01-01 00:00:01"
+        )
+
+        # Other columns are tailed from the start, the same ones resume.
+        batches = list(
+            ts_factory.tail(
+                "wind_turbine", poll_interval=0, columns=["wind_speed"], max_polls=1
+            )
+        )
+        assert pyarrow.Table.from_batches(batches).num_rows == 3
+        assert execute_mock.call_args_list[3][0][0]["START_TIME"] is None
+        batches = list(ts_factory.tail("wind_turbine", poll_interval=0, max_polls=1))
+        values = pyarrow.Table.from_batches(batches)["wind_speed"].to_pylist()
+        assert values == [4.0]
+        assert (
+            execute_mock.call_args_list[4][0][0]["START_TIME"]
+            == "1970-01-01 00:00:02"
+        )
+        conn_obj.close()
+
+
+class TestModelTable:
+    def test_persist_dataset_resumes_from_checkpoint(self, mocker, tmp_path):
+        for day in range(3):
+            parquet.write_table(
+                pyarrow.table(
+                    {
+                        "datetime": pyarrow.array(
+                            [day * 1000, day * 1000 + 1], type=pyarrow.timestamp("ms")
+                        ),
+                        "wind speed": [4.79, 4.23],
+                    }
+                ),
+                tmp_path / f"day_{day}.parquet",
+            )
+
+        inserted_rows = []
+
+        def insert_side_effect(table_name, schema, record_batches):
+            inserted_rows.append(sum(batch.num_rows for batch in record_batches))
+
+        mocker.patch("more_utils.persistence.ModelarDB.has_table", return_value=True)
+        mocker.patch(
+            "more_utils.persistence.ModelarDBSession.insert_batches",
+            side_effect=insert_side_effect,
+        )
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        model_table = ModelTable.from_dataset(conn_obj, str(tmp_path), partitioning=None)
+        assert model_table.schema.names == ["datetime", "wind_speed"]
+
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+        first_file = model_table.files[0]
+        with open(checkpoint_path, "w") as checkpoint_file:
+            checkpoint_file.write('{"completed": ["' + first_file + '"]}')
+
+        model_table.persist(
+            "wind_turbine", 0.0, max_workers=2, checkpoint_path=checkpoint_path
+        )
+        assert inserted_rows == [2, 2]
+        conn_obj.close()
+
+    def test_persist_streaming_parquet_file(self, mocker, tmp_path):
+        file_path = str(tmp_path / "wind_turbine.parquet")
+        parquet.write_table(
+            pyarrow.table(
+                {
+                    "datetime": pyarrow.array(range(10), type=pyarrow.timestamp("ms")),
+                    "wind_speed": pyarrow.array(range(10), type=pyarrow.float32()),
+                }
+            ),
+            file_path,
+            row_group_size=4,
+        )
+        read_table = mocker.spy(parquet, "read_table")
+        flight_client = mocker.patch(
+            "more_utils.persistence.arrow.flight.FlightClient"
+        ).return_value
+        flight_client.do_action.return_value = iter([])
+        writer = mocker.MagicMock()
+        flight_client.do_put.return_value = (writer, None)
+        mocker.patch("more_utils.persistence.ModelarDB.has_table", return_value=False)
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        model_table = ModelTable.from_parquet_file(
+            conn_obj, file_path, streaming=True, max_batch_size=3
+        )
+        apply_spy = mocker.spy(model_table._cast_plan, "apply")
+        batches_read_on_write = []
+        writer.write_batch.side_effect = lambda record_batch: (
+            batches_read_on_write.append(apply_spy.call_count)
+        )
+        model_table.persist("wind_turbine", 0.0)
+
+        # The model table is created as it does not exist yet.
+        action = flight_client.do_action.call_args[0][0]
+        assert action.body.to_pybytes() == (
+            b"CREATE MODEL TABLE wind_turbine "
+            b"(datetime TIMESTAMP, wind_speed FIELD(0.0))"
+        )
+        assert flight_client.do_put.call_count == 1
+        assert flight_client.do_put.call_args[0][0].path == [b"wind_turbine"]
+        batches = [call[0][0] for call in writer.write_batch.call_args_list]
+        # Row groups of 4 rows are streamed in batches of at most 3 rows, each
+        # batch is written before the next one is read.
+        assert [batch.num_rows for batch in batches] == [3, 1, 3, 1, 2]
+        assert batches_read_on_write == [1, 2, 3, 4, 5]
+        assert pyarrow.Table.from_batches(batches).column("wind_speed").to_pylist() == [
+            float(value) for value in range(10)
+        ]
+        writer.close.assert_called_once_with()
+        read_table.assert_not_called()
+        conn_obj.close()
+
+    def test_persist_hive_partitions_as_tags(self, mocker, tmp_path):
+        for turbine in (1, 2):
+            partition_dir = tmp_path / f"turbine={turbine}"
+            partition_dir.mkdir()
+            parquet.write_table(
+                pyarrow.table(
+                    {
+                        "datetime": pyarrow.array([0, 1], type=pyarrow.timestamp("ms")),
+                        "wind_speed": [4.79, 4.23],
+                    }
+                ),
+                partition_dir / "data.parquet",
+            )
+
+        inserted_batches = []
+        mocker.patch("more_utils.persistence.ModelarDB.has_table", return_value=True)
+        mocker.patch(
+            "more_utils.persistence.ModelarDBSession.insert_batches",
+            side_effect=lambda table_name, schema, record_batches: inserted_batches.extend(
+                record_batches
+            ),
+        )
+
+        conn_obj = ModelarDB.connect(hostname="localhost", interface="arrow")
+        model_table = ModelTable.from_dataset(conn_obj, str(tmp_path))
+        assert model_table.schema.field("turbine").type == pyarrow.string()
+
+        model_table.persist("wind_turbine", 0.0, max_workers=2)
+        turbines = sorted(
+            value
+            for record_batch in inserted_batches
+            for value in record_batch.column("turbine").to_pylist()
+        )
+        assert turbines == ["1", "1", "2", "2"]
+        conn_obj.close()
+
+    def test_validate_schema_fields_cast_plan(self):
+        arrow_table = pyarrow.table(
+            {
+                "datetime": pyarrow.array([1, 2], type=pyarrow.timestamp("ns")),
+                "wind speed": pyarrow.array([4, 5], type=pyarrow.int32()),
+                "turbine": pyarrow.array(["a", "b"]).dictionary_encode(),
+            }
+        )
+        cast_plan = SchemaCastPlan(arrow_table.schema)
+        assert not cast_plan.is_noop
+        safe_table = ModelTable.validate_schema_fields(arrow_table, cast_plan)
+        assert safe_table.schema == pyarrow.schema(
+            [
+                ("datetime", pyarrow.timestamp("ms")),
+                ("wind_speed", pyarrow.float32()),
+                ("turbine", pyarrow.string()),
+            ]
+        )
+        assert SchemaCastPlan(safe_table.schema).is_noop
+        assert ModelTable.validate_schema_fields(safe_table) is safe_table
+
+
+class TestQuery:
+    def test_build_query_with_projection_and_tid_list(self):
+        assert (
+            build_query(
+                "wind turbine",
+                columns=["datetime", "wind speed"],
+                start_time_column="datetime",
+                start_time="2019-01-01 00:00:02",
+                end_time_column="datetime",
+                end_time="2019-01-01 00:00:06",
+                limit=3,
+            )
+            == 'SELECT datetime, "wind speed" FROM "wind turbine" '
+            "WHERE datetime >= '2019-01-01 00:00:02' "
+            "AND datetime <= '2019-01-01 00:00:06' LIMIT 3"
+        )
+        assert (
+            build_query("Segment", ts_ids=[1, 2], end_time_column="END_TIME", end_time="x'")
+            == "SELECT * FROM Segment WHERE TID IN (1, 2) AND END_TIME <= 'x'''"
+        )
+        with pytest.raises(ValueError):
+            build_query("Segment", ts_ids=[])
+
+    def test_safe_substitute(self):
+        query_params = {
+            "SCHEMA": "DataPoint",
+            "TS_ID": 1,
+            "START_TIME_COLUMN": "TIMESTAMP",
+            "END_TIME_COLUMN": "TIMESTAMP",
+            "START_TIME": None,
+            "END_TIME": "2019-01-01 00:00:06.0",
+            "LIMIT": None,
+        }
+        assert (
+            safe_substitute(query_params)
+            == "SELECT * FROM DataPoint WHERE TID = 1 "
+            "AND TIMESTAMP <= '2019-01-01 00:00:06.0'"
+        )
+
+    def test_build_aggregate_query(self):
+        assert (
+            build_aggregate_query(
+                "wind_turbine", "datetime", 60000, ["wind_speed"], ["avg", "max"]
+            )
+            == "SELECT DATE_BIN(INTERVAL '60000 milliseconds', datetime, "
+            "TIMESTAMP '1970-01-01T00:00:00') AS datetime, "
+            "AVG(wind_speed) AS wind_speed_avg, MAX(wind_speed) AS wind_speed_max "
+            "FROM wind_turbine GROUP BY 1 ORDER BY 1"
+        )
+        assert build_aggregate_query(
+            "wind_turbine", "datetime", 60000, ["wind_speed"], ["avg", "mean"]
+        ) == build_aggregate_query(
+            "wind_turbine", "datetime", 60000, ["wind_speed"], ["avg"]
+        )
+        with pytest.raises(ValueError):
+            build_aggregate_query(
+                "wind_turbine", "datetime", 60000, ["wind_speed"], ["mode"]
+            )
+
+
+class TestSegmentDecoder:
+    def test_decode_segments(self):
+        segments = pd.DataFrame(
+            {
+                "TID": [1, 1, 2],
+                "START_TIME": pd.to_datetime(
+                    ["2019-01-01 00:00:00", "2019-01-01 00:00:06", "2019-01-01 00:00:00"]
+                ),
+                "END_TIME": pd.to_datetime(
+                    ["2019-01-01 00:00:04", "2019-01-01 00:00:08", "2019-01-01 00:00:02"]
+                ),
+                "MTID": [2, 3, 4],
+                "MODEL": [
+                    struct.pack(">f", 1.5),
+                    struct.pack(">dd", 0.0, 2.0),
+                    # 1.0 followed by a control bit 0 for a repeated value.
+                    bytes.fromhex("3f80000000"),
+                ],
+            }
+        )
+        data_points = SegmentDecoder(sampling_interval=2000).decode(segments)
+        assert data_points.column("TID").to_pylist() == [1, 1, 1, 1, 1, 2, 2]
+        assert data_points.column("VALUE").to_pylist() == [
+            1.5, 1.5, 1.5, 2.0, 2.0, 1.0, 1.0
+        ]
+
+        window = SegmentDecoder(sampling_interval=2000).decode(
+            segments, from_date="2019-01-01 00:00:02", to_date="2019-01-01 00:00:06"
+        )
+        assert window.column("TID").to_pylist() == [1, 1, 1, 2]